@@ -0,0 +1,222 @@
+import atexit
+import pathlib
+import shutil
+import tempfile
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from utils.datasets.files.run_file import RunFile
+from utils.datasets.folders.run_folder import RunFolder
+from utils.objectives.distance import Distance
+from utils.objectives.measures import Measures
+
+
+# Genres items are tagged with, and the number of items in the catalogue.
+GENRES = [f"genre_{i}" for i in range(20)]
+NUM_ITEMS = 5000
+
+
+def synthetic_distance(
+    rng: np.random.Generator, num_users: int, num_ratings: int,
+) -> Distance:
+    """
+    Builds a Distance over synthetic ratings, where item popularity follows
+    a Zipf distribution and every item has one to three genres.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        num_users (int): The number of users.
+        num_ratings (int): The number of ratings.
+
+    Returns:
+        Distance: The distance over the synthetic ratings.
+    """
+    popularity = 1 / np.arange(1, NUM_ITEMS + 1)
+    items = rng.choice(NUM_ITEMS, size=num_ratings, p=popularity / popularity.sum())
+    users = rng.integers(num_users, size=num_ratings)
+    ratings = pd.DataFrame({"user_id": users, "movie_id": items}).drop_duplicates()
+
+    # Every item is rated at least once so its rarity is defined.
+    rated = {item: [] for item in range(NUM_ITEMS)}
+    rated.update(ratings.groupby("movie_id")["user_id"].apply(list).to_dict())
+    for item, users_rated in rated.items():
+        if not users_rated:
+            users_rated.append(int(rng.integers(num_users)))
+
+    user_ratings = {user: [0] for user in range(num_users)}
+    user_ratings.update(ratings.groupby("user_id")["movie_id"].apply(list).to_dict())
+
+    tags = {
+        item: set(rng.choice(GENRES, size=rng.integers(1, 4), replace=False))
+        for item in range(NUM_ITEMS)
+    }
+    return Distance(rated, tags, user_ratings, num_users)
+
+
+def synthetic_run(
+    rng: np.random.Generator, num_users: int, depth: int, algorithm: str = "Synthetic",
+) -> RunFile:
+    """
+    Builds a synthetic run recommending `depth` distinct items to each user.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        num_users (int): The number of users.
+        depth (int): The number of recommendations per user.
+        algorithm (str, optional): The algorithm name.
+
+    Returns:
+        RunFile: The synthetic run.
+    """
+    movies = np.stack([
+        rng.choice(NUM_ITEMS, size=depth, replace=False) for _ in range(num_users)
+    ])
+    scores = np.sort(rng.random((num_users, depth)), axis=1)[:, ::-1]
+    df = pd.DataFrame({
+        "user_id": np.repeat(np.arange(num_users), depth),
+        "q0": "Q0",
+        "movie_id": movies.ravel(),
+        "rank": np.tile(np.arange(1, depth + 1), num_users),
+        "score": scores.ravel(),
+        "algorithm": algorithm,
+    })
+    return RunFile(df=df)
+
+
+def rerank_depth(rng: np.random.Generator, depth: int) -> tuple[Callable, int]:
+    """
+    Novelty reranking of 50 users as the candidate depth grows.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        depth (int): The number of candidates reranked per user.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of users it
+        reranks.
+    """
+    distance = synthetic_distance(rng, 1000, 50_000)
+    run = synthetic_run(rng, 50, depth)
+    return lambda: run.rerank("novelty", depth, 0.5, distance), 50
+
+
+def rerank_users(rng: np.random.Generator, users: int) -> tuple[Callable, int]:
+    """
+    Novelty reranking of 50 candidates as the number of users grows.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        users (int): The number of users reranked.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of users it
+        reranks.
+    """
+    distance = synthetic_distance(rng, 1000, 50_000)
+    run = synthetic_run(rng, users, 50)
+    return lambda: run.rerank("novelty", 50, 0.5, distance), users
+
+
+def diversity(rng: np.random.Generator, k: int) -> tuple[Callable, int]:
+    """
+    Diversity of 100 lists as the list length grows.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        k (int): The length of each list.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of lists it
+        measures.
+    """
+    distance = synthetic_distance(rng, 1000, 50_000)
+    recs = [list(rng.choice(NUM_ITEMS, size=k, replace=False)) for _ in range(100)]
+    return lambda: [Measures(0, r, k, distance).diversity() for r in recs], 100
+
+
+def serendipity(rng: np.random.Generator, ratings: int) -> tuple[Callable, int]:
+    """
+    Serendipity of 200 users as their rating histories grow.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        ratings (int): The number of ratings across all users.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of users it
+        evaluates.
+    """
+    distance = synthetic_distance(rng, 200, ratings)
+    run = synthetic_run(rng, 200, 10)
+    return lambda: run.evaluate("serendipity", 10, distance, set(range(200))), 200
+
+
+def novelty(rng: np.random.Generator, users: int) -> tuple[Callable, int]:
+    """
+    Novelty evaluation of 100 recommendations as the number of users grows.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        users (int): The number of users evaluated.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of users it
+        evaluates.
+    """
+    distance = synthetic_distance(rng, 1000, 50_000)
+    run = synthetic_run(rng, users, 100)
+    return lambda: run.evaluate("novelty", 100, distance, set(range(users))), users
+
+
+def rrf(rng: np.random.Generator, runs: int) -> tuple[Callable, int]:
+    """
+    RRF of 200 users as the number of runs grows.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        runs (int): The number of runs fused.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of rankings
+        it fuses.
+    """
+    folder = RunFolder(runs=[synthetic_run(rng, 200, 100, f"Run{i}") for i in range(runs)])
+    return lambda: folder.rrf(100), 200 * runs
+
+
+def io(rng: np.random.Generator, users: int) -> tuple[Callable, int]:
+    """
+    Saving and loading a run as the number of users grows.
+
+    Args:
+        rng (np.random.Generator): The random generator.
+        users (int): The number of users in the run.
+
+    Returns:
+        tuple[Callable, int]: The function to time, and the number of rows it
+        saves and loads.
+    """
+    run = synthetic_run(rng, users, 100)
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = pathlib.Path(directory) / "Synthetic.results"
+
+    def save_and_load():
+        run.save(str(path))
+        RunFile(str(path))
+    return save_and_load, users * 100
+
+
+# Each case builds its inputs for a size, returning the function to time and
+# the number of units (e.g. users) it processes, for throughput.
+CASES = {
+    "rerank_depth": {"fn": rerank_depth, "param": "depth", "unit": "users", "sizes": [25, 50, 100, 200]},
+    "rerank_users": {"fn": rerank_users, "param": "users", "unit": "users", "sizes": [50, 100, 200, 400]},
+    "diversity": {"fn": diversity, "param": "k", "unit": "lists", "sizes": [10, 20, 40, 80]},
+    "serendipity": {"fn": serendipity, "param": "ratings", "unit": "users", "sizes": [5_000, 10_000, 20_000, 40_000]},
+    "novelty": {"fn": novelty, "param": "users", "unit": "users", "sizes": [100, 200, 400, 800]},
+    "rrf": {"fn": rrf, "param": "runs", "unit": "rankings", "sizes": [2, 4, 8, 16]},
+    "io": {"fn": io, "param": "users", "unit": "rows", "sizes": [500, 1000, 2000, 4000]},
+}
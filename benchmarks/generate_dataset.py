@@ -0,0 +1,47 @@
+import logging
+
+from utils.datasets.synthetic.movielens_generator import MovieLensGenerator
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+logger = logging.getLogger(__name__)
+
+fields = {
+    "description": "Generates a synthetic MovieLens-like dataset (ratings, movie mappings, users, qrels and runs) for load testing",
+    "example_usage": "python -m benchmarks.generate_dataset --output data/synthetic/ml-1m --preset ml-1m --runs 3",
+    "args": [
+        {"name": "--output", "type": str, "description": "The dataset output directory"},
+        {"name": "--preset", "type": str, "required": False, "default": "ml-1m", "choices": list(MovieLensGenerator.presets), "description": "The dataset size (default: ml-1m)"},
+        {"name": "--users", "type": int, "required": False, "description": "Overrides the preset's number of users"},
+        {"name": "--items", "type": int, "required": False, "description": "Overrides the preset's number of items"},
+        {"name": "--ratings", "type": int, "required": False, "description": "Overrides the preset's number of ratings"},
+        {"name": "--eval_users", "type": int, "required": False, "description": "Overrides the preset's number of users with runs and judgments"},
+        {"name": "--runs", "type": int, "required": False, "default": 3, "description": "The number of runs (default: 3)"},
+        {"name": "--depth", "type": int, "required": False, "default": 100, "description": "The number of recommendations per user in each run (default: 100)"},
+        {"name": "--judgments", "type": int, "required": False, "default": 30, "description": "The number of judged items per user (default: 30)"},
+        {"name": "--chunk_size", "type": int, "required": False, "default": 2_000_000, "description": "The number of ratings generated per chunk (default: 2000000)"},
+        {"name": "--seed", "type": int, "required": False, "default": 0, "description": "The random seed (default: 0)"},
+    ]
+}
+
+
+def main(args):
+    sizes = dict(MovieLensGenerator.presets[args.preset])
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    generator = MovieLensGenerator(
+        **sizes,
+        runs=args.runs,
+        depth=args.depth,
+        judgments=args.judgments,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+    )
+    generator.generate(args.output)
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
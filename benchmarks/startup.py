@@ -0,0 +1,105 @@
+import json
+import logging
+import pathlib
+import subprocess
+import sys
+
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+logger = logging.getLogger(__name__)
+
+# Dependencies that are only needed once work starts, so importing an entry
+# point must not load them.
+DEFERRED_MODULES = ["adjustText", "matplotlib", "scipy", "seaborn"]
+
+# Imports a module in a fresh interpreter, reporting the import time and
+# which deferred modules were loaded.
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({deferred}))
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+fields = {
+    "description": "Measures the import time of every script entry point, failing if one exceeds the budget or loads a deferred dependency",
+    "example_usage": "python -m benchmarks.startup --budget 1.0 --repeat 3 --output results/benchmarks/startup.json",
+    "args": [
+        {"name": "--budget", "type": float, "required": False, "default": 1.0, "description": "The maximum import time of an entry point in seconds (default: 1.0)"},
+        {"name": "--repeat", "type": int, "required": False, "default": 3, "description": "The number of imports per entry point, keeping the fastest (default: 3)"},
+        {"name": "--output", "type": str, "required": False, "description": "The JSON report output file"},
+    ]
+}
+
+
+def entry_points() -> list[str]:
+    """
+    Finds the module names of all scripts.
+
+    Returns:
+        list[str]: The sorted module names (e.g. scripts.rerank.rrf).
+    """
+    root = pathlib.Path(__file__).resolve().parent.parent
+    return sorted(
+        ".".join(path.relative_to(root).with_suffix("").parts)
+        for path in (root / "scripts").rglob("*.py")
+    )
+
+
+def measure(module: str, repeat: int) -> dict:
+    """
+    Imports a module in fresh interpreters, keeping the fastest import.
+
+    Args:
+        module (str): The module name.
+        repeat (int): The number of imports.
+
+    Returns:
+        dict: The import time in seconds and loaded deferred modules.
+    """
+    root = pathlib.Path(__file__).resolve().parent.parent
+    probe = PROBE.format(module=module, deferred=DEFERRED_MODULES)
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(results, key=lambda result: result["seconds"])
+
+
+def main(args):
+    report = {}
+    failures = []
+    for module in entry_points():
+        result = measure(module, args.repeat)
+        report[module] = result
+        logger.info(f"{module}: {result['seconds']:.3f}s")
+
+        if result["loaded"]:
+            failures.append(f"{module} loads {', '.join(result['loaded'])} at import")
+        if result["seconds"] > args.budget:
+            failures.append(f"{module} takes {result['seconds']:.3f}s to import")
+
+    if args.output:
+        pathlib.Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"budget": args.budget, "entry_points": report}, f, indent=2)
+
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        sys.exit(1)
+    logger.info(f"All {len(report)} entry points import within {args.budget}s")
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
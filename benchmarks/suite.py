@@ -0,0 +1,263 @@
+import json
+import logging
+import math
+import pathlib
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from benchmarks.cases import CASES
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+logger = logging.getLogger(__name__)
+
+fields = {
+    "description": "Times each hot path against synthetic inputs of growing size, fitting scaling curves and comparing against a saved baseline",
+    "example_usage": "python -m benchmarks.suite --output results/benchmarks/suite.json --baseline results/benchmarks/baseline.json --cases rerank_depth,rrf",
+    "args": [
+        {"name": "--output", "type": str, "description": "The JSON results output file"},
+        {"name": "--baseline", "type": str, "required": False, "description": "A previous results file to compare against (default: no comparison)"},
+        {"name": "--cases", "type": str, "required": False, "description": f"Comma-separated cases to run (default: all of {','.join(CASES)})"},
+        {"name": "--scale", "type": float, "required": False, "default": 1.0, "description": "Multiplier applied to every input size (default: 1)"},
+        {"name": "--repeat", "type": int, "required": False, "default": 5, "description": "The number of timed samples per size, keeping the fastest (default: 5)"},
+        {"name": "--min_time", "type": float, "required": False, "default": 0.2, "description": "The minimum duration of a timed sample in seconds (default: 0.2)"},
+        {"name": "--tolerance", "type": float, "required": False, "default": 0.25, "description": "The fractional slowdown against the baseline reported as a regression (default: 0.25)"},
+        {"name": "--seed", "type": int, "required": False, "default": 0, "description": "The random seed (default: 0)"},
+    ]
+}
+
+
+def reference_workload() -> Callable:
+    """
+    Builds a fixed workload mixing interpreter and numpy work, timed
+    alongside every case so results taken on machines or at moments of
+    different speed can be compared.
+
+    Returns:
+        Callable: The reference workload.
+    """
+    values = np.random.default_rng(0).random(100_000)
+
+    def workload():
+        counts = {}
+        for i in range(50_000):
+            counts[i % 97] = counts.get(i % 97, 0) + i
+        np.sort(values)
+    return workload
+
+
+def _calls_per_sample(fn: Callable, min_time: float) -> int:
+    """
+    Helper function to find how many calls make a sample last `min_time`.
+
+    Args:
+        fn (Callable): The function to time.
+        min_time (float): The minimum duration of a sample in seconds.
+
+    Returns:
+        int: The number of calls per sample.
+    """
+    start = time.perf_counter()
+    fn()
+    return max(math.ceil(min_time / (time.perf_counter() - start)), 1)
+
+
+def _sample(fn: Callable, number: int) -> float:
+    """
+    Helper function to time a sample of calls.
+
+    Args:
+        fn (Callable): The function to time.
+        number (int): The number of calls.
+
+    Returns:
+        float: The time per call in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+def measure(
+    fn: Callable, reference: Callable, repeat: int, min_time: float,
+) -> tuple[float, float, float]:
+    """
+    Times a function, alternating its samples with samples of the reference
+    workload so both see the same machine speed, then runs it once more
+    under tracemalloc to find its peak memory. Fast functions are called
+    several times per sample, so each sample lasts at least `min_time`
+    seconds and timer noise is averaged out.
+
+    Args:
+        fn (Callable): The function to measure.
+        reference (Callable): The reference workload.
+        repeat (int): The number of timed samples, keeping the fastest.
+        min_time (float): The minimum duration of a sample in seconds.
+
+    Returns:
+        tuple[float, float, float]: The fastest time per call and of the
+        reference workload in seconds, and the peak memory allocated in MB.
+    """
+    number = _calls_per_sample(fn, min_time)
+    reference_number = _calls_per_sample(reference, min_time / 4)
+
+    seconds, reference_seconds = [], []
+    for _ in range(repeat):
+        reference_seconds.append(_sample(reference, reference_number))
+        seconds.append(_sample(fn, number))
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(seconds), min(reference_seconds), peak / 1024 ** 2
+
+
+def scaling_exponent(sizes: list[float], seconds: list[float]) -> float:
+    """
+    Fits time = c * size^b by least squares in log-log space, so b is 1 for
+    linear and 2 for quadratic scaling.
+
+    Args:
+        sizes (list[float]): The input sizes.
+        seconds (list[float]): The time at each size.
+
+    Returns:
+        float: The fitted exponent b.
+    """
+    slope, _ = np.polyfit(np.log(sizes), np.log(seconds), 1)
+    return float(slope)
+
+
+def run_case(name: str, scale: float, repeat: int, min_time: float, seed: int) -> dict:
+    """
+    Measures a case at each of its sizes.
+
+    Args:
+        name (str): The case name.
+        scale (float): Multiplier applied to every size.
+        repeat (int): The number of timed samples per size.
+        min_time (float): The minimum duration of a sample in seconds.
+        seed (int): The random seed.
+
+    Returns:
+        dict: The case's parameter, results per size and scaling exponent.
+    """
+    case = CASES[name]
+    reference = reference_workload()
+    results = []
+    for size in case["sizes"]:
+        size = max(int(size * scale), 1)
+        fn, units = case["fn"](np.random.default_rng(seed), size)
+        seconds, reference_seconds, peak_mb = measure(fn, reference, repeat, min_time)
+        results.append({
+            "size": size,
+            "seconds": seconds,
+            "reference_seconds": reference_seconds,
+            "throughput": units / seconds,
+            "peak_mb": peak_mb,
+        })
+        logger.info(
+            f"{name} {case['param']}={size}: {seconds * 1000:.1f}ms, "
+            f"{units / seconds:.0f} {case['unit']}/s, {peak_mb:.1f}MB"
+        )
+
+    exponent = scaling_exponent([r["size"] for r in results], [r["seconds"] for r in results])
+    logger.info(f"{name} scales as {case['param']}^{exponent:.2f}")
+    return {
+        "param": case["param"],
+        "unit": case["unit"],
+        "results": results,
+        "exponent": exponent,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compares the time of every case and size measured in both reports,
+    relative to the reference workload timed alongside it, so a slower
+    machine is not reported as a regression. Sizes are matched exactly, so
+    both reports must share a case, and each shared case a size.
+
+    Args:
+        report (dict): The current results.
+        baseline (dict): The baseline results.
+        tolerance (float): The fractional slowdown reported as a regression.
+
+    Returns:
+        list[str]: A description of each regression.
+
+    Raises:
+        ValueError: If no case, or no size of a shared case, was measured in
+        both reports (e.g. when run with a different --scale).
+    """
+    shared = [name for name in report["cases"] if name in baseline["cases"]]
+    if not shared:
+        raise ValueError("No case was measured in both the report and the baseline")
+
+    regressions = []
+    for name in shared:
+        case = report["cases"][name]
+        baseline_relative = {
+            r["size"]: r["seconds"] / r["reference_seconds"]
+            for r in baseline["cases"][name]["results"]
+        }
+        matched = [r for r in case["results"] if r["size"] in baseline_relative]
+        if not matched:
+            raise ValueError(
+                f"No {case['param']} of {name} was measured in both the report and the "
+                f"baseline (scale {report.get('scale')} vs {baseline.get('scale')})"
+            )
+        if len(matched) < len(case["results"]):
+            logger.warning(f"Only {len(matched)} of {len(case['results'])} sizes of {name} are in the baseline")
+
+        for result in matched:
+            relative = result["seconds"] / result["reference_seconds"]
+            ratio = relative / baseline_relative[result["size"]]
+            logger.info(f"{name} {case['param']}={result['size']}: {ratio:.2f}x baseline time")
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{name} {case['param']}={result['size']} is {ratio:.2f}x slower than the baseline"
+                )
+    return regressions
+
+
+def main(args):
+    names = args.cases.split(",") if args.cases else list(CASES)
+    for name in names:
+        if name not in CASES:
+            raise ValueError(f"Invalid case: {name}")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "cases": {name: run_case(name, args.scale, args.repeat, args.min_time, args.seed) for name in names},
+    }
+
+    pathlib.Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            logger.error(regression)
+        if regressions:
+            sys.exit(1)
+        logger.info("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -0,0 +1,42 @@
+from utils.datasets.files.atomic_writer import AtomicWriter
+from utils.datasets.files.measure_file import MeasureFile
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.statistics.bootstrap import Bootstrap
+
+
+fields = {
+    "description": "Calculates bootstrap confidence intervals for the average score of every algorithm and measure in a metric file",
+    "example_usage": "python -m scripts.evaluation.bootstrap_intervals --input results/metrics/metrics.txt --output results/metrics/metrics_ci.txt --resamples 1000",
+    "args": [
+        {"name": "--input", "type": str, "description": "The metric runs input file"},
+        {"name": "--output", "type": str, "description": "The average scores with confidence intervals output file"},
+        {"name": "--resamples", "type": int, "required": False, "default": 1000, "description": "The number of bootstrap resamples (default: 1000)"},
+        {"name": "--confidence", "type": float, "required": False, "default": 0.95, "description": "The confidence level of the intervals (default: 0.95)"},
+        {"name": "--chunk_size", "type": int, "required": False, "default": 100, "description": "The number of resamples drawn at a time, to bound memory (default: 100)"},
+        {"name": "--seed", "type": int, "required": False, "default": 0, "description": "The random seed (default: 0)"},
+    ]
+}
+
+
+def main(args):
+    measure_file = MeasureFile(args.input)
+    bootstrap = Bootstrap(args.resamples, args.confidence, args.chunk_size, args.seed)
+    intervals = bootstrap.intervals(
+        measure_file.user_scores(["algorithm", "measure"]),
+    ).reset_index()
+
+    # Keep the existing average rows, adding the interval columns.
+    all_df = measure_file.aggregates.merge(
+        intervals[["algorithm", "measure", "ci_lower", "ci_upper"]],
+        on=["algorithm", "measure"],
+        how="left",
+    )
+    all_df[["ci_lower", "ci_upper"]] = all_df[["ci_lower", "ci_upper"]].round(4)
+    all_df = all_df.sort_values(by=["algorithm", "measure"])
+    with AtomicWriter.open(args.output, "wb") as f:
+        f.write(all_df.to_csv(sep="\t", index=False).encode())
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
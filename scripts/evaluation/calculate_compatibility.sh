@@ -1,16 +1,44 @@
+#!/usr/bin/env bash
 
-for folder in $2/* ; do
-    filepath=$1/p2_cranfield_$(basename $folder).txt
-    echo "qrels	algorithm	measure	user_id	score" > $filepath
+# Streams a (possibly compressed) run file to stdout.
+decompress() {
+    case $1 in
+        *.gz) gzip -dc "$1" ;;
+        *.xz) xz -dc "$1" ;;
+        *.zst) zstd -dc "$1" ;;
+        *) cat "$1" ;;
+    esac
+}
+
+# Streams a run file to stdout as TREC text, exporting RunStore files first.
+run_text() {
+    case $1 in
+        *.runstore*)
+            exported=$(mktemp -d)
+            python -m scripts.rerank.export_runs --runs "$1" --output "$exported" > /dev/null
+            cat "$exported"/*.results
+            rm -rf "$exported"
+            ;;
+        *) decompress "$1" ;;
+    esac
+}
+
+for folder in "$2"/* ; do
+    filepath="$1/p2_cranfield_$(basename "$folder").txt"
+    echo "qrels	algorithm	measure	user_id	score" > "$filepath"
     for q in data/*interest*.qrels
     do
-        for f in $folder/*.results ; do
-            python ../research/Compatibility/compatibility.py $q $f | gawk -F '\t' '{print "'`basename $q .qrels`'\t'`basename $f .results`'\t"$1"-95\t"$2"\t"$3}' ;
-        done >> $filepath
+        for f in "$folder"/*.results* "$folder"/*.runstore* ; do
+            [ -e "$f" ] || continue
+            name=${f##*/}; name=${name%.results*}; name=${name%.runstore*}
+            python ../research/Compatibility/compatibility.py "$q" <(run_text "$f") | gawk -F '\t' '{print "'"$(basename "$q" .qrels)"'\t'"$name"'\t"$1"-95\t"$2"\t"$3}' ;
+        done >> "$filepath"
 
-        for f in $folder/*.results ; do
-            python ../research/Compatibility/compatibility.py -p 0.98 $q $f | gawk -F '\t' '{print "'`basename $q .qrels`'\t'`basename $f .results`'\t"$1"-98\t"$2"\t"$3}' ;
-        done >> $filepath
+        for f in "$folder"/*.results* "$folder"/*.runstore* ; do
+            [ -e "$f" ] || continue
+            name=${f##*/}; name=${name%.results*}; name=${name%.runstore*}
+            python ../research/Compatibility/compatibility.py -p 0.98 "$q" <(run_text "$f") | gawk -F '\t' '{print "'"$(basename "$q" .qrels)"'\t'"$name"'\t"$1"-98\t"$2"\t"$3}' ;
+        done >> "$filepath"
     done
 done
 
@@ -0,0 +1,65 @@
+import logging
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from utils.datasets.files.qrels_file import QrelsFile
+from utils.datasets.files.quality_file import QualityFile
+from utils.datasets.folders.run_folder import RunFolder
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.objectives.compatibility import Compatibility
+
+
+logger = logging.getLogger(__name__)
+
+fields = {
+    "description": "Checks the in-memory compatibility used by run_pipeline against the output of calculate_compatibility.sh, which remains the reference",
+    "example_usage": "python -m scripts.evaluation.check_compatibility --runs results/runs_reranked/k_100_tradeoff_08 --qrels data/interest.qrels --reference results/metrics/compatibility/p2_cranfield_k_100_tradeoff_08.txt",
+    "args": [
+        {"name": "--runs", "type": str, "description": "The runs input directory the reference was calculated on"},
+        {"name": "--qrels", "type": str, "description": "The relevance judgments file"},
+        {"name": "--reference", "type": str, "description": "The quality file written by calculate_compatibility.sh"},
+        {"name": "--tolerance", "type": float, "required": False, "default": 1e-4, "description": "The largest allowed absolute difference in a per-user score, allowing for the precision the reference prints (default: 1e-4)"},
+    ]
+}
+
+
+def main(args):
+    qrels = pathlib.Path(args.qrels).name.removesuffix(".qrels")
+    judgments = QrelsFile(args.qrels).judgments()
+    reference = QualityFile(args.reference)
+    reference.filter({"qrels": qrels})
+    if len(reference.df) == 0:
+        raise ValueError(f"No {qrels} scores in {args.reference}")
+
+    # The reference names measures compatibility-95 and compatibility-98.
+    runs = RunFolder(args.runs)
+    mismatches = []
+    for measure in reference.df["measure"].unique():
+        persistence = int(str(measure).split("-")[-1]) / 100
+        compatibility = Compatibility(judgments, persistence)
+        calculated = runs.evaluate_quality(qrels, compatibility)
+
+        expected = reference.df[reference.df["measure"] == measure]
+        merged = pd.merge(
+            expected[["algorithm", "user_id", "score"]].astype({"algorithm": str}),
+            calculated.df[["algorithm", "user_id", "score"]].astype({"algorithm": str}),
+            on=["algorithm", "user_id"],
+            how="outer",
+            suffixes=("_reference", "_calculated"),
+        )
+        difference = np.abs(merged["score_reference"] - merged["score_calculated"])
+        for algorithm, diffs in difference.groupby(merged["algorithm"]):
+            logger.info(f"{algorithm} {measure}: max difference {diffs.max():.2e}")
+            if diffs.isna().any() or diffs.max() > args.tolerance:
+                mismatches.append(f"{algorithm} ({measure})")
+
+    if mismatches:
+        raise ValueError(f"Compatibility differs from the reference for: {', '.join(mismatches)}")
+    logger.info("Compatibility matches the reference")
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
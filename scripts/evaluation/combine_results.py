@@ -4,6 +4,7 @@ import re
 from utils.datasets.files.measure_file import MeasureFile
 from utils.datasets.files.quality_file import QualityFile
 from utils.datasets.files.results_file import ResultsFile
+from utils.datasets.store.results_store import ResultsStore
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 
@@ -12,8 +13,9 @@ fields = {
     "description": "Combines metric and quality scores into a single file for plotting",
     "example_usage": "python -m scripts.evaluation.combine_results --metric_dir results/metrics/novelty --quality_dir results/metrics/compatibility --output results/metrics/combined_interest.txt --qrel interest --measure novelty --quality compatibility-98",
     "args": [
-        {"name": "--metric_dir", "type": str, "description": "The metric input directory"},
-        {"name": "--quality_dir", "type": str, "description": "The quality input directory"},
+        {"name": "--metric_dir", "type": str, "required": False, "description": "The metric input directory"},
+        {"name": "--quality_dir", "type": str, "required": False, "description": "The quality input directory"},
+        {"name": "--store", "type": str, "required": False, "description": "The results store database to query instead of the metric and quality directories"},
         {"name": "--output", "type": str, "description": "The combined output file"},
         {"name": "--qrel", "type": str, "description": "The particular qrel to evaluate"},
         {"name": "--measure", "type": str, "description": "The particular measure to evaluate"},
@@ -23,7 +25,7 @@ fields = {
 
 
 def decode_file_name(file_name: str) -> str:
-    match = re.search(r"-(\d{2,3})\.txt$", file_name)
+    match = re.search(r"-(\d{2,3})\.txt(\.gz|\.xz|\.zst)?$", file_name)
     if match:
         str_num = str(match.group(1))
         decimal = int(str_num) / (10 ** (len(str_num) - 1))
@@ -33,6 +35,15 @@ def decode_file_name(file_name: str) -> str:
 
 
 def main(args):
+    if args.store:
+        store = ResultsStore(args.store)
+        combined_file = ResultsFile.from_store(store, args.qrel, args.measure, args.quality)
+        store.close()
+        combined_file.save(args.output)
+        return
+    if not args.metric_dir or not args.quality_dir:
+        raise ValueError("Either --store or both --metric_dir and --quality_dir are required")
+
     dir1 = sorted(pathlib.Path(args.metric_dir).iterdir())
     dir2 = sorted(pathlib.Path(args.quality_dir).iterdir())
 
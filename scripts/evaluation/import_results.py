@@ -0,0 +1,24 @@
+from utils.datasets.store.results_store import ResultsStore
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+fields = {
+    "description": "Imports existing metric and quality files into a results store database",
+    "example_usage": "python -m scripts.evaluation.import_results --store results/metrics/results.db --metric_dir results/metrics/novelty --quality_dir results/metrics/compatibility",
+    "args": [
+        {"name": "--store", "type": str, "description": "The results store database"},
+        {"name": "--metric_dir", "type": str, "required": False, "description": "The metric input directory"},
+        {"name": "--quality_dir", "type": str, "required": False, "description": "The quality input directory"},
+    ]
+}
+
+
+def main(args):
+    store = ResultsStore(args.store)
+    store.import_tree(args.metric_dir, args.quality_dir)
+    store.close()
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
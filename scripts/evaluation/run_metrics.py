@@ -1,10 +1,15 @@
+from utils.datasets.cache.result_cache import ResultCache
+from utils.datasets.files.measure_file import MeasureFile
 from utils.datasets.files.rating_file import RatingFile
 from utils.datasets.files.movie_mapping_file import MovieMappingFile
 from utils.datasets.files.user_ids_file import UserIdsFile
 from utils.datasets.folders.run_folder import RunFolder
+from utils.datasets.shards.shard_merger import ShardMerger
+from utils.datasets.shards.user_shard import UserShard
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 from utils.objectives.distance import Distance
+from utils.service.worker_daemon import WorkerClient
 
 
 fields = {
@@ -18,10 +23,26 @@ fields = {
         {"name": "--output", "type": str, "description": "The metric runs output file"},
         {"name": "--metric", "type": str, "description": "The metric to evaluate"},
         {"name": "--k", "type": int, "description": "The top k recommendations to evaluate"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: by output extension)"},
+        {"name": "--cache", "type": str, "required": False, "description": "The result cache directory (default: no caching)"},
+        {"name": "--cache_size", "type": float, "required": False, "default": 10.0, "description": "The maximum result cache size in GB (default: 10)"},
+        {"name": "--shard", "type": str, "required": False, "description": "Only process the users in shard i of N (e.g. 0/4) and save full precision per-user scores, to be combined with merge_shards (default: all users)"},
+        {"name": "--delta", "type": str, "required": False, "description": "Ratings appended since the previous evaluation, in the ratings file format, used with --previous (default: full evaluation)"},
+        {"name": "--previous", "type": str, "required": False, "description": "The previous metric runs output file, whose scores are kept for users the delta does not affect (default: full evaluation)"},
+        {"name": "--daemon", "type": str, "required": False, "description": "Send the job to a worker daemon listening at this socket instead of loading the ratings (default: run locally)"},
     ]
 }
 
 def main(args):
+    if bool(args.delta) != bool(args.previous):
+        raise ValueError("--delta and --previous must be given together")
+    if args.delta and (args.daemon or args.shard):
+        raise ValueError("--delta cannot be combined with --daemon or --shard")
+
+    if args.daemon:
+        WorkerClient(args.daemon).request("evaluate", vars(args))
+        return
+
     rating_file = RatingFile(args.input)
     movies_file = MovieMappingFile(args.movies)
     distance = Distance(
@@ -33,10 +54,34 @@ def main(args):
 
     user_ids = UserIdsFile(args.users).user_ids
 
+    cache = ResultCache(args.cache, int(args.cache_size * 1024 ** 3)) if args.cache else None
+
     runs = RunFolder(args.runs)
-    measured_runs = runs.evaluate(args.metric, args.k, distance, user_ids)
+    if args.delta:
+        delta_file = RatingFile(args.delta)
+        changes = distance.apply_ratings(
+            delta_file.df["user_id"].tolist(), delta_file.df["movie_id"].tolist(),
+        )
+        measured_runs = runs.evaluate_incremental(
+            args.metric, args.k, distance, user_ids, MeasureFile(args.previous), changes,
+        )
+        measured_runs.rearrange()
+        measured_runs.save(args.output, args.compression)
+        return
+
+    if args.shard:
+        shard = UserShard.parse(args.shard)
+        scores_df = runs.shard(shard).score_users(
+            args.metric, args.k, distance, shard.users(user_ids),
+        )
+        ShardMerger.save_scores(scores_df, args.output, args.compression)
+        return
+
+    measured_runs = runs.evaluate(
+        args.metric, args.k, distance, user_ids, cache,
+    )
     measured_runs.rearrange()
-    measured_runs.save(args.output)
+    measured_runs.save(args.output, args.compression)
 
 
 if __name__ == "__main__":
@@ -1,13 +1,20 @@
+import logging
 import pathlib
 
+from utils.datasets.cache.checkpoint_manifest import CheckpointManifest
+from utils.datasets.cache.result_cache import ResultCache
+from utils.datasets.files.atomic_writer import AtomicWriter
 from utils.datasets.files.rating_file import RatingFile
 from utils.datasets.files.user_ids_file import UserIdsFile
 from utils.datasets.folders.run_folder import RunFolder
+from utils.datasets.store.results_store import ResultsStore
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 from utils.objectives.distance import Distance
 
 
+logger = logging.getLogger(__name__)
+
 fields = {
     "description": "Evaluates specified metric across runs for each subdirectory in the provided directory",
     "example_usage": "python -m scripts.evaluation.run_metrics_varying_tradeoffs --runs results/runs_reranked --input data/ratings.csv --users data/user_ids.txt --output results/metrics --metric novelty --k 100",
@@ -18,25 +25,65 @@ fields = {
         {"name": "--output", "type": str, "description": "The metric runs output directory"},
         {"name": "--metric", "type": str, "description": "The metric to evaluate"},
         {"name": "--k", "type": int, "description": "The top k recommendations to evaluate"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: by output extension)"},
+        {"name": "--cache", "type": str, "required": False, "description": "The result cache directory (default: no caching)"},
+        {"name": "--cache_size", "type": float, "required": False, "default": 10.0, "description": "The maximum result cache size in GB (default: 10)"},
+        {"name": "--store", "type": str, "required": False, "description": "Also insert the metrics into this results store database"},
+        {"name": "--checkpoint", "type": bool, "description": "Record completed subdirectories in a manifest in the output directory, so an interrupted sweep can be resumed"},
+        {"name": "--resume", "type": bool, "description": "Skip subdirectories evaluated by an interrupted sweep into the same output directory (implies --checkpoint)"},
     ]
 }
 
 
 def main(args):
+    run_dirs = [d for d in sorted(pathlib.Path(args.runs).iterdir()) if d.is_dir()]
+    if args.store:
+        # Check every method up front, before any metric file is written.
+        invalid = [d.name for d in run_dirs if ResultsStore.method_from_name(d.name) is None]
+        if invalid:
+            raise ValueError(f"Run directories without a tradeoff in their name cannot be stored: {', '.join(invalid)}")
+
     rating_file = RatingFile(args.input)
     distance = Distance(rating_file.items_rated(), {}, {}, rating_file.num_users)
 
     user_ids = UserIdsFile(args.users).user_ids
+    cache = ResultCache(args.cache, int(args.cache_size * 1024 ** 3)) if args.cache else None
+    store = ResultsStore(args.store) if args.store else None
 
-    for run_dir in pathlib.Path(args.runs).iterdir():
+    checkpoint = None
+    if args.checkpoint or args.resume:
+        checkpoint = CheckpointManifest(f"{args.output}/.checkpoint_{args.metric}.jsonl", args.resume)
+        users_key = ResultCache.key(sorted(user_ids))
+    if args.resume:
+        AtomicWriter.remove_temporary(f"{args.output}/{args.metric}")
+
+    for run_dir in run_dirs:
         dir_name = str(run_dir).split("/")[-1]
 
         runs = RunFolder(run_dir)
-        measured_runs = runs.evaluate(args.metric, args.k, distance, user_ids)
+        measured_runs_path = f"{args.output}/{args.metric}/metric_{dir_name}.txt"
+        if checkpoint is not None:
+            key = ResultCache.key(
+                runs.fingerprint(), "evaluate", args.metric, args.k, users_key,
+                distance.fingerprint(), args.compression,
+            )
+            if checkpoint.is_done(measured_runs_path, key):
+                logger.info(f"Skipping {dir_name}, completed by a previous sweep")
+                continue
+
+        measured_runs = runs.evaluate(
+            args.metric, args.k, distance, user_ids, cache,
+        )
         measured_runs.rearrange()
 
-        measured_runs_path = f"{args.output}/{args.metric}/metric_{dir_name}.txt"
-        measured_runs.save(measured_runs_path)
+        measured_runs.save(measured_runs_path, args.compression)
+        if store:
+            store.insert_measures(measured_runs, ResultsStore.method_from_name(dir_name))
+        if checkpoint is not None:
+            checkpoint.record(measured_runs_path, key)
+
+    if store:
+        store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+from utils.datasets.files.atomic_writer import AtomicWriter
+from utils.datasets.files.measure_file import MeasureFile
+from utils.datasets.files.quality_file import QualityFile
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.statistics.significance import Significance
+
+
+fields = {
+    "description": "Tests every pair of algorithms in a metric or quality file for significant differences",
+    "example_usage": "python -m scripts.evaluation.significance_matrix --input results/metrics/compatibility/p2_cranfield_k_100_tradeoff_08.txt --output results/metrics/significance/compatibility_08.txt --measure compatibility-98 --qrels interest",
+    "args": [
+        {"name": "--input", "type": str, "description": "The metric or quality input file"},
+        {"name": "--output", "type": str, "description": "The adjusted p-value matrix output file"},
+        {"name": "--measure", "type": str, "description": "The measure to compare algorithms on"},
+        {"name": "--qrels", "type": str, "required": False, "description": "The qrels to filter on if the input is a quality file (default: input is a metric file)"},
+        {"name": "--test", "type": str, "required": False, "default": "t", "choices": ["t", "wilcoxon"], "description": "The paired test (default: t)"},
+        {"name": "--correction", "type": str, "required": False, "default": "holm", "choices": ["holm", "bonferroni", "none"], "description": "The multiple comparison correction (default: holm)"},
+        {"name": "--pairs", "type": str, "required": False, "description": "Also save the mean difference and p-values of every pair to this file"},
+    ]
+}
+
+
+def main(args):
+    if args.qrels:
+        scores_file = QualityFile(args.input)
+        scores_file.filter({"qrels": args.qrels, "measure": args.measure})
+    else:
+        scores_file = MeasureFile(args.input)
+        scores_file.filter({"measure": args.measure})
+
+    pairs = Significance.pairwise(
+        scores_file.user_scores(["algorithm"]), args.test, args.correction,
+    )
+
+    # Save results.
+    matrix = Significance.to_matrix(pairs, "adjusted_p_value")
+    with AtomicWriter.open(args.output, "wb") as f:
+        f.write(matrix.to_csv(sep="\t", float_format="%.4g").encode())
+    if args.pairs:
+        with AtomicWriter.open(args.pairs, "wb") as f:
+            f.write(pairs.to_csv(sep="\t", index=False).encode())
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
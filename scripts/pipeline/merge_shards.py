@@ -0,0 +1,27 @@
+from utils.datasets.shards.shard_merger import ShardMerger
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+fields = {
+    "description": "Merges the outputs of sharded rerank_runs, rrf or run_metrics commands into the outputs of a single unsharded command",
+    "example_usage": "python -m scripts.pipeline.merge_shards --type runs --shards results/shards/0,results/shards/1 --output results/runs_reranked/k_1000_tradeoff_05",
+    "args": [
+        {"name": "--type", "type": str, "choices": ["runs", "metrics"], "description": "Whether the shards are runs (rerank_runs or rrf) or per-user scores (run_metrics)"},
+        {"name": "--shards", "type": str, "description": "Comma-separated output directories or files of every shard"},
+        {"name": "--output", "type": str, "description": "The merged output directory or file"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: by output extension)"},
+    ]
+}
+
+
+def main(args):
+    shards = args.shards.split(",")
+    if args.type == "runs":
+        ShardMerger.merge_runs(shards, args.output, args.compression)
+    else:
+        ShardMerger.merge_measures(shards, args.output, args.compression)
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
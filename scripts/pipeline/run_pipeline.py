@@ -0,0 +1,125 @@
+import collections
+import logging
+import pathlib
+
+import numpy as np
+from tqdm import tqdm
+
+from utils.datasets.files.measure_file import MeasureFile
+from utils.datasets.files.movie_mapping_file import MovieMappingFile
+from utils.datasets.files.qrels_file import QrelsFile
+from utils.datasets.files.quality_file import QualityFile
+from utils.datasets.files.rating_file import RatingFile
+from utils.datasets.files.results_file import ResultsFile
+from utils.datasets.files.user_ids_file import UserIdsFile
+from utils.datasets.folders.run_folder import RunFolder
+from utils.datasets.store.results_store import ResultsStore
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.objectives.compatibility import Compatibility
+from utils.objectives.distance import Distance
+
+
+logger = logging.getLogger(__name__)
+
+fields = {
+    "description": "Reranks runs across varying tradeoffs, evaluates an objective measure and quality in memory, and writes the combined results (check_compatibility compares the quality against calculate_compatibility.sh, the reference)",
+    "example_usage": "python -m scripts.pipeline.run_pipeline --runs data/runs --input data/ratings.csv --users data/user_ids.txt --qrels data/interest.qrels --output results/metrics/combined_interest.txt --objective novelty --k 1000 --tradeoffs 11 --measure novelty --eval_k 100 --quality compatibility-98",
+    "args": [
+        {"name": "--runs", "type": str, "description": "The runs input directory or file"},
+        {"name": "--input", "type": str, "description": "The movie ratings file"},
+        {"name": "--users", "type": str, "description": "The list of users file"},
+        {"name": "--qrels", "type": str, "description": "The relevance judgments file"},
+        {"name": "--output", "type": str, "description": "The combined results output file"},
+        {"name": "--objective", "type": str, "description": "The objective to maximize"},
+        {"name": "--k", "type": int, "description": "The top k recommendations to rerank"},
+        {"name": "--tradeoffs", "type": int, "description": "The number of equally spaced tradeoffs from 0-1"},
+        {"name": "--measure", "type": str, "description": "The objective measure to evaluate"},
+        {"name": "--eval_k", "type": int, "description": "The top k recommendations to evaluate"},
+        {"name": "--quality", "type": str, "description": "The quality measure to evaluate (e.g. compatibility-98)"},
+        {"name": "--movies", "type": str, "required": False, "description": "The movie details mapping file (required for diversity and serendipity)"},
+        {"name": "--save_runs", "type": str, "required": False, "description": "Also save the reranked runs to this directory"},
+        {"name": "--store", "type": str, "required": False, "description": "Also insert the per-user measure and quality scores into this results store database"},
+    ]
+}
+
+
+def main(args):
+    if args.measure in ["diversity", "serendipity"] and not args.movies:
+        raise ValueError(f"--movies is required to evaluate {args.measure}")
+
+    # Load ratings, genres and judgments once for every stage.
+    rating_file = RatingFile(args.input)
+    if args.movies:
+        distance = Distance(
+            rating_file.items_rated(),
+            MovieMappingFile(args.movies).genres_map(),
+            rating_file.user_ratings(),
+            rating_file.num_users,
+        )
+    else:
+        distance = Distance(rating_file.items_rated(), {}, {}, rating_file.num_users)
+
+    user_ids = UserIdsFile(args.users).user_ids
+
+    qrels = pathlib.Path(args.qrels).name.removesuffix(".qrels")
+    persistence = int(args.quality.split("-")[-1]) / 100
+    compatibility = Compatibility(QrelsFile(args.qrels).judgments(), persistence)
+    if compatibility.name != args.quality:
+        raise ValueError(f"Invalid quality measure: {args.quality}")
+
+    # Each run is loaded once, then reranked and evaluated at every tradeoff.
+    # Per-user scores are only needed by the store, so they are inserted as
+    # each run is evaluated and only the averages across users are kept.
+    store = ResultsStore(args.store) if args.store else None
+    tradeoffs = np.linspace(0, 1, args.tradeoffs)
+    measured = collections.defaultdict(list)
+    qualities = collections.defaultdict(list)
+    for run in tqdm(RunFolder(args.runs)):
+        logger.info(f"Reranking and evaluating {run.algorithm}")
+        for tradeoff in tradeoffs:
+            method = f"{tradeoff:.2f} relevance"
+            reranked_run = run.rerank(args.objective, args.k, tradeoff, distance)
+            measured_run = reranked_run.evaluate(
+                args.measure, args.eval_k, distance, user_ids,
+            )
+            measured_run.rearrange()
+            quality_run = reranked_run.evaluate_quality(qrels, compatibility)
+            if store:
+                store.insert_measures(measured_run, method)
+                store.insert_quality(quality_run, method)
+
+            if args.save_runs:
+                tradeoff_str = str(round(tradeoff, 2)).replace(".", "")
+                subdir = f"{args.save_runs}/k_{args.k}_tradeoff_{tradeoff_str}"
+                reranked_run.save(f"{subdir}/{run.algorithm}.results")
+
+            measured_run.df = measured_run.df.iloc[:0]
+            quality_run.df = quality_run.df.iloc[:0]
+            measured[tradeoff].append(measured_run)
+            qualities[tradeoff].append(quality_run)
+    if store:
+        store.close()
+
+    files = []
+    for tradeoff in tradeoffs:
+        measured_runs = MeasureFile.combine(measured[tradeoff])
+        measured_runs.rearrange()
+        quality_runs = QualityFile.combine(qualities[tradeoff])
+
+        res_file = ResultsFile.generate(
+            qrels,
+            args.measure,
+            args.quality,
+            f"{tradeoff:.2f} relevance",
+            measured_runs,
+            quality_runs,
+        )
+        files.append(res_file)
+
+    combined_file = ResultsFile.combine(files)
+    combined_file.save(args.output)
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -1,5 +1,5 @@
 from utils.datasets.files.results_file import ResultsFile
-from utils.plots.visualizations import Visualizations
+from utils.plots.plot_runner import PlotRunner
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 
@@ -10,6 +10,8 @@ fields = {
     "args": [
         {"name": "--input", "type": str, "description": "The metrics input file"},
         {"name": "--output", "type": str, "description": "The plots output directory"},
+        {"name": "--final", "type": bool, "description": "Render at publication resolution (1000 dpi) instead of a fast preview"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of figures rendered in parallel (default: 4)"},
     ]
 }
 
@@ -31,29 +33,33 @@ def main(args):
 
     results.filter({improved_method_col: "1.00 relevance"})
 
-    visualizations = Visualizations(results.df, args.output)
-    visualizations.scatter_plot_labelled_points(
-        (4, 4),
-        improved_compat_col,
-        improved_novelty_col,
-        "algorithm",
-        "novelty-relevance-scatter.png",
-        "top right",
+    runner = PlotRunner(args.output, args.final, args.workers)
+    runner.add(
+        results.df,
+        "scatter_plot_labelled_points",
+        fig_size=(4, 4),
+        x=improved_compat_col,
+        y=improved_novelty_col,
+        label="algorithm",
+        file_name="novelty-relevance-scatter.png",
+        corr_loc="top right",
     )
 
     y_order = results2.df[results2.df[improved_method_col] == "1.00 relevance"]
     y_order = list(y_order.sort_values(by=improved_compat_col, ascending=False)["algorithm"].unique())
 
-    visualizations2 = Visualizations(results2.df, args.output)
-    visualizations2.side_by_side_heatmap(
-        (20, 6),
-        improved_method_col,
-        "algorithm",
-        improved_novelty_col,
-        improved_compat_col,
-        "novelty-relevance-heatmap.png",
+    runner.add(
+        results2.df,
+        "side_by_side_heatmap",
+        fig_size=(20, 6),
+        x=improved_method_col,
+        y="algorithm",
+        label1=improved_novelty_col,
+        label2=improved_compat_col,
+        file_name="novelty-relevance-heatmap.png",
         y_order=y_order,
     )
+    runner.run()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 from utils.datasets.files.measure_file import MeasureFile
 from utils.datasets.files.quality_file import QualityFile
 from utils.datasets.files.results_file import ResultsFile
-from utils.plots.visualizations import Visualizations
+from utils.plots.plot_runner import PlotRunner
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 
@@ -14,6 +14,8 @@ fields = {
         {"name": "--quality", "type": str, "description": "The quality input file"},
         {"name": "--output", "type": str, "description": "The plots output directory"},
         {"name": "--measure", "type": str, "description": "The particular measure to evaluate"},
+        {"name": "--final", "type": bool, "description": "Render at publication resolution (1000 dpi) instead of a fast preview"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of figures rendered in parallel (default: 4)"},
     ]
 }
 
@@ -42,17 +44,19 @@ def main(args):
         }
     )
     results.filter({improved_method_col: "1.00 relevance"})
-    results.df[[improved_col, improved_compat_col]] = results.df[[improved_col, improved_compat_col]].astype(float)
-
-    visualizations = Visualizations(results.df, args.output)
-    visualizations.scatter_plot_labelled_points(
-        (4, 4),
-        improved_compat_col,
-        improved_col,
-        "algorithm",
-        f"{args.measure}-relevance-scatter.png",
-        "bottom right",
+
+    runner = PlotRunner(args.output, args.final, args.workers)
+    runner.add(
+        results.df,
+        "scatter_plot_labelled_points",
+        fig_size=(4, 4),
+        x=improved_compat_col,
+        y=improved_col,
+        label="algorithm",
+        file_name=f"{args.measure}-relevance-scatter.png",
+        corr_loc="bottom right",
     )
+    runner.run()
 
 
 if __name__ == "__main__":
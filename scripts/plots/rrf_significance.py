@@ -2,12 +2,12 @@ import pathlib
 import re
 
 import pandas as pd
-import scipy.stats as stats
 from tqdm import tqdm
 
 from utils.datasets.files.quality_file import QualityFile
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
+from utils.statistics.significance import Significance
 
 
 fields = {
@@ -23,7 +23,7 @@ fields = {
 
 
 def decode_file_name(file_name: str) -> str:
-    match = re.search(r"_(\d{2,3})\.txt$", file_name)
+    match = re.search(r"_(\d{2,3})\.txt(\.gz|\.xz|\.zst)?$", file_name)
     if match:
         str_num = str(match.group(1))
         decimal = int(str_num) / (10 ** (len(str_num) - 1))
@@ -32,31 +32,34 @@ def decode_file_name(file_name: str) -> str:
     return "Invalid file name"
 
 
-def main(args):
-    best_run = QualityFile(args.best_run)
-    best_run.filter({"qrels": "interest", "algorithm": "EASE", "measure": args.metric})
-    best_run.df = best_run.df[best_run.df["user_id"] != "all"]
-    best_run.df["score"] = best_run.df["score"].astype(float)
-
-    headers = ["RRF tradeoff", "best run score", "RRF score", "% improvement", "p-value", "sig (< 0.01)"]
-    results_df = pd.DataFrame(columns=headers)
-
-    for rrf_path in tqdm(pathlib.Path(args.rrf).iterdir()):
-        tradeoff = decode_file_name(str(rrf_path))
+def load_scores(path: str, algorithm: str, metric: str) -> pd.Series:
+    quality = QualityFile(path)
+    quality.filter({"qrels": "interest", "algorithm": algorithm, "measure": metric})
+    return pd.Series(
+        quality.df["score"].to_numpy(),
+        index=quality.df["user_id"].to_numpy(),
+    )
 
-        rrf = QualityFile(rrf_path)
-        rrf.filter({"qrels": "interest", "algorithm": "RRF", "measure": args.metric})
-        rrf.df = rrf.df[rrf.df["user_id"] != "all"]
-        rrf.df["score"] = rrf.df["score"].astype(float)
 
-        # Calculate statistic.
-        _, p_value = stats.ttest_rel(best_run.df["score"], rrf.df["score"])
-        best_score = best_run.df["score"].mean()
-        rrf_score = rrf.df["score"].mean()
-        improvement = (rrf_score - best_score) / best_score
-        sig = "Yes" if p_value < 0.01 else "No"
-
-        results_df.loc[len(results_df)] = [tradeoff, best_score, rrf_score, improvement, p_value, sig]
+def main(args):
+    best_run = load_scores(args.best_run, "EASE", args.metric)
+    rrf_runs = {
+        decode_file_name(str(rrf_path)): load_scores(rrf_path, "RRF", args.metric)
+        for rrf_path in tqdm(sorted(pathlib.Path(args.rrf).iterdir()))
+    }
+
+    # Calculate statistics for all tradeoffs at once.
+    results = Significance(best_run, rrf_runs).test(alpha=0.01)
+    results_df = pd.DataFrame({
+        "RRF tradeoff": results["candidate"],
+        "best run score": results["baseline_mean"],
+        "RRF score": results["mean"],
+        "% improvement": results["improvement"],
+        "p-value": results["p_value"],
+        "sig (< 0.01)": results["significant"].map({True: "Yes", False: "No"}),
+        "wilcoxon p-value": results["wilcoxon_p_value"],
+        "effect size": results["effect_size"],
+    })
 
     # Save results.
     results_df = results_df.sort_values(by="RRF tradeoff")
@@ -1,5 +1,5 @@
 from utils.datasets.files.results_file import ResultsFile
-from utils.plots.visualizations import Visualizations
+from utils.plots.plot_runner import PlotRunner
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 
@@ -10,6 +10,8 @@ fields = {
     "args": [
         {"name": "--input", "type": str, "description": "The metrics input file"},
         {"name": "--output", "type": str, "description": "The plots output directory"},
+        {"name": "--final", "type": bool, "description": "Render at publication resolution (1000 dpi) instead of a fast preview"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of figures rendered in parallel (default: 4)"},
     ]
 }
 
@@ -31,18 +33,21 @@ def main(args):
         columns={"method": "RRF tradeoff", "novelty": "novelty", "compatibility-98": "compatibility"}
     )
 
-    visualizations = Visualizations(results.df, args.output)
-    visualizations.line_plot_improvement(
-        (5, 4),
-        "RRF tradeoff",
-        "novelty",
-        "compatibility",
-        best_run_novelty,
-        best_run_compat,
-        indiff_lower,
-        indiff_upper,
-        "rrf-improvement.png",
+    runner = PlotRunner(args.output, args.final, args.workers)
+    runner.add(
+        results.df,
+        "line_plot_improvement",
+        fig_size=(5, 4),
+        x="RRF tradeoff",
+        l1="novelty",
+        l2="compatibility",
+        best_other_l1=best_run_novelty,
+        best_other_l2=best_run_compat,
+        indiff_lower=indiff_lower,
+        indiff_upper=indiff_upper,
+        file_name="rrf-improvement.png",
     )
+    runner.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from utils.plots.plot_runner import PlotRunner
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+fields = {
+    "description": "Creates a heatmap of the pairwise significance between algorithms",
+    "example_usage": "python -m scripts.plots.significance_heatmap --input results/metrics/significance/compatibility_08.txt --output results/plots/significance --name compatibility_08",
+    "args": [
+        {"name": "--input", "type": str, "description": "The adjusted p-value matrix input file"},
+        {"name": "--output", "type": str, "description": "The plots output directory"},
+        {"name": "--name", "type": str, "description": "The name of the plot file"},
+        {"name": "--alpha", "type": float, "required": False, "default": 0.01, "description": "The significance level (default: 0.01)"},
+        {"name": "--final", "type": bool, "description": "Render at publication resolution (1000 dpi) instead of a fast preview"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of figures rendered in parallel (default: 4)"},
+    ]
+}
+
+
+def main(args):
+    matrix = pd.read_csv(args.input, sep="\t", index_col="algorithm")
+
+    size = max(4, len(matrix) * 0.35)
+    runner = PlotRunner(args.output, args.final, args.workers)
+    runner.add(
+        matrix,
+        "significance_heatmap",
+        fig_size=(size, size),
+        alpha=args.alpha,
+        file_name=f"{args.name}-significance.png",
+    )
+    runner.run()
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -0,0 +1,22 @@
+from utils.datasets.folders.run_folder import RunFolder
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+fields = {
+    "description": "Exports runs (e.g. RunStore files) as TREC text runs for external tools",
+    "example_usage": "python -m scripts.rerank.export_runs --runs results/runs_reranked/k_1000_tradeoff_05 --output results/runs_trec/k_1000_tradeoff_05",
+    "args": [
+        {"name": "--runs", "type": str, "description": "The runs input directory or file"},
+        {"name": "--output", "type": str, "description": "The TREC runs output directory"},
+    ]
+}
+
+
+def main(args):
+    runs = RunFolder(args.runs)
+    runs.save(args.output, ".results")
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -0,0 +1,54 @@
+import os
+
+from utils.datasets.folders.run_folder import RunFolder
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.objectives.fusion import Fusion
+
+
+fields = {
+    "description": "Fuses all runs in a single directory with several fusion methods, RRF constants and run weights at once",
+    "example_usage": "python -m scripts.rerank.fusion --runs data/runs --output results/runs_fused --k 1000 --methods rrf,combsum,combmnz,borda --constants 20,60 --weights '1,1,1;2,1,1'",
+    "args": [
+        {"name": "--runs", "type": str, "description": "The runs input directory"},
+        {"name": "--output", "type": str, "description": "The fused runs output directory"},
+        {"name": "--k", "type": int, "description": "The top k recommendations to keep per user"},
+        {"name": "--methods", "type": str, "required": False, "default": "rrf", "description": f"Comma separated fusion methods from {', '.join(Fusion.methods)} (default: rrf)"},
+        {"name": "--constants", "type": str, "required": False, "default": str(Fusion.rrf_constant), "description": f"Comma separated RRF constants (default: {Fusion.rrf_constant})"},
+        {"name": "--weights", "type": str, "required": False, "description": "Semicolon separated run weight vectors, each comma separated in run name order (default: equal weights)"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: uncompressed)"},
+    ]
+}
+
+
+def main(args):
+    methods = args.methods.split(",")
+    constants = [float(c) for c in args.constants.split(",")]
+    weight_vectors = [None]
+    if args.weights:
+        weight_vectors = [
+            [float(w) for w in weights.split(",")]
+            for weights in args.weights.split(";")
+        ]
+
+    configs = []
+    for method in methods:
+        for weights in weight_vectors:
+            if method == "rrf":
+                configs.extend(
+                    {"method": method, "weights": weights, "constant": constant}
+                    for constant in constants
+                )
+            else:
+                configs.append({"method": method, "weights": weights})
+
+    runs = RunFolder(args.runs)
+    fused_runs = runs.fuse(configs, args.k)
+
+    os.makedirs(args.output, exist_ok=True)
+    for name, run in fused_runs.items():
+        run.save(f"{args.output}/{name}.results", args.compression)
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -1,8 +1,11 @@
+from utils.datasets.cache.result_cache import ResultCache
 from utils.datasets.files.rating_file import RatingFile
 from utils.datasets.folders.run_folder import RunFolder
+from utils.datasets.shards.user_shard import UserShard
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 from utils.objectives.distance import Distance
+from utils.service.worker_daemon import WorkerClient
 
 
 fields = {
@@ -15,17 +18,36 @@ fields = {
         {"name": "--objective", "type": str, "description": "The objective to maximize"},
         {"name": "--k", "type": int, "description": "The top k recommendations to rerank"},
         {"name": "--tradeoff", "type": float, "description": "Tradeoff between relevance and the objective"},
+        {"name": "--format", "type": str, "required": False, "default": "results", "choices": ["results", "runstore"], "description": "The reranked runs file format (default: results)"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: by output extension)"},
+        {"name": "--cache", "type": str, "required": False, "description": "The result cache directory (default: no caching)"},
+        {"name": "--cache_size", "type": float, "required": False, "default": 10.0, "description": "The maximum result cache size in GB (default: 10)"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of runs written in parallel (default: 4)"},
+        {"name": "--shard", "type": str, "required": False, "description": "Only process the users in shard i of N (e.g. 0/4), to be combined with merge_shards (default: all users)"},
+        {"name": "--daemon", "type": str, "required": False, "description": "Send the job to a worker daemon listening at this socket instead of loading the ratings (default: run locally)"},
     ]
 }
 
 
 def main(args):
+    if args.daemon:
+        WorkerClient(args.daemon).request("rerank", vars(args))
+        return
+
     rating_file = RatingFile(args.input)
-    distance = Distance(rating_file.items_rated(), rating_file.num_users)
+    distance = Distance(rating_file.items_rated(), {}, {}, rating_file.num_users)
+
+    cache = ResultCache(args.cache, int(args.cache_size * 1024 ** 3)) if args.cache else None
 
     runs = RunFolder(args.runs)
-    reranked_runs = runs.rerank(args.objective, args.k, args.tradeoff, distance)
-    reranked_runs.save(args.output)
+    if args.shard:
+        runs = runs.shard(UserShard.parse(args.shard))
+    reranked_runs = runs.rerank(
+        args.objective, args.k, args.tradeoff, distance, cache,
+    )
+    reranked_runs.save(
+        args.output, f".{args.format}", args.compression, args.workers,
+    )
 
 
 if __name__ == "__main__":
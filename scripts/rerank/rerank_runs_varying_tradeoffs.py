@@ -1,5 +1,7 @@
 import numpy as np
 
+from utils.datasets.cache.checkpoint_manifest import CheckpointManifest
+from utils.datasets.cache.result_cache import ResultCache
 from utils.datasets.files.rating_file import RatingFile
 from utils.datasets.folders.run_folder import RunFolder
 from utils.interface.arguments import Arguments
@@ -17,23 +19,45 @@ fields = {
         {"name": "--objective", "type": str, "description": "The objective to maximize"},
         {"name": "--k", "type": int, "description": "The top k recommendations to rerank"},
         {"name": "--tradeoffs", "type": int, "description": "The number of equally spaced tradeoffs from 0-1"},
+        {"name": "--format", "type": str, "required": False, "default": "results", "choices": ["results", "runstore"], "description": "The reranked runs file format (default: results)"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: by output extension)"},
+        {"name": "--cache", "type": str, "required": False, "description": "The result cache directory (default: no caching)"},
+        {"name": "--cache_size", "type": float, "required": False, "default": 10.0, "description": "The maximum result cache size in GB (default: 10)"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of tradeoffs reranked in parallel (default: 4)"},
+        {"name": "--checkpoint", "type": bool, "description": "Record completed reranked runs in a manifest in the output directory, so an interrupted sweep can be resumed"},
+        {"name": "--resume", "type": bool, "description": "Skip reranked runs recorded by an interrupted sweep into the same output directory (implies --checkpoint)"},
     ]
 }
 
 
 def main(args):
     rating_file = RatingFile(args.input)
-    distance = Distance(rating_file.items_rated(), rating_file.num_users)
+    distance = Distance(rating_file.items_rated(), {}, {}, rating_file.num_users)
+
+    cache = ResultCache(args.cache, int(args.cache_size * 1024 ** 3)) if args.cache else None
+    checkpoint = None
+    if args.checkpoint or args.resume:
+        checkpoint = CheckpointManifest(f"{args.output}/.checkpoint.jsonl", args.resume)
 
     tradeoffs = np.linspace(0, 1, args.tradeoffs)
+    sweep = []
     for tradeoff in tradeoffs:
-        runs = RunFolder(args.runs)
-
         tradeoff_str = str(round(tradeoff, 2)).replace(".", "")
         subdir = f"{args.output}/k_{args.k}_tradeoff_{tradeoff_str}"
+        sweep.append((tradeoff, subdir))
 
-        reranked_runs = runs.rerank(args.objective, args.k, tradeoff, distance)
-        reranked_runs.save(subdir)
+    runs = RunFolder(args.runs)
+    runs.rerank_sweep(
+        args.objective,
+        args.k,
+        sweep,
+        distance,
+        f".{args.format}",
+        args.compression,
+        args.workers,
+        cache,
+        checkpoint,
+    )
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 from utils.datasets.folders.run_folder import RunFolder
+from utils.datasets.shards.user_shard import UserShard
 from utils.interface.arguments import Arguments
 import utils.interface.logging_config
 
@@ -10,14 +11,18 @@ fields = {
         {"name": "--runs", "type": str, "description": "The runs input directory"},
         {"name": "--output", "type": str, "description": "The RRF run output file"},
         {"name": "--k", "type": int, "description": "The top k recommendations to combine"},
+        {"name": "--compression", "type": str, "required": False, "choices": ["gzip", "xz", "zstd"], "description": "Compress the output files (default: by output extension)"},
+        {"name": "--shard", "type": str, "required": False, "description": "Only process the users in shard i of N (e.g. 0/4), to be combined with merge_shards (default: all users)"},
     ]
 }
 
 
 def main(args):
     runs = RunFolder(args.runs)
+    if args.shard:
+        runs = runs.shard(UserShard.parse(args.shard))
     rrf_run = runs.rrf(args.k)
-    rrf_run.save(args.output)
+    rrf_run.save(args.output, args.compression)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import concurrent.futures
+import http.client
+import json
+import logging
+import time
+import urllib.parse
+
+import numpy as np
+
+from utils.datasets.files.run_file import RunFile
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+
+
+logger = logging.getLogger(__name__)
+
+fields = {
+    "description": "Sends concurrent rerank requests built from a run file to a local rerank service, reporting throughput and latency",
+    "example_usage": "python -m scripts.service.load_generator --url http://127.0.0.1:8080 --run data/runs/EASE.results --requests 5000 --concurrency 32 --candidates 100 --k 10 --tradeoff 0.5",
+    "args": [
+        {"name": "--url", "type": str, "description": "The base URL of the rerank service"},
+        {"name": "--run", "type": str, "description": "The run file whose per-user recommendations are sent as candidates"},
+        {"name": "--requests", "type": int, "required": False, "default": 1000, "description": "The total number of requests (default: 1000)"},
+        {"name": "--concurrency", "type": int, "required": False, "default": 16, "description": "The number of concurrent clients (default: 16)"},
+        {"name": "--candidates", "type": int, "required": False, "default": 100, "description": "The number of candidates per request (default: 100)"},
+        {"name": "--k", "type": int, "required": False, "default": 10, "description": "The number of reranked recommendations per request (default: 10)"},
+        {"name": "--objective", "type": str, "required": False, "default": "novelty", "description": "The objective to maximize (default: novelty)"},
+        {"name": "--tradeoff", "type": float, "required": False, "default": 0.5, "description": "Tradeoff between relevance and the objective (default: 0.5)"},
+    ]
+}
+
+
+def client(url: urllib.parse.ParseResult, bodies: list[bytes]) -> list[float]:
+    """
+    Sends requests one after another over a single kept-alive connection.
+
+    Args:
+        url (urllib.parse.ParseResult): The base URL of the service.
+        bodies (list[bytes]): The JSON request bodies.
+
+    Returns:
+        list[float]: The latency of each request in seconds.
+
+    Raises:
+        ValueError: If a request fails.
+    """
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    latencies = []
+    for body in bodies:
+        start = time.perf_counter()
+        conn.request("POST", "/rerank", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        data = response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise ValueError(f"Request failed with {response.status}: {data.decode()}")
+    conn.close()
+    return latencies
+
+
+def main(args):
+    url = urllib.parse.urlparse(args.url)
+    run_df = RunFile(args.run).df
+    users = [
+        (int(user_id), group.nsmallest(args.candidates, "rank")[["movie_id", "score"]].values.tolist())
+        for user_id, group in run_df.groupby("user_id")
+    ]
+    bodies = [
+        json.dumps({
+            "user_id": user_id,
+            "candidates": candidates,
+            "objective": args.objective,
+            "tradeoff": args.tradeoff,
+            "k": args.k,
+        }).encode()
+        for user_id, candidates in (users[i % len(users)] for i in range(args.requests))
+    ]
+
+    logger.info(f"Sending {args.requests} requests from {args.concurrency} clients")
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        shares = [bodies[i::args.concurrency] for i in range(args.concurrency)]
+        latencies = np.concatenate(list(executor.map(lambda share: client(url, share), shares)))
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    logger.info(f"Throughput: {len(latencies) / elapsed:.1f} requests/s")
+    logger.info(f"Client latency: p50 {p50:.2f}ms, p99 {p99:.2f}ms")
+
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    conn.request("GET", "/stats")
+    logger.info(f"Service stats: {conn.getresponse().read().decode()}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -0,0 +1,32 @@
+from utils.datasets.files.rating_file import RatingFile
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.objectives.distance import Distance
+from utils.service.rerank_service import RerankService
+
+
+fields = {
+    "description": "Serves an HTTP/JSON endpoint that reranks live recommendation lists with a focus on maximizing an objective",
+    "example_usage": "python -m scripts.service.rerank_service --input data/ratings.csv --port 8080 --max_batch 64 --max_wait 2",
+    "args": [
+        {"name": "--input", "type": str, "description": "The movie ratings file"},
+        {"name": "--host", "type": str, "required": False, "default": "127.0.0.1", "description": "The address to listen on (default: 127.0.0.1)"},
+        {"name": "--port", "type": int, "required": False, "default": 8080, "description": "The port to listen on (default: 8080)"},
+        {"name": "--max_batch", "type": int, "required": False, "default": 64, "description": "The maximum number of requests reranked together (default: 64)"},
+        {"name": "--max_wait", "type": float, "required": False, "default": 2.0, "description": "The maximum milliseconds to wait for more requests before reranking a batch (default: 2)"},
+    ]
+}
+
+
+def main(args):
+    rating_file = RatingFile(args.input)
+    distance = Distance(rating_file.items_rated(), {}, {}, rating_file.num_users)
+
+    service = RerankService(
+        distance, args.host, args.port, args.max_batch, args.max_wait / 1000,
+    )
+    service.serve()
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
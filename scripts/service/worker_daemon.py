@@ -0,0 +1,39 @@
+import json
+
+from utils.interface.arguments import Arguments
+import utils.interface.logging_config
+from utils.service.worker_daemon import WorkerClient, WorkerDaemon
+
+
+fields = {
+    "description": "Starts, queries or stops a daemon that keeps ratings and distances loaded, running rerank and evaluate jobs sent by scripts with --daemon",
+    "example_usage": "python -m scripts.service.worker_daemon --socket /tmp/worker.sock --input data/ratings.csv --movies data/movie_mappings.json --workers 4",
+    "args": [
+        {"name": "--socket", "type": str, "description": "The Unix socket of the daemon"},
+        {"name": "--action", "type": str, "required": False, "default": "start", "choices": ["start", "status", "stop"], "description": "Start the daemon, or query or stop a running one (default: start)"},
+        {"name": "--input", "type": str, "required": False, "description": "The movie ratings file (required to start)"},
+        {"name": "--movies", "type": str, "required": False, "description": "The movie details mapping file (required for evaluate jobs)"},
+        {"name": "--workers", "type": int, "required": False, "default": 4, "description": "The number of jobs run at once (default: 4)"},
+        {"name": "--queue_size", "type": int, "required": False, "default": 256, "description": "The number of jobs waiting for a worker at once (default: 256)"},
+    ]
+}
+
+
+def main(args):
+    if args.action == "status":
+        print(json.dumps(WorkerClient(args.socket).request("status"), indent=2))
+        return
+    if args.action == "stop":
+        WorkerClient(args.socket).request("shutdown")
+        return
+
+    if args.input is None:
+        raise ValueError("The ratings file is required to start the daemon")
+    daemon = WorkerDaemon(
+        args.socket, args.input, args.movies, args.workers, args.queue_size,
+    )
+    daemon.serve()
+
+
+if __name__ == "__main__":
+    main(Arguments(fields).args)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.datasets.files.base_file import BaseFile
+from utils.datasets.files.measure_file import MeasureFile
+from utils.datasets.files.quality_file import QualityFile
+from utils.datasets.files.run_file import RunFile
+
+
+rng = np.random.default_rng(0)
+num_users = 50
+
+
+def measure_file() -> MeasureFile:
+    scores_df = pd.DataFrame({
+        "algorithm": np.repeat(["EASE", "ItemKNN"], num_users),
+        "measure": "novelty",
+        "user_id": np.tile(np.arange(1, num_users + 1), 2),
+        "score": rng.random(2 * num_users),
+    })
+    measure_file = MeasureFile.from_scores(scores_df)
+    measure_file.rearrange()
+    return measure_file
+
+
+def quality_file() -> QualityFile:
+    df = pd.DataFrame({
+        "qrels": "interest",
+        "algorithm": np.repeat(["EASE", "ItemKNN"], num_users + 1),
+        "measure": "compatibility-98",
+        "user_id": np.tile([*range(1, num_users + 1), "all"], 2),
+        "score": np.concatenate([rng.random(2 * num_users + 1), [1e-7]]),
+    })
+    return QualityFile(df=df)
+
+
+def run_file() -> RunFile:
+    df = pd.DataFrame({
+        "user_id": np.repeat(np.arange(1, num_users + 1), 10),
+        "q0": "Q0",
+        "movie_id": rng.integers(1, 4000, 10 * num_users),
+        "rank": np.tile(np.arange(1, 11), num_users),
+        "score": rng.standard_normal(10 * num_users).astype(np.float32),
+        "algorithm": "EASE",
+    })
+    return RunFile(df=df)
+
+
+def nullable_file() -> BaseFile:
+    df = pd.DataFrame({
+        "user_id": pd.array([1, None, 3], dtype="Int64"),
+        "score": [0.5, np.nan, 1.25],
+    })
+    return BaseFile(list(df.columns), "\t", df=df)
+
+
+def single_column_file() -> BaseFile:
+    df = pd.DataFrame({"score": [0.5, np.nan, 2.0]})
+    return BaseFile(list(df.columns), "\t", df=df)
+
+
+def quoted_file() -> BaseFile:
+    df = pd.DataFrame({"algorithm": ["EASE", 'Item"KNN', "a\tb"], "score": [1.0, 2.0, 3.0]})
+    return BaseFile(list(df.columns), "\t", df=df)
+
+
+@pytest.mark.parametrize("chunk_size", [7, BaseFile.chunk_size])
+@pytest.mark.parametrize(
+    "make_file",
+    [measure_file, quality_file, run_file, nullable_file, single_column_file, quoted_file],
+)
+def test_save_matches_to_csv(tmp_path, monkeypatch, make_file, chunk_size):
+    monkeypatch.setattr(BaseFile, "chunk_size", chunk_size)
+    file = make_file()
+    path = tmp_path / "file.txt"
+    file.save(str(path))
+
+    expected = file.to_df().to_csv(
+        sep=file.sep, header=file.output_headers, index=False,
+    )
+    assert path.read_bytes() == expected.encode()
+
+
+def test_filter_rebuilds_index_after_column_is_replaced():
+    file = quality_file()
+    full_df = file.df
+    file.filter({"algorithm": "EASE"})
+
+    full_df["algorithm"] = full_df["algorithm"].cat.rename_categories({"EASE": "SLIM"})
+    file.df = full_df
+    file.filter({"algorithm": "SLIM"})
+    assert len(file.df) == num_users
+
+
+def test_filter_after_in_place_edit_and_invalidate():
+    file = run_file()
+    full_df = file.df
+    file.filter({"movie_id": int(full_df["movie_id"].iloc[0])})
+
+    full_df.loc[0, "movie_id"] = -1
+    file.df = full_df
+    file.invalidate()
+    file.filter({"movie_id": -1})
+    assert len(file.df) == 1
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import pathlib
+
+from ..files.atomic_writer import AtomicWriter
+from .result_cache import ResultCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointManifest:
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Defines a manifest of the completed units of a long sweep (e.g. a run
+        reranked at one tradeoff), recording each unit's output file, a key
+        of the inputs that determine it, and a hash of the output. Units are
+        appended one JSON line at a time as they finish, so the manifest
+        stays valid if the sweep is killed, and forked workers can record
+        units concurrently. Units recorded by previous sweeps are always
+        kept, so an existing manifest is never cleared.
+
+        Args:
+            path (str): The path of the manifest file.
+            resume (bool, optional): Skip the units recorded by a previous
+            sweep, otherwise every unit is redone and recorded again.
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.resume = resume
+        self.units = {}
+
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        unit = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short when the sweep was killed.
+                        continue
+                    self.units[unit["output"]] = unit
+            if resume:
+                logger.info(f"Resuming from {len(self.units)} units recorded in {self.path}")
+
+        # Rewrite only the complete lines, so new units are not appended to
+        # one that was cut short.
+        with AtomicWriter.open(str(self.path), "w") as f:
+            f.writelines(json.dumps(unit) + "\n" for unit in self.units.values())
+
+
+    def _relative(self, output: str) -> str:
+        """
+        Helper function to express an output path relative to the manifest,
+        so the sweep's directory can be moved between runs.
+
+        Args:
+            output (str): The output path.
+
+        Returns:
+            str: The path relative to the manifest's directory.
+        """
+        return os.path.relpath(pathlib.Path(output).resolve(), self.path.parent.resolve())
+
+
+    def is_done(self, output: str, key: str) -> bool:
+        """
+        Checks whether a unit was completed with the same inputs and its
+        output is still intact. Units whose output is missing or was changed
+        are treated as partial and must be redone, as is every unit when not
+        resuming.
+
+        Args:
+            output (str): The unit's output file.
+            key (str): The key of the unit's inputs.
+
+        Returns:
+            bool: Whether the unit can be skipped.
+        """
+        if not self.resume:
+            return False
+        unit = self.units.get(self._relative(output))
+        if unit is None or unit["key"] != key:
+            return False
+        try:
+            return ResultCache.hash_file(output) == unit["hash"]
+        except FileNotFoundError:
+            return False
+
+
+    def record(self, output: str, key: str):
+        """
+        Records a completed unit once its output has been written.
+
+        Args:
+            output (str): The unit's output file.
+            key (str): The key of the unit's inputs.
+        """
+        unit = {
+            "output": self._relative(output),
+            "key": key,
+            "hash": ResultCache.hash_file(output),
+        }
+        # A single short append is written whole even with several writers.
+        with open(self.path, "a") as f:
+            f.write(json.dumps(unit) + "\n")
+        self.units[unit["output"]] = unit
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import pickle
+from typing import Optional
+
+import pandas as pd
+
+from ..files.atomic_writer import AtomicWriter
+from ..files.base_file import BaseFile
+from utils.interface.profiler import Profiler
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 ** 3):
+        """
+        Defines a content-addressed cache of intermediate results (e.g.
+        per-run MeasureFile fragments or reranked runs) stored in a directory.
+        Entries are keyed by hashes of everything that determines them, and
+        the least recently used entries are evicted once the cache grows
+        beyond its size limit.
+
+        Args:
+            path (str): The directory holding the cache.
+            max_bytes (int, optional): The maximum total size of the cache.
+        """
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.size = sum(entry.stat().st_size for entry in self._entries())
+        Profiler.register_cache(str(self.path), self)
+
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Creates a cache key from the values that determine a result.
+
+        Args:
+            *parts: JSON-serializable values (others are converted to str).
+
+        Returns:
+            str: The hexadecimal key.
+        """
+        encoded = json.dumps(parts, default=str, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """
+        Hashes the contents of a file without parsing it.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            str: The hexadecimal hash of the file contents.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+    def _entries(self) -> list[pathlib.Path]:
+        """
+        Lists every entry in the cache.
+
+        Returns:
+            list[pathlib.Path]: The paths of all cached entries.
+        """
+        return [entry for entry in self.path.glob("*/*.pkl") if entry.is_file()]
+
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        """
+        Finds where an entry is stored, sharded by the key's first characters.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            pathlib.Path: The path of the entry.
+        """
+        return self.path / key[:2] / f"{key}.pkl"
+
+
+    def get(self, key: str, file_cls: type) -> Optional[BaseFile]:
+        """
+        Retrieves a cached file, marking it as recently used. Entries that
+        can not be loaded (e.g. truncated or written by an incompatible
+        version) are removed and counted as misses.
+
+        Args:
+            key (str): The cache key.
+            file_cls (type): The BaseFile subclass to load the entry as.
+
+        Returns:
+            BaseFile, optional: The cached file, or None if not cached.
+        """
+        entry = self._entry_path(key)
+        try:
+            file = file_cls(df=pd.read_pickle(entry))
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (
+            pickle.UnpicklingError, EOFError, ValueError, TypeError,
+            AttributeError, ImportError, IndexError, KeyError,
+        ) as e:
+            logger.warning(f"Removing unreadable cache entry {entry.name}: {e}")
+            self._remove(entry)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return file
+
+
+    def _remove(self, entry: pathlib.Path):
+        """
+        Helper function to remove an entry, keeping the cache size current.
+
+        Args:
+            entry (pathlib.Path): The path of the entry.
+        """
+        try:
+            size = entry.stat().st_size
+            entry.unlink()
+        except FileNotFoundError:
+            return
+        self.size -= size
+
+
+    def put(self, key: str, file: BaseFile):
+        """
+        Stores a file in the cache, evicting old entries if necessary.
+
+        Args:
+            key (str): The cache key.
+            file (BaseFile): The file to cache.
+        """
+        entry = self._entry_path(key)
+        previous_size = entry.stat().st_size if entry.exists() else 0
+        with AtomicWriter.open(entry, "wb") as f:
+            file.to_df().to_pickle(f, compression=None)
+
+        self.size += entry.stat().st_size - previous_size
+        if self.size > self.max_bytes:
+            self._evict()
+
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache fits within
+        its size limit.
+        """
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if self.size <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            self.size -= size
+            logger.debug(f"Evicted {entry.name} from cache")
+
+
+    def hit_rate(self) -> float:
+        """
+        Calculates the fraction of lookups that were served from the cache.
+
+        Returns:
+            float: The cache hit rate.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
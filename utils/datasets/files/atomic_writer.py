@@ -0,0 +1,99 @@
+import contextlib
+import logging
+import os
+import pathlib
+import uuid
+from typing import IO, Iterator
+
+from .compression import Compression
+
+
+logger = logging.getLogger(__name__)
+
+
+class AtomicWriter:
+    # Temporary files are hidden and end with this suffix.
+    temporary_suffix = ".tmp"
+
+    @staticmethod
+    def temporary_path(path: pathlib.Path) -> pathlib.Path:
+        """
+        Creates a unique temporary path next to `path`.
+
+        Args:
+            path (pathlib.Path): The final path of the file.
+
+        Returns:
+            pathlib.Path: The temporary path.
+        """
+        return path.parent / f".{path.name}.{uuid.uuid4().hex}{AtomicWriter.temporary_suffix}"
+
+
+    @staticmethod
+    def is_temporary(path: pathlib.Path) -> bool:
+        """
+        Checks whether a path is a temporary file, which may be left
+        truncated if its writer was killed and must never be read as output.
+
+        Args:
+            path (pathlib.Path): The path to check.
+
+        Returns:
+            bool: Whether the path is a temporary file.
+        """
+        return path.name.startswith(".") and path.name.endswith(AtomicWriter.temporary_suffix)
+
+
+    @staticmethod
+    def remove_temporary(directory: str) -> int:
+        """
+        Removes the temporary files left in a directory by killed writes, so
+        a resumed sweep does not leave them next to the outputs it redoes.
+        Must not be called while files in the directory are being written.
+
+        Args:
+            directory (str): The directory to clean.
+
+        Returns:
+            int: The number of files removed.
+        """
+        path = pathlib.Path(directory)
+        if not path.is_dir():
+            return 0
+        removed = 0
+        for entry in path.iterdir():
+            if entry.is_file() and AtomicWriter.is_temporary(entry):
+                entry.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} temporary files left in {directory}")
+        return removed
+
+
+    @staticmethod
+    @contextlib.contextmanager
+    def open(path: str, mode: str = "wb") -> Iterator[IO]:
+        """
+        Opens a temporary file next to `path` that is renamed into place only
+        once it has been completely written. If writing fails, the temporary
+        file is removed and any existing file at `path` is left untouched.
+        Compression is chosen by the extension of `path`.
+
+        Args:
+            path (str): The final path of the file.
+            mode (str, optional): The mode to open the file in.
+
+        Yields:
+            IO: The opened temporary file.
+        """
+        final_path = pathlib.Path(path)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = AtomicWriter.temporary_path(final_path)
+
+        try:
+            with Compression.open(tmp_path, mode, Compression.suffix(path)) as f:
+                yield f
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
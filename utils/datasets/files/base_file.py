@@ -1,11 +1,18 @@
 import os
-import pathlib
 from typing import Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from .atomic_writer import AtomicWriter
+from .compression import Compression
+from utils.interface.profiler import Profiler
+
 
 class BaseFile:
+    # Number of rows formatted and written at a time when saving.
+    chunk_size = 1_000_000
+
     def __init__(
         self,
         headers: list[str],
@@ -14,9 +21,13 @@ class BaseFile:
         df: Optional[pd.DataFrame] = None,
         output_headers: bool = True,
         header_provided: Optional[Union[str, int]] = "infer",
+        categorical_columns: Optional[list[str]] = None,
     ):
         """
         Initializes a BaseFile object either from a file path or a dataframe.
+        Files ending in .gz, .xz or .zst are decompressed while reading.
+        Low-cardinality text columns can be stored as categoricals to reduce
+        memory and speed up filtering.
 
         Args:
             headers (list[str]): The list of columns names.
@@ -25,6 +36,8 @@ class BaseFile:
             df (pd.DataFrame, optional): Dataframe containing file data.
             output_headers (bool, optional): Display headers when saving file.
             header_provided (str, int, optional): If headers in initial file.
+            categorical_columns (list[str], optional): Columns to store as
+            categoricals.
 
         Raises:
             ValueError: If neither `path` or `df` is provided, if both are
@@ -32,6 +45,7 @@ class BaseFile:
         """
         if path is not None and df is not None:
             ValueError("Both `path` and `df` can not be provided")
+        categorical_columns = categorical_columns or []
 
         # Read in data either from path or from existing dataframe.
         if path:
@@ -39,18 +53,28 @@ class BaseFile:
                 raise ValueError(f"File does not exist at {path}")
 
             try:
-                self.df = pd.read_csv(
-                    path,
-                    sep=sep,
-                    names=headers,
-                    header=header_provided,
-                )
+                with Profiler.stage("load"):
+                    self.df = pd.read_csv(
+                        path,
+                        sep=sep,
+                        names=headers,
+                        header=header_provided,
+                        compression="infer",
+                        dtype={column: "category" for column in categorical_columns},
+                    )
             except Exception as e:
                 raise ValueError(f"Error reading file at {path}: {e}")
         elif df is not None:
             if not isinstance(df, pd.DataFrame):
                 raise ValueError("Provided data must be a pandas DataFrame")
-            self.df = df
+            self.df = df.astype(
+                {
+                    column: "category" for column in categorical_columns
+                    if column in df.columns
+                    and not isinstance(df[column].dtype, pd.CategoricalDtype)
+                },
+                copy=False,
+            )
         else:
             raise ValueError("Either `path` or `df` must be provided")
 
@@ -58,6 +82,11 @@ class BaseFile:
         self.sep = sep
         self.output_headers = output_headers
 
+        # Row positions of each value per column, built lazily on filtering
+        # and rebuilt whenever `df` or the column is replaced.
+        self._index = {}
+        self._indexed_df = None
+
 
     @classmethod
     def combine(cls, files: list["BaseFile"]) -> "BaseFile":
@@ -76,30 +105,247 @@ class BaseFile:
         return cls(df=combined_df)
 
 
-    def filter(self, f: dict[str, str]):
+    def invalidate(self):
+        """
+        Discards the cached column indexes. Replacing `df` or one of its
+        columns is detected automatically, but values edited in place (e.g.
+        through `df.loc`) are not, so call this after such edits.
+        """
+        self._index = {}
+        self._indexed_df = None
+
+
+    @staticmethod
+    def _column_key(values: pd.Series) -> tuple:
         """
-        Applies a mapping of filters in-place.
+        Helper function to identify the data of a column, which changes
+        whenever the column is replaced. The column's array is kept in the
+        key, so its memory can not be reused by a later column.
 
         Args:
-            f (dict[str, str]): Mapping of column name to value filters.
+            values (pd.Series): The column.
+
+        Returns:
+            tuple: The dtype, array, address, shape and strides of the data.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            array = values.cat.codes.to_numpy()
+        else:
+            array = values.to_numpy()
+        interface = array.__array_interface__
+        return (values.dtype, array, interface["data"][0], array.shape, array.strides)
+
+
+    def _column_index(self, column: str) -> dict:
+        """
+        Helper function to get the cached index of a column, mapping each
+        value to the sorted positions of the rows containing it. The index
+        is rebuilt if `df` or the column has been replaced since it was
+        built.
+
+        Args:
+            column (str): The column to index.
+
+        Returns:
+            dict: The row positions of each value in the column.
         """
+        if self._indexed_df is not self.df:
+            self.invalidate()
+            self._indexed_df = self.df
+
+        values = self.df[column]
+        key = self._column_key(values)
+        cached = self._index.get(column)
+        if cached is not None and cached[0][0] == key[0] and cached[0][2:] == key[2:]:
+            return cached[1]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            uniques = values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+
+        # Missing values have a code of -1 and are never matched.
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        index = {
+            value: order[bounds[i]:bounds[i + 1]]
+            for i, value in enumerate(uniques)
+        }
+        self._index[column] = (key, index)
+        return index
+
+
+    def filter(self, f: dict[str, Union[str, list[str]]]):
+        """
+        Applies a mapping of filters in-place. Each filter matches a single
+        value, or any of a list, tuple or set of values. Matching rows are
+        found through a cached index of each column, and selected with a
+        single take.
+
+        Args:
+            f (dict[str, str | list[str]]): Mapping of column name to value
+            filters.
+        """
+        positions = None
         for column, value in f.items():
-            self.df = self.df[self.df[column] == value]
+            index = self._column_index(column)
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            matches = [index[v] for v in values if v in index]
+            matches = np.unique(np.concatenate(matches)) if matches else np.array([], dtype=np.int64)
+            positions = matches if positions is None else np.intersect1d(
+                positions, matches, assume_unique=True,
+            )
+        if positions is None:
+            return
+
+        df = self.df.take(positions)
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].cat.remove_unused_categories()
+        self.df = df
 
 
-    def save(self, path: str):
+    def user_scores(self, columns: list[str]) -> pd.DataFrame:
         """
-        Saves the run at the specified file path.
+        Arranges per-user scores into a users by groups matrix, where groups
+        are the distinct values of `columns` (e.g. algorithm and measure).
+        Aggregate rows (e.g. `all`) are excluded.
+
+        Args:
+            columns (list[str]): The columns identifying each group.
+
+        Returns:
+            pd.DataFrame: Scores indexed by user id, with one column per
+            group and NaN where a group has no score for a user.
+        """
+        user_ids = pd.to_numeric(self.df["user_id"], errors="coerce")
+        df = self.df[user_ids.notna()].assign(
+            user_id=user_ids.dropna().astype(int),
+            score=lambda df: df["score"].astype(float),
+        )
+        return df.pivot_table(
+            index="user_id",
+            columns=columns,
+            values="score",
+            aggfunc="first",
+            observed=True,
+        ).sort_index()
+
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Gets the file's data in the layout it is saved in.
+
+        Returns:
+            pd.DataFrame: The rows of the file.
+        """
+        return self.df
+
+
+    def _needs_quoting(self, df: pd.DataFrame) -> bool:
+        """
+        Determines whether any text value would need to be quoted when
+        written, in which case the fast formatting path can not be used.
+
+        Args:
+            df (pd.DataFrame): The rows to write.
+
+        Returns:
+            bool: True if a header or text value contains special characters.
+        """
+        special = (self.sep, '"', "\n", "\r")
+        text_values = [str(header) for header in df.columns]
+        for column in df.columns:
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                text_values.extend(str(v) for v in df[column].unique())
+        return any(c in value for value in text_values for c in special)
+
+
+    @staticmethod
+    def _has_numpy_dtypes(df: pd.DataFrame) -> bool:
+        """
+        Determines whether every column is numeric, text or categorical with
+        a numpy representation, which the fast formatting path writes the same
+        as pandas. Extension dtypes such as nullable Int64 are written
+        differently and must be formatted by pandas.
+
+        Args:
+            df (pd.DataFrame): The rows to write.
+
+        Returns:
+            bool: True if the fast formatting path can be used.
+        """
+        for dtype in df.dtypes:
+            if isinstance(dtype, pd.CategoricalDtype):
+                dtype = dtype.categories.dtype
+            if not isinstance(dtype, np.dtype) or dtype.kind not in "biufO":
+                return False
+        return True
+
+
+    def _format_rows(self, df: pd.DataFrame) -> str:
+        """
+        Formats rows as separated text using vectorized conversions of whole
+        columns, matching the output of `DataFrame.to_csv`.
+
+        Args:
+            df (pd.DataFrame): The rows to format.
+
+        Returns:
+            str: The formatted rows, each ending in a newline.
+        """
+        lines = None
+        for column in df.columns:
+            values = df[column]
+            if pd.api.types.is_numeric_dtype(values):
+                text = values.to_numpy().astype(str)
+            else:
+                text = values.astype(str).to_numpy().astype(str)
+            text[values.isna().to_numpy()] = ""
+            lines = text if lines is None else np.char.add(
+                np.char.add(lines, self.sep), text,
+            )
+
+        if lines is None or len(lines) == 0:
+            return ""
+        if len(df.columns) == 1:
+            # pandas quotes an empty value on its own so the row is not blank.
+            lines = np.where(lines == "", '""', lines)
+        return "\n".join(lines.tolist()) + "\n"
+
+
+    @Profiler.stage("save")
+    def save(self, path: str, compression: Optional[str] = None):
+        """
+        Saves the file at the specified file path. The data is written to a
+        temporary file that is renamed into place once complete, so readers
+        never see a partially written file. The file is compressed if the
+        path ends in .gz, .xz or .zst, or if a compression is provided.
 
         Args:
             path (str): The full path to save the file.
+            compression (str, optional): Compression to apply (gzip, xz or
+            zstd), appending its extension to the path if missing.
         """
-        parent_dir = pathlib.Path(path).parent
-        parent_dir.mkdir(parents=True, exist_ok=True)
+        path = Compression.with_compression(path, compression)
+        df = self.to_df()
 
         try:
-            self.df.to_csv(
-                path, sep=self.sep, header=self.output_headers, index=False,
-            )
+            with AtomicWriter.open(path, "wb") as f:
+                # Fall back to pandas when values need quoting or have
+                # extension dtypes.
+                if self._needs_quoting(df) or not self._has_numpy_dtypes(df):
+                    text = df.to_csv(
+                        sep=self.sep, header=self.output_headers, index=False,
+                    )
+                    f.write(text.encode())
+                    return
+
+                if self.output_headers:
+                    f.write(f"{self.sep.join(df.columns)}\n".encode())
+                for start in range(0, len(df), self.chunk_size):
+                    chunk = df.iloc[start:start + self.chunk_size]
+                    f.write(self._format_rows(chunk).encode())
         except Exception as e:
             raise ValueError(f"Error saving file at {path}: {e}")
@@ -0,0 +1,94 @@
+import gzip
+import importlib
+import lzma
+import pathlib
+from typing import IO, Optional
+
+
+class Compression:
+    # Map of supported compression names to their file extensions.
+    extensions = {"gzip": ".gz", "xz": ".xz", "zstd": ".zst"}
+
+    @staticmethod
+    def suffix(path: str) -> Optional[str]:
+        """
+        Finds the compression extension of a path, if it has one.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            str, optional: The compression extension, or None if uncompressed.
+        """
+        suffix = pathlib.Path(path).suffix
+        return suffix if suffix in Compression.extensions.values() else None
+
+
+    @staticmethod
+    def strip(path: str) -> str:
+        """
+        Removes the compression extension from a path.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            str: The path without its compression extension.
+        """
+        suffix = Compression.suffix(path)
+        return str(path)[:-len(suffix)] if suffix else str(path)
+
+
+    @staticmethod
+    def with_compression(path: str, compression: Optional[str]) -> str:
+        """
+        Appends the extension of a compression to a path if it is missing.
+
+        Args:
+            path (str): The path to the file.
+            compression (str, optional): The compression name, or None to keep
+            the path as is.
+
+        Returns:
+            str: The path with the compression extension.
+
+        Raises:
+            ValueError: If the compression is not supported.
+        """
+        if compression is None:
+            return str(path)
+        if compression not in Compression.extensions:
+            raise ValueError(f"Invalid compression: {compression}")
+
+        extension = Compression.extensions[compression]
+        if Compression.suffix(path) == extension:
+            return str(path)
+        return f"{Compression.strip(path)}{extension}"
+
+
+    @staticmethod
+    def open(path: str, mode: str = "rb", suffix: Optional[str] = None) -> IO:
+        """
+        Opens a file, streaming (de)compression based on its extension.
+
+        Args:
+            path (str): The path to the file.
+            mode (str, optional): The mode to open the file in.
+            suffix (str, optional): Compression extension to use instead of
+            the one in the path.
+
+        Returns:
+            IO: The opened file object.
+        """
+        suffix = suffix or Compression.suffix(path)
+        if suffix == ".gz":
+            return gzip.open(path, mode)
+        elif suffix == ".xz":
+            return lzma.open(path, mode)
+        elif suffix == ".zst":
+            try:
+                zstandard = importlib.import_module("zstandard")
+            except ImportError:
+                raise ValueError("Reading or writing .zst files requires zstandard")
+            return zstandard.open(path, mode)
+        return open(path, mode)
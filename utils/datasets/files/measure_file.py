@@ -2,10 +2,13 @@ from typing import Optional
 
 import pandas as pd
 
-from .base_file import BaseFile
+from .score_file import ScoreFile
 
 
-class MeasureFile(BaseFile):
+class MeasureFile(ScoreFile):
+    # Measures are reported to 4 decimals.
+    decimals = 4
+
     def __init__(
         self,
         path: Optional[str] = None,
@@ -13,6 +16,8 @@ class MeasureFile(BaseFile):
     ):
         """
         Initializes a MeasureFile object either from a file path or a dataframe.
+        Average rows across users are kept separately in `aggregates`, and
+        scores are rounded to 4 decimals.
 
         Args:
             path (str, optional): The path to the file.
@@ -27,6 +32,28 @@ class MeasureFile(BaseFile):
         super().__init__(headers, sep, path=path, df=df)
 
 
+    @classmethod
+    def from_scores(cls, scores_df: pd.DataFrame) -> "MeasureFile":
+        """
+        Creates a MeasureFile from per-user scores, adding the average score
+        of each algorithm and measure as an `all` row. Averages are taken
+        before scores are rounded.
+
+        Args:
+            scores_df (pd.DataFrame): The full precision score of every user,
+            with its algorithm and measure.
+
+        Returns:
+            MeasureFile: The per-user and average scores.
+        """
+        avg_rows_df = scores_df.groupby(
+            ["algorithm", "measure"]
+        )["score"].mean().reset_index()
+        avg_rows_df["user_id"] = cls.aggregate_user
+
+        return cls(df=pd.concat([scores_df, avg_rows_df], ignore_index=True))
+
+
     def rearrange(self):
         """
         Rearranges this MeasureFile's data in-place. This includes re-ordering
@@ -35,3 +62,7 @@ class MeasureFile(BaseFile):
         self.df["score"] = self.df["score"].round(4)
         self.df = self.df[self.headers]
         self.df = self.df.sort_values(by=["algorithm", "measure", "user_id"])
+
+        self.aggregates["score"] = self.aggregates["score"].round(4)
+        self.aggregates = self.aggregates[self.headers]
+        self.aggregates = self.aggregates.sort_values(by=["algorithm", "measure"])
@@ -1,5 +1,7 @@
 import json
 
+from utils.interface.profiler import Profiler
+
 
 class MovieMappingFile:
     def __init__(self, path: str):
@@ -9,11 +11,12 @@ class MovieMappingFile:
         Args:
             path (str): The path to the file.
         """
-        with open(path, "r") as f:
+        with Profiler.stage("load"), open(path, "r") as f:
             map = json.load(f)
         self.map = {int(k) if k.isdigit() else k: v for k, v in map.items()}
 
 
+    @Profiler.stage("distance")
     def genres_map(self) -> dict[int, set[str]]:
         """
         Converts the entire mapping file to just a mapping of genres.
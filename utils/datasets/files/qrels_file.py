@@ -0,0 +1,43 @@
+from typing import Optional
+
+import pandas as pd
+
+from .base_file import BaseFile
+
+
+class QrelsFile(BaseFile):
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        df: Optional[pd.DataFrame] = None,
+    ):
+        """
+        Initializes a QrelsFile object either from a file path or a dataframe.
+
+        Args:
+            path (str, optional): The path to the file.
+            df (pd.DataFrame, optional): Dataframe containing file data.
+
+        Raises:
+            ValueError: If neither `path` or `df` is provided, if both are
+            provided, or if data is invalid.
+        """
+        headers = ["user_id", "iteration", "movie_id", "relevance"]
+        sep = " "
+        super().__init__(
+            headers, sep, path=path, df=df, output_headers=False,
+            header_provided=None,
+        )
+
+
+    def judgments(self) -> dict[int, dict[int, float]]:
+        """
+        Creates a mapping of each user to their judged items and grades.
+
+        Returns:
+            dict[int, dict[int, float]]: Map of users to items and grades.
+        """
+        return {
+            user_id: dict(zip(group["movie_id"], group["relevance"]))
+            for user_id, group in self.df.groupby("user_id", sort=False)
+        }
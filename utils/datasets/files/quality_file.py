@@ -1,11 +1,15 @@
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-from .base_file import BaseFile
+from .score_file import ScoreFile
 
 
-class QualityFile(BaseFile):
+class QualityFile(ScoreFile):
+    # Quality scores are not rounded, so they keep their full precision.
+    score_dtype = np.float64
+
     def __init__(
         self,
         path: Optional[str] = None,
@@ -13,6 +17,7 @@ class QualityFile(BaseFile):
     ):
         """
         Initializes a QualityFile object either from a file path or a dataframe.
+        Average rows across users are kept separately in `aggregates`.
 
         Args:
             path (str, optional): The path to the file.
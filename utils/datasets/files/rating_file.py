@@ -3,6 +3,7 @@ from typing import Optional
 import pandas as pd
 
 from .base_file import BaseFile
+from utils.interface.profiler import Profiler
 
 
 class RatingFile(BaseFile):
@@ -29,6 +30,7 @@ class RatingFile(BaseFile):
         self.num_users = len(self.df["user_id"].unique())
 
 
+    @Profiler.stage("distance")
     def items_rated(self) -> dict[int, list[int]]:
         """
         Creates a mapping of each item to all the users who rated that item.
@@ -39,6 +41,7 @@ class RatingFile(BaseFile):
         return self.df.groupby("movie_id")["user_id"].apply(list).to_dict()
 
 
+    @Profiler.stage("distance")
     def user_ratings(self) -> dict[int, list[int]]:
         """
         Creates a mapping of each user to all the items they rated.
@@ -5,6 +5,7 @@ import pandas as pd
 from .base_file import BaseFile
 from .measure_file import MeasureFile
 from .quality_file import QualityFile
+from ..store.results_store import ResultsStore
 
 
 class ResultsFile(BaseFile):
@@ -12,13 +13,17 @@ class ResultsFile(BaseFile):
         self,
         path: Optional[str] = None,
         df: Optional[pd.DataFrame] = None,
+        qrels: str = "interest",
     ):
         """
         Initializes a ResultsFile object either from a file path or a dataframe.
+        Paths to a ResultsStore database are queried for the combined results
+        instead of being parsed.
 
         Args:
             path (str, optional): The path to the file.
             df (pd.DataFrame, optional): Dataframe containing file data.
+            qrels (str, optional): The qrels to query if reading a store.
 
         Raises:
             ValueError: If neither `path` or `df` is provided, if both are
@@ -26,7 +31,44 @@ class ResultsFile(BaseFile):
         """
         headers = ["algorithm", "method", "novelty", "compatibility-98"]
         sep = "\t"
-        super().__init__(headers, sep, path=path, df=df, header_provided=0)
+        if path is not None and df is None and ResultsStore.is_store(path):
+            store = ResultsStore(path)
+            df = self.from_store(store, qrels, headers[2], headers[3]).df
+            store.close()
+            path = None
+        super().__init__(
+            headers,
+            sep,
+            path=path,
+            df=df,
+            header_provided=0,
+            categorical_columns=["algorithm", "method"],
+        )
+
+
+    @classmethod
+    def from_store(
+        cls,
+        store: ResultsStore,
+        qrel: str,
+        measure: str,
+        quality: str,
+        methods: Optional[list[str]] = None,
+    ) -> "ResultsFile":
+        """
+        Initializes a ResultsFile by querying the average measure and quality
+        scores of every algorithm and method from a ResultsStore.
+
+        Args:
+            store (ResultsStore): The store containing the results.
+            qrel (str): The particular qrel to evaluate.
+            measure (str): The objective measure of interest.
+            quality (str): The quality measure of interest.
+            methods (list[str], optional): The methods to include (default:
+            all methods).
+        """
+        df = store.results(qrel, measure, quality, methods)
+        return cls(df=df[["algorithm", "method", measure, quality]])
 
 
     @classmethod
@@ -50,10 +92,12 @@ class ResultsFile(BaseFile):
             mfile (MeasureFile): The measure file containing objectives.
             qfile (QualityFile): The quality file containing relevances.
         """
-        mfile.filter({"measure": measure, "user_id": "all"})
-        qfile.filter({"measure": quality, "user_id": "all", "qrels": qrel})
+        mfile_df = mfile.aggregates[mfile.aggregates["measure"] == measure]
+        qfile_df = qfile.aggregates[
+            (qfile.aggregates["measure"] == quality) & (qfile.aggregates["qrels"] == qrel)
+        ]
 
-        df = pd.merge(mfile.df, qfile.df, on=["algorithm"])
+        df = pd.merge(mfile_df, qfile_df, on=["algorithm"])
         df = df.rename(
             columns={"score_x": measure, "score_y": quality}
         )
@@ -1,15 +1,31 @@
-from typing import Optional
+import hashlib
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
 
 from .base_file import BaseFile
+from .compression import Compression
 from .measure_file import MeasureFile
+from .quality_file import QualityFile
+from .run_store import RunStore
+from utils.interface.profiler import Profiler
+from utils.objectives.compatibility import Compatibility
 from utils.objectives.distance import Distance
 from utils.objectives.measures import Measures
 from utils.objectives.rerank import Rerank
 
 
+class UnsortedRunError(ValueError):
+    """
+    Raised when a run streamed user by user is not sorted by user.
+    """
+
+
 class RunFile(BaseFile):
+    # Columns of a run in TREC format.
+    columns = ["user_id", "q0", "movie_id", "rank", "score", "algorithm"]
+
     def __init__(
         self,
         path: Optional[str] = None,
@@ -17,6 +33,8 @@ class RunFile(BaseFile):
     ):
         """
         Initializes a RunFile object either from a file path or a dataframe.
+        Paths with the RunStore extension are read from the binary format,
+        all other paths are read as TREC text.
 
         Args:
             path (str, optional): The path to the file.
@@ -26,8 +44,11 @@ class RunFile(BaseFile):
             ValueError: If neither `path` or `df` is provided, if both are
             provided, or if data is invalid.
         """
-        headers = ["user_id", "q0", "movie_id", "rank", "score", "algorithm"]
+        headers = list(self.columns)
         sep = " "
+        if path is not None and RunStore.is_store(path):
+            with Profiler.stage("load"):
+                path, df = None, RunStore.read(path).to_df()
         super().__init__(headers, sep, path=path, df=df, output_headers=False)
 
         if self.df.empty or "algorithm" not in self.df.columns:
@@ -36,43 +57,81 @@ class RunFile(BaseFile):
         self.algorithm = self.df["algorithm"].iloc[0]
 
 
-    def _rerank_user_group(
-        self,
-        user_group: pd.DataFrame,
-        method: str,
-        k: int,
-        tradeoff: float,
-        distance: Distance,
-    ) -> pd.DataFrame:
+    def fingerprint(self) -> str:
         """
-        Helper function to rerank the movies for a single user.
-
-        Args:
-            user_group (pd.DataFrame): Run data for a single user.
-            method (str): The type of method to rerank by.
-            k (int): Number of recommendations to rerank.
-            tradeoff (float): Amount of relevance to maintain.
-            distance (Distance): Defines how item distances are measured.
+        Hashes the contents of the run, so results derived from it can be
+        cached.
 
         Returns:
-            pd.DataFrame: The user's reranked results.
+            str: The hexadecimal hash of the run data.
         """
-        movie_list = list(map(tuple, user_group.to_numpy()))
-        reranker = Rerank(movie_list, k, distance)
+        row_hashes = pd.util.hash_pandas_object(self.df[self.headers], index=False)
+        return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
 
-        # Ensure reranker method exists.
-        if not hasattr(reranker, method):
-            raise ValueError(f"Invalid method: {method}")
 
-        reranked_movies = getattr(reranker, method)(tradeoff)
+    @Profiler.stage("save")
+    def save(self, path: str, compression: Optional[str] = None):
+        """
+        Saves the run at the specified file path, in the RunStore format if
+        the path has its extension and as TREC text otherwise.
 
-        return pd.DataFrame(
-            reranked_movies, columns=["movie_id", "score"],
-        ).assign(user_id=user_group.name)
+        Args:
+            path (str): The full path to save the file.
+            compression (str, optional): Compression to apply (gzip, xz or
+            zstd), appending its extension to the path if missing.
+        """
+        if RunStore.is_store(path):
+            path = Compression.with_compression(path, compression)
+            RunStore.from_df(self.df).write(path)
+        else:
+            super().save(path, compression)
 
 
+    @Profiler.stage("rerank")
+    def standardize(self, distance: Distance) -> dict:
+        """
+        Standardizes each user's relevance and novelty scores, which do not
+        depend on the tradeoff, so they can be reused to rerank at many
+        tradeoffs. Scores are kept as flat arrays with per-user offsets
+        rather than per-user rerankers, which take far more memory.
+
+        Args:
+            distance (Distance): Defines how item distances are measured.
+
+        Returns:
+            dict: The run's algorithm, and its `user_ids`, their `offsets`
+            into the `movie_ids`, `relevance` and `novelty` arrays.
+        """
+        movie_ids = np.empty(len(self.df), dtype=np.int32)
+        relevance = np.empty(len(self.df), dtype=np.float64)
+        novelty = np.empty(len(self.df), dtype=np.float64)
+        user_ids, offsets = [], [0]
+
+        for user_id, user_group in self.df.groupby("user_id")[["movie_id", "score"]]:
+            recs_std, novelty_std = Rerank.standardize(
+                list(map(tuple, user_group.to_numpy())), distance,
+            )
+            start = offsets[-1]
+            end = start + len(recs_std)
+            movie_ids[start:end] = [item for item, _ in recs_std]
+            relevance[start:end] = [rel for _, rel in recs_std]
+            novelty[start:end] = [nov for _, nov in novelty_std]
+            user_ids.append(user_id)
+            offsets.append(end)
+
+        return {
+            "algorithm": self.algorithm,
+            "user_ids": np.array(user_ids, dtype=np.int64),
+            "offsets": np.array(offsets, dtype=np.int64),
+            "movie_ids": movie_ids,
+            "relevance": relevance,
+            "novelty": novelty,
+        }
+
+
+    @classmethod
     def _add_constant_columns(
-        self, df: pd.DataFrame, algorithm: str,
+        cls, df: pd.DataFrame, algorithm: str,
     ) -> pd.DataFrame:
         """
         Adds back constant columns and updates ranking order.
@@ -88,12 +147,18 @@ class RunFile(BaseFile):
         df["algorithm"] = algorithm
         df["rank"] = df.groupby("user_id").cumcount() + 1
         df["movie_id"] = df["movie_id"].astype(int)
-        df = df[self.headers]
+        df = df[cls.columns]
         return df
 
 
+    @Profiler.stage("rerank")
     def rerank(
-        self, method: str, k: int, tradeoff: float, distance: Distance,
+        self,
+        method: str,
+        k: int,
+        tradeoff: float,
+        distance: Distance,
+        standardized: Optional[dict] = None,
     ) -> "RunFile":
         """
         Reranks the run in terms of a specific method and tradeoff value.
@@ -103,17 +168,169 @@ class RunFile(BaseFile):
             k (int): Number of recommendations to rerank.
             tradeoff (float): Amount of relevance to maintain.
             distance (Distance): Defines how item distances are measured.
+            standardized (dict, optional): The run's scores standardized with
+            the same distance, to avoid standardizing them again.
 
         Returns:
             RunFile: Re-ordered data of the originial run.
         """
+        # Ensure reranker method exists.
+        if not hasattr(Rerank, method):
+            raise ValueError(f"Invalid method: {method}")
+
+        if standardized is None:
+            standardized = self.standardize(distance)
+        return RunFile.rerank_standardized(standardized, method, k, tradeoff)
+
+
+    @classmethod
+    @Profiler.stage("rerank")
+    def rerank_standardized(
+        cls, standardized: dict, method: str, k: int, tradeoff: float,
+    ) -> "RunFile":
+        """
+        Reranks a run from its standardized scores, building each user's
+        reranker only while it is used.
+
+        Args:
+            standardized (dict): The run's scores from `standardize`.
+            method (str): The type of method to rerank by.
+            k (int): Number of recommendations to rerank.
+            tradeoff (float): Amount of relevance to maintain.
+
+        Returns:
+            RunFile: Re-ordered data of the originial run.
+        """
+        # Ensure reranker method exists.
+        if not hasattr(Rerank, method):
+            raise ValueError(f"Invalid method: {method}")
+
         # Rerank each user's recommendations within the run.
-        reranked_df = self.df.groupby("user_id")[["movie_id", "score"]].apply(
-            self._rerank_user_group, method, k, tradeoff, distance,
-        ).reset_index(drop=True)
+        offsets = standardized["offsets"].tolist()
+        rows = []
+        for idx, user_id in enumerate(standardized["user_ids"].tolist()):
+            user_slice = slice(offsets[idx], offsets[idx + 1])
+            items = standardized["movie_ids"][user_slice].tolist()
+            reranker = Rerank(
+                list(zip(items, standardized["relevance"][user_slice].tolist())),
+                list(zip(items, standardized["novelty"][user_slice].tolist())),
+                k,
+            )
+            rows.extend(
+                (item, score, user_id)
+                for item, score in getattr(reranker, method)(tradeoff)
+            )
+        reranked_df = pd.DataFrame(rows, columns=["movie_id", "score", "user_id"])
+
+        reranked_df = cls._add_constant_columns(reranked_df, standardized["algorithm"])
+        return cls(df=reranked_df)
+
+
+    @staticmethod
+    def _split_users(
+        users: np.ndarray, movies: np.ndarray, ranks: np.ndarray,
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Helper function to split run data into contiguous per-user groups.
+
+        Args:
+            users (np.ndarray): The user of each recommendation.
+            movies (np.ndarray): The recommended movies.
+            ranks (np.ndarray): The rank of each recommendation.
+
+        Yields:
+            tuple[int, np.ndarray, np.ndarray]: A user with their movies and
+            ranks.
+        """
+        change = np.flatnonzero(users[1:] != users[:-1]) + 1
+        starts = np.concatenate(([0], change))
+        ends = np.concatenate((change, [len(users)]))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            yield int(users[start]), movies[start:end], ranks[start:end]
+
+
+    def iter_users(self) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Iterates over the run's users in ascending order.
+
+        Yields:
+            tuple[int, np.ndarray, np.ndarray]: A user with their movies and
+            ranks.
+        """
+        df = self.df.sort_values(by="user_id", kind="stable")
+        if len(df) == 0:
+            return
+        yield from self._split_users(
+            df["user_id"].to_numpy(),
+            df["movie_id"].to_numpy(),
+            df["rank"].to_numpy(),
+        )
 
-        reranked_df = self._add_constant_columns(reranked_df, self.algorithm)
-        return RunFile(df=reranked_df)
+
+    @staticmethod
+    def stream_users(
+        path: str, chunk_size: int = 1_000_000,
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Streams a run file user by user without loading it entirely. RunStore
+        files are memory-mapped, while text files are parsed in chunks.
+
+        Args:
+            path (str): The path to the run file.
+            chunk_size (int, optional): Number of text rows parsed at a time.
+
+        Yields:
+            tuple[int, np.ndarray, np.ndarray]: A user with their movies and
+            ranks.
+
+        Raises:
+            UnsortedRunError: If the run is not sorted by user in ascending
+            order.
+        """
+        if RunStore.is_store(path):
+            store = RunStore.read(path)
+            for idx, user_id in enumerate(store.user_ids.tolist()):
+                movies = np.asarray(store.movie_ids[store.user_slice(idx)])
+                yield user_id, movies, np.arange(1, len(movies) + 1)
+            return
+
+        chunks = pd.read_csv(
+            path,
+            sep=" ",
+            names=["user_id", "q0", "movie_id", "rank", "score", "algorithm"],
+            usecols=["user_id", "movie_id", "rank"],
+            header=None,
+            chunksize=chunk_size,
+            compression="infer",
+        )
+
+        # The last user of each chunk may continue into the next chunk.
+        previous_user = None
+        carry = None
+        for chunk in chunks:
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            groups = list(RunFile._split_users(
+                chunk["user_id"].to_numpy(),
+                chunk["movie_id"].to_numpy(),
+                chunk["rank"].to_numpy(),
+            ))
+            for user_id, movies, ranks in groups[:-1]:
+                if previous_user is not None and user_id <= previous_user:
+                    raise UnsortedRunError(f"Run at {path} is not sorted by user")
+                previous_user = user_id
+                yield user_id, movies, ranks
+            carry = chunk.iloc[len(chunk) - len(groups[-1][1]):]
+
+        if carry is not None:
+            user_id, movies, ranks = next(RunFile._split_users(
+                carry["user_id"].to_numpy(),
+                carry["movie_id"].to_numpy(),
+                carry["rank"].to_numpy(),
+            ))
+            if previous_user is not None and user_id <= previous_user:
+                raise UnsortedRunError(f"Run at {path} is not sorted by user")
+            yield user_id, movies, ranks
 
 
     def add_rrf_scores(self) -> "RunFile":
@@ -154,11 +371,13 @@ class RunFile(BaseFile):
         return RunFile(df=rrf_df)
 
 
-    def evaluate(
+    @Profiler.stage("evaluate")
+    def score_users(
         self, measure: str, k: int, distance: Distance, user_ids: set[int],
-    ) -> MeasureFile:
+    ) -> pd.DataFrame:
         """
-        Evaluates the run in terms of a specific measure.
+        Scores each user's recommendations for a specific measure, at full
+        precision and without averages.
 
         Args:
             measure (str): The type of measure for evaluation.
@@ -167,7 +386,8 @@ class RunFile(BaseFile):
             user_ids (set[int]): Set of all users.
 
         Returns:
-            MeasureFile: The measured results of the run.
+            pd.DataFrame: The score of every user, with its algorithm and
+            measure.
         """
         # Evaluate each user's recommendations within the run.
         metrics_df = self.df.groupby("user_id")["movie_id"].apply(
@@ -189,13 +409,150 @@ class RunFile(BaseFile):
         # Add constant columns.
         metrics_df["algorithm"] = self.algorithm
         metrics_df["measure"] = measure
+        return metrics_df
+
+
+    @Profiler.stage("evaluate")
+    def evaluate(
+        self, measure: str, k: int, distance: Distance, user_ids: set[int],
+    ) -> MeasureFile:
+        """
+        Evaluates the run in terms of a specific measure.
+
+        Args:
+            measure (str): The type of measure for evaluation.
+            k (int): Number of recommendations to measure.
+            distance (Distance): Defines how item distances are measured.
+            user_ids (set[int]): Set of all users.
+
+        Returns:
+            MeasureFile: The measured results of the run.
+        """
+        return MeasureFile.from_scores(self.score_users(measure, k, distance, user_ids))
+
+
+    def affected_users(
+        self,
+        measure: str,
+        k: int,
+        changed_items: set[int],
+        changed_users: set[int],
+        num_users_changed: bool,
+    ) -> set[int]:
+        """
+        Finds the users whose score for a measure changes after new ratings
+        are applied to the distances. Diversity only depends on genres,
+        serendipity on the user's own history, and novelty on the popularity
+        of the recommended items and the number of users.
+
+        Args:
+            measure (str): The type of measure for evaluation.
+            k (int): Number of recommendations to measure.
+            changed_items (set[int]): The items whose popularity changed.
+            changed_users (set[int]): The users whose history changed.
+            num_users_changed (bool): Whether the number of users changed.
+
+        Returns:
+            set[int]: The users whose score must be recomputed.
+
+        Raises:
+            ValueError: If the measure does not exist.
+        """
+        if measure == "diversity":
+            return set()
+        if measure == "serendipity":
+            return set(changed_users)
+        if measure == "novelty":
+            if num_users_changed:
+                return set(self.df["user_id"])
+            top_df = self.df.groupby("user_id").head(k)
+            return set(top_df.loc[top_df["movie_id"].isin(changed_items), "user_id"])
+        raise ValueError(f"Invalid measure: {measure}")
+
+
+    def evaluate_incremental(
+        self,
+        measure: str,
+        k: int,
+        distance: Distance,
+        user_ids: set[int],
+        previous_df: pd.DataFrame,
+        affected: set[int],
+    ) -> MeasureFile:
+        """
+        Evaluates the run in terms of a specific measure, recomputing only the
+        affected users and users without a previous score, and carrying over
+        every other user's previous score. Averages are recomputed over all
+        users.
+
+        Args:
+            measure (str): The type of measure for evaluation.
+            k (int): Number of recommendations to measure.
+            distance (Distance): Defines how item distances are measured.
+            user_ids (set[int]): Set of all users.
+            previous_df (pd.DataFrame): The run's previous per-user scores
+            for the measure.
+            affected (set[int]): The users whose score changed.
+
+        Returns:
+            MeasureFile: The measured results of the run.
+        """
+        previous_df = previous_df[previous_df["user_id"].isin(user_ids)]
+        stale = (user_ids - set(previous_df["user_id"])) | (affected & user_ids)
+
+        carried_df = previous_df[~previous_df["user_id"].isin(stale)]
+        carried_df = pd.DataFrame({
+            "score": carried_df["score"].astype(np.float64).round(MeasureFile.decimals).to_numpy(),
+            "user_id": carried_df["user_id"].astype(np.int64).to_numpy(),
+            "algorithm": self.algorithm,
+            "measure": measure,
+        })
+
+        stale_df = self.df[self.df["user_id"].isin(stale)]
+        if stale_df.empty:
+            scores_df = pd.DataFrame({
+                "score": 0.0, "user_id": list(stale), "algorithm": self.algorithm, "measure": measure,
+            })
+        else:
+            scores_df = RunFile(df=stale_df).score_users(measure, k, distance, stale)
+
+        return MeasureFile.from_scores(pd.concat([carried_df, scores_df], ignore_index=True))
+
+
+    @Profiler.stage("evaluate")
+    def evaluate_quality(
+        self, qrels: str, compatibility: Compatibility,
+    ) -> QualityFile:
+        """
+        Evaluates the run's quality against relevance judgments, producing
+        the same rows as `calculate_compatibility.sh`.
+
+        Args:
+            qrels (str): Name of the relevance judgments.
+            compatibility (Compatibility): The quality measure to evaluate.
+
+        Returns:
+            QualityFile: The quality results of the run.
+        """
+        # Evaluate every judged user, scoring users missing from the run as 0.
+        recs = self.df.groupby("user_id")["movie_id"].apply(list).to_dict()
+        quality_df = pd.DataFrame({"user_id": list(compatibility.ideals)})
+        quality_df["score"] = [
+            compatibility.score(user_id, recs.get(user_id, []))
+            for user_id in quality_df["user_id"]
+        ]
+
+        # Add constant columns.
+        quality_df["qrels"] = qrels
+        quality_df["algorithm"] = self.algorithm
+        quality_df["measure"] = compatibility.name
 
-        # Calculate average for each metric.
-        avg_rows_df = metrics_df.groupby(
-            ["algorithm", "measure"]
+        # Calculate average across users.
+        avg_row_df = quality_df.groupby(
+            ["qrels", "algorithm", "measure"]
         )["score"].mean().reset_index()
-        avg_rows_df["user_id"] = "all"
+        avg_row_df["user_id"] = "all"
 
-        # Combine metric run results.
-        results_df = pd.concat([metrics_df, avg_rows_df], ignore_index=True)
-        return MeasureFile(df=results_df)
+        results_df = pd.concat([quality_df, avg_row_df], ignore_index=True)
+        results_df = results_df[["qrels", "algorithm", "measure", "user_id", "score"]]
+        return QualityFile(df=results_df)
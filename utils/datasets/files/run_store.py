@@ -0,0 +1,245 @@
+import json
+import pathlib
+import struct
+
+import numpy as np
+import pandas as pd
+
+from .atomic_writer import AtomicWriter
+from .compression import Compression
+
+
+class RunStore:
+    # File layout: magic, version, header length, JSON header, then the
+    # user ids, per-user offsets, movie ids and scores as aligned arrays.
+    extension = ".runstore"
+    magic = b"RUNSTORE"
+    version = 1
+    alignment = 8
+
+    def __init__(
+        self,
+        algorithm: str,
+        user_ids: np.ndarray,
+        offsets: np.ndarray,
+        movie_ids: np.ndarray,
+        scores: np.ndarray,
+    ):
+        """
+        Initializes a RunStore, a compact binary representation of a run. Each
+        user's recommendations are stored contiguously in rank order, so
+        ranks are implied by position.
+
+        Args:
+            algorithm (str): Name of algorithm that produced the run.
+            user_ids (np.ndarray): Sorted user ids (int32).
+            offsets (np.ndarray): Start of each user's recommendations, with a
+            final entry for the total number of recommendations (int64).
+            movie_ids (np.ndarray): Recommended movie ids (int32).
+            scores (np.ndarray): Recommendation scores (float32).
+
+        Raises:
+            ValueError: If the arrays do not describe a consistent run.
+        """
+        if len(offsets) != len(user_ids) + 1:
+            raise ValueError("Offsets must have one more entry than user ids")
+        if len(movie_ids) != len(scores) or offsets[-1] != len(movie_ids):
+            raise ValueError("Movie ids and scores do not match the offsets")
+
+        self.algorithm = algorithm
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.movie_ids = movie_ids
+        self.scores = scores
+
+
+    @staticmethod
+    def is_store(path: str) -> bool:
+        """
+        Determines whether a path refers to a (possibly compressed) RunStore
+        file.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            bool: True if the path has the RunStore extension.
+        """
+        return pathlib.Path(Compression.strip(path)).suffix == RunStore.extension
+
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "RunStore":
+        """
+        Initializes a RunStore from run data in TREC format.
+
+        Args:
+            df (pd.DataFrame): Run data containing the RunFile columns.
+
+        Returns:
+            RunStore: The run in its binary representation.
+        """
+        df = df.sort_values(by=["user_id", "rank"], kind="stable")
+        users = df["user_id"].to_numpy(dtype=np.int32)
+
+        user_ids, counts = np.unique(users, return_counts=True)
+        offsets = np.zeros(len(user_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        return cls(
+            str(df["algorithm"].iloc[0]),
+            user_ids,
+            offsets,
+            df["movie_id"].to_numpy(dtype=np.int32),
+            df["score"].to_numpy(dtype=np.float32),
+        )
+
+
+    @classmethod
+    def read(cls, path: str, mmap: bool = True) -> "RunStore":
+        """
+        Reads a RunStore from disk. Compressed files are decompressed into
+        memory since they can not be memory-mapped.
+
+        Args:
+            path (str): The path to the file.
+            mmap (bool, optional): Memory-map the arrays instead of reading
+            them into memory.
+
+        Returns:
+            RunStore: The run stored at the path.
+
+        Raises:
+            ValueError: If the file is not a valid RunStore.
+        """
+        if mmap and Compression.suffix(path) is None:
+            buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            with Compression.open(path, "rb") as f:
+                buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+        prefix_len = len(cls.magic) + 8
+        if bytes(buffer[:len(cls.magic)]) != cls.magic:
+            raise ValueError(f"Not a RunStore file at {path}")
+        version, header_len = struct.unpack(
+            "<II", bytes(buffer[len(cls.magic):prefix_len]),
+        )
+        if version != cls.version:
+            raise ValueError(f"Unsupported RunStore version {version}")
+        header = json.loads(bytes(buffer[prefix_len:prefix_len + header_len]))
+
+        arrays = {}
+        for name, (dtype, offset, length) in header["arrays"].items():
+            nbytes = np.dtype(dtype).itemsize * length
+            arrays[name] = buffer[offset:offset + nbytes].view(dtype)
+
+        return cls(
+            header["algorithm"],
+            arrays["user_ids"],
+            arrays["offsets"],
+            arrays["movie_ids"],
+            arrays["scores"],
+        )
+
+
+    def write(self, path: str):
+        """
+        Writes the RunStore to disk atomically, compressing it if the path
+        ends in .gz, .xz or .zst.
+
+        Args:
+            path (str): The full path to save the file.
+        """
+        arrays = {
+            "user_ids": np.ascontiguousarray(self.user_ids, dtype=np.int32),
+            "offsets": np.ascontiguousarray(self.offsets, dtype=np.int64),
+            "movie_ids": np.ascontiguousarray(self.movie_ids, dtype=np.int32),
+            "scores": np.ascontiguousarray(self.scores, dtype=np.float32),
+        }
+
+        # Array offsets depend on the header length, which depends on the
+        # offsets, so reserve generous space for the offset digits.
+        def build_header(start: int) -> dict:
+            layout = {}
+            offset = start
+            for name, array in arrays.items():
+                layout[name] = (array.dtype.str, offset, len(array))
+                offset += self._pad(array.nbytes)
+            return {
+                "algorithm": self.algorithm,
+                "num_users": len(arrays["user_ids"]),
+                "num_recommendations": len(arrays["movie_ids"]),
+                "arrays": layout,
+            }
+
+        prefix_len = len(self.magic) + 8
+        draft = json.dumps(build_header(10 ** 18)).encode()
+        data_start = self._pad(prefix_len + len(draft))
+        header = json.dumps(build_header(data_start)).encode()
+        header = header.ljust(data_start - prefix_len)
+
+        with AtomicWriter.open(path, "wb") as f:
+            f.write(self.magic)
+            f.write(struct.pack("<II", self.version, len(header)))
+            f.write(header)
+            for array in arrays.values():
+                f.write(array.tobytes())
+                f.write(b"\0" * (self._pad(array.nbytes) - array.nbytes))
+
+
+    def _pad(self, size: int) -> int:
+        """
+        Rounds a size up to the RunStore alignment.
+
+        Args:
+            size (int): The number of bytes.
+
+        Returns:
+            int: The aligned number of bytes.
+        """
+        return -(-size // self.alignment) * self.alignment
+
+
+    def user_slice(self, idx: int) -> slice:
+        """
+        Finds the range of recommendations belonging to the idx-th user.
+
+        Args:
+            idx (int): Position of the user within `user_ids`.
+
+        Returns:
+            slice: The user's range within `movie_ids` and `scores`.
+        """
+        return slice(int(self.offsets[idx]), int(self.offsets[idx + 1]))
+
+
+    def ranks(self) -> np.ndarray:
+        """
+        Computes the rank of every recommendation from its position.
+
+        Returns:
+            np.ndarray: The 1-based rank of each recommendation.
+        """
+        counts = np.diff(self.offsets)
+        starts = np.repeat(self.offsets[:-1], counts)
+        return np.arange(len(self.movie_ids), dtype=np.int64) - starts + 1
+
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Converts the RunStore back into run data in TREC format. Scores stay
+        float32, so they are written as stored rather than with the digits of
+        their float64 widening.
+
+        Returns:
+            pd.DataFrame: Run data containing the RunFile columns.
+        """
+        counts = np.diff(self.offsets)
+        return pd.DataFrame({
+            "user_id": np.repeat(np.asarray(self.user_ids, dtype=np.int64), counts),
+            "q0": "Q0",
+            "movie_id": np.asarray(self.movie_ids, dtype=np.int64),
+            "rank": self.ranks(),
+            "score": np.array(self.scores, dtype=np.float32),
+            "algorithm": self.algorithm,
+        })
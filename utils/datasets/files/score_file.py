@@ -0,0 +1,147 @@
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .base_file import BaseFile
+
+
+class ScoreFile(BaseFile):
+    # User id of the rows averaging scores across users, the number of
+    # decimals scores are rounded to before narrowing (None to keep all), and
+    # the dtype scores are stored as.
+    aggregate_user = "all"
+    decimals = None
+    score_dtype = np.float32
+
+    def __init__(
+        self,
+        headers: list[str],
+        sep: str,
+        path: Optional[str] = None,
+        df: Optional[pd.DataFrame] = None,
+    ):
+        """
+        Initializes a file of per-user scores with a typed representation.
+        Dimension columns (e.g. algorithm and measure) are categoricals,
+        per-user rows have int32 user ids and `score_dtype` scores, and the
+        aggregate `all` rows are kept separately in `aggregates`.
+
+        Args:
+            headers (list[str]): The list of columns names, ending in user_id
+            and score.
+            sep (str): The separator used if reading from a file.
+            path (str, optional): The path to the file.
+            df (pd.DataFrame, optional): Dataframe containing file data, which
+            may include aggregate rows.
+
+        Raises:
+            ValueError: If neither `path` or `df` is provided, if both are
+            provided, or if data is invalid.
+        """
+        self.dimensions = [h for h in headers if h not in ["user_id", "score"]]
+        super().__init__(
+            headers,
+            sep,
+            path=path,
+            df=df,
+            header_provided=0,
+            categorical_columns=self.dimensions,
+        )
+        self.df, self.aggregates = self._split(self.df)
+
+
+    def _split(self, df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Helper function to separate aggregate rows from per-user rows, typing
+        each of them.
+
+        Args:
+            df (pd.DataFrame): Rows that may include aggregate rows.
+
+        Returns:
+            tuple[pd.DataFrame, pd.DataFrame]: The per-user and aggregate rows.
+        """
+        if pd.api.types.is_integer_dtype(df["user_id"]):
+            is_aggregate = np.zeros(len(df), dtype=bool)
+        else:
+            is_aggregate = (df["user_id"].astype(str) == self.aggregate_user).to_numpy()
+
+        scores = df["score"].astype(np.float64)
+        if self.decimals is not None:
+            scores = scores.round(self.decimals)
+        df = df.assign(score=scores.astype(self.score_dtype))
+
+        users_df = df[~is_aggregate].astype({"user_id": np.int32})
+        aggregates_df = df[is_aggregate]
+        return users_df.reset_index(drop=True), aggregates_df.reset_index(drop=True)
+
+
+    @classmethod
+    def combine(cls, files: list["ScoreFile"]) -> "ScoreFile":
+        """
+        Combines a list of same type files into a single file, keeping the
+        per-user and aggregate rows separate.
+
+        Args:
+            files (list[ScoreFile]): The list of files to combine.
+
+        Returns:
+            ScoreFile: The combined file.
+        """
+        combined = cls(df=pd.concat([f.df for f in files], ignore_index=True))
+        combined.aggregates = pd.concat(
+            [f.aggregates for f in files], ignore_index=True,
+        ).astype({d: "category" for d in combined.dimensions})
+        return combined
+
+
+    def filter(self, f: dict[str, Union[str, list[str]]]):
+        """
+        Applies a mapping of filters in-place to both the per-user and the
+        aggregate rows. Filtering user_id on `all` keeps only aggregate rows,
+        while filtering on user ids keeps only per-user rows.
+
+        Args:
+            f (dict[str, str | list[str]]): Mapping of column name to value
+            filters.
+        """
+        f = dict(f)
+        user_ids = f.pop("user_id", None)
+
+        super().filter(f)
+        for column, value in f.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            self.aggregates = self.aggregates[self.aggregates[column].isin(values)]
+
+        if user_ids is not None:
+            values = user_ids if isinstance(user_ids, (list, tuple, set)) else [user_ids]
+            if self.aggregate_user not in values:
+                self.aggregates = self.aggregates.iloc[:0]
+            numeric = [int(v) for v in values if v != self.aggregate_user]
+            if numeric:
+                super().filter({"user_id": numeric})
+            else:
+                self.df = self.df.iloc[:0]
+
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Reassembles the file layout, placing each aggregate row after the
+        per-user rows of its group.
+
+        Returns:
+            pd.DataFrame: Per-user and aggregate rows in file order.
+        """
+        combined = pd.concat(
+            [
+                self.df[self.headers].astype({"user_id": object}),
+                self.aggregates[self.headers],
+            ],
+            ignore_index=True,
+        )
+        groups = combined.groupby(
+            self.dimensions, sort=False, observed=True, dropna=False,
+        ).ngroup().to_numpy()
+        is_aggregate = np.arange(len(combined)) >= len(self.df)
+        return combined.take(np.lexsort((is_aggregate, groups)))
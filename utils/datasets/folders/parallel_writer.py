@@ -0,0 +1,82 @@
+import collections
+import concurrent.futures
+from typing import Iterable, Optional
+
+from tqdm import tqdm
+
+from ..files.base_file import BaseFile
+
+
+def _save_file(file: BaseFile, path: str, compression: Optional[str]) -> str:
+    """
+    Saves a file from within a worker. Defined at module level so it can be
+    sent to a process pool.
+
+    Args:
+        file (BaseFile): The file to save.
+        path (str): The full path to save the file.
+        compression (str, optional): Compression to apply.
+
+    Returns:
+        str: The path that was written.
+    """
+    file.save(path, compression)
+    return path
+
+
+class ParallelWriter:
+    def __init__(self, workers: int = 4, executor: str = "thread"):
+        """
+        Writes several files at once on a pool of workers. Threads suit most
+        cases since compression and disk writes release the GIL, while
+        processes also parallelize number formatting at the cost of sending
+        each file to its worker.
+
+        Args:
+            workers (int, optional): Maximum number of files written at once.
+            executor (str, optional): Either "thread" or "process".
+
+        Raises:
+            ValueError: If the executor type is invalid.
+        """
+        executors = {
+            "thread": concurrent.futures.ThreadPoolExecutor,
+            "process": concurrent.futures.ProcessPoolExecutor,
+        }
+        if executor not in executors:
+            raise ValueError(f"Invalid executor: {executor}")
+
+        self.workers = max(workers, 1)
+        self.executor_cls = executors[executor]
+
+
+    def save(
+        self,
+        files: Iterable[tuple[BaseFile, str]],
+        compression: Optional[str] = None,
+        total: Optional[int] = None,
+    ) -> list[str]:
+        """
+        Saves each file at its path. Files are consumed lazily, and no more
+        than `workers` files are pending at once so memory stays bounded
+        when files are produced on demand.
+
+        Args:
+            files (Iterable[tuple[BaseFile, str]]): Pairs of files and paths.
+            compression (str, optional): Compression to apply to each file.
+            total (int, optional): Number of files, for progress reporting.
+
+        Returns:
+            list[str]: The paths that were written.
+        """
+        written = []
+        with self.executor_cls(max_workers=self.workers) as executor:
+            pending = collections.deque()
+            for file, path in tqdm(files, total=total):
+                if len(pending) >= self.workers:
+                    written.append(pending.popleft().result())
+                pending.append(
+                    executor.submit(_save_file, file, path, compression)
+                )
+            written.extend(future.result() for future in pending)
+        return written
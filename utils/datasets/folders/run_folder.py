@@ -1,17 +1,84 @@
+import concurrent.futures
+import functools
+import heapq
+import itertools
 import logging
-import os
+import multiprocessing
 import pathlib
-from typing import Optional
+import tempfile
+from typing import Callable, Iterator, Optional
 
+import numpy as np
+import pandas as pd
 from tqdm import tqdm
 
-from ..files.run_file import RunFile
+from ..cache.checkpoint_manifest import CheckpointManifest
+from ..cache.result_cache import ResultCache
+from ..files.atomic_writer import AtomicWriter
+from ..files.base_file import BaseFile
+from ..files.run_file import RunFile, UnsortedRunError
 from ..files.measure_file import MeasureFile
+from ..files.quality_file import QualityFile
+from ..shards.user_shard import UserShard
+from .parallel_writer import ParallelWriter
+from utils.interface.profiler import Profiler
+from utils.objectives.compatibility import Compatibility
 from utils.objectives.distance import Distance
+from utils.objectives.fusion import Fusion
 
 
 logger = logging.getLogger(__name__)
 
+# Runs prepared for a tradeoff sweep, shared with forked sweep workers so
+# they do not need to be sent to each worker.
+_sweep_state = {}
+
+
+def _sweep_tradeoff(tradeoff: float, subdir: str) -> str:
+    """
+    Reranks every prepared run at a single tradeoff and saves the results,
+    skipping runs already completed by a resumed sweep. Defined at module
+    level so it can be run by a process pool.
+
+    Args:
+        tradeoff (float): Amount of relevance to maintain.
+        subdir (str): The directory to save the reranked runs.
+
+    Returns:
+        str: The directory that was written.
+    """
+    method = _sweep_state["method"]
+    k = _sweep_state["k"]
+    distance = _sweep_state["distance"]
+    cache = _sweep_state["cache"]
+    extension = _sweep_state["extension"]
+    compression = _sweep_state["compression"]
+    checkpoint = _sweep_state["checkpoint"]
+
+    for standardized, fingerprint, pending in _sweep_state["runs"]:
+        if subdir not in pending:
+            continue
+        key = functools.partial(
+            RunFolder._derived_fingerprint,
+            fingerprint,
+            "rerank",
+            method,
+            k,
+            tradeoff,
+            distance.fingerprint,
+        )
+        reranked_run = RunFolder._cached(
+            cache,
+            key,
+            RunFile,
+            lambda: RunFile.rerank_standardized(standardized, method, k, tradeoff),
+        )
+        output = f"{subdir}/{standardized['algorithm']}{extension}"
+        reranked_run.save(output, compression)
+        if checkpoint is not None:
+            checkpoint.record(output, RunFolder._sweep_key(key, extension, compression))
+    return subdir
+
 
 class RunFolder:
     def __init__(
@@ -21,7 +88,9 @@ class RunFolder:
     ):
         """
         Initializes a RunFolder object from a folder/file path, containing many
-        RunFile objects.
+        RunFile objects. Runs read from a path are only loaded when the folder
+        is iterated, so at most one run needs to be held in memory at a time.
+        Compressed runs (.gz, .xz, .zst) are decompressed as they are read.
 
         Args:
             path (str, optional): The path to the folder or file.
@@ -32,79 +101,698 @@ class RunFolder:
             provided, or if data is invalid.
         """
         if path is not None and runs is not None:
-            ValueError("Both `path` and `runs` can not be provided")
+            raise ValueError("Both `path` and `runs` can not be provided")
 
-        # Read in data either from path or from existing list.
+        # Collect loaders either from path or from existing list.
         if path:
             logger.info(f"Initializing runs from {path}")
 
             input_path = pathlib.Path(path)
             if input_path.is_file():
-                self.runs = [RunFile(path)]
+                run_paths = [input_path]
             elif input_path.is_dir():
-                self.runs = [
-                    RunFile(run) for run in input_path.iterdir() if run.is_file()
-                ]
+                # Skip temporary files left behind by killed writes.
+                run_paths = sorted(
+                    run for run in input_path.iterdir()
+                    if run.is_file() and not AtomicWriter.is_temporary(run)
+                )
             else:
                 raise ValueError(f"{path} is neither a valid file nor directory")
+            self._loaders = [
+                functools.partial(RunFile, run_path) for run_path in run_paths
+            ]
+            self._fingerprints = [
+                functools.partial(ResultCache.hash_file, run_path)
+                for run_path in run_paths
+            ]
+            self._paths = run_paths
         elif runs is not None:
             if not isinstance(runs, list):
                 raise ValueError("Provided data must be a list of RunFiles")
-            self.runs = runs
+            self._loaders = [functools.partial(RunFile, df=run.df) for run in runs]
+            self._fingerprints = [run.fingerprint for run in runs]
+            self._paths = [None] * len(runs)
         else:
             raise ValueError("Either `path` or `runs` must be provided")
 
 
+    def fingerprint(self) -> str:
+        """
+        Hashes the contents of every run in the folder.
+
+        Returns:
+            str: The hexadecimal hash of the runs.
+        """
+        return ResultCache.key([fingerprint() for fingerprint in self._fingerprints])
+
+
+    @classmethod
+    def _from_loaders(
+        cls,
+        loaders: list[Callable[[], RunFile]],
+        fingerprints: list[Callable[[], str]],
+    ) -> "RunFolder":
+        """
+        Initializes a RunFolder directly from functions that each produce a
+        single RunFile when called.
+
+        Args:
+            loaders (list[Callable[[], RunFile]]): Functions producing the runs.
+            fingerprints (list[Callable[[], str]]): Functions producing a hash
+            of each run's contents.
+
+        Returns:
+            RunFolder: A RunFolder that lazily produces its runs.
+        """
+        folder = cls.__new__(cls)
+        folder._loaders = loaders
+        folder._fingerprints = fingerprints
+        folder._paths = [None] * len(loaders)
+        return folder
+
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+
+    def __iter__(self) -> Iterator[RunFile]:
+        """
+        Loads each RunFile in turn. A run is released as soon as the caller
+        drops its reference to it.
+
+        Yields:
+            RunFile: The next run in the folder.
+        """
+        for loader in self._loaders:
+            yield loader()
+
+
+    @staticmethod
+    def _cached(
+        cache: Optional[ResultCache],
+        key: Callable[[], str],
+        file_cls: type,
+        compute: Callable[[], BaseFile],
+    ) -> BaseFile:
+        """
+        Helper function to reuse a cached result, or compute and cache it.
+
+        Args:
+            cache (ResultCache, optional): The cache, or None to always compute.
+            key (Callable[[], str]): Function producing the cache key.
+            file_cls (type): The BaseFile subclass of the result.
+            compute (Callable[[], BaseFile]): Function computing the result.
+
+        Returns:
+            BaseFile: The cached or computed result.
+        """
+        if cache is None:
+            return compute()
+
+        cache_key = key()
+        result = cache.get(cache_key, file_cls)
+        if result is None:
+            result = compute()
+            cache.put(cache_key, result)
+        return result
+
+
+    @staticmethod
+    def _derived_fingerprint(fingerprint: Callable[[], str], *parts) -> str:
+        """
+        Helper function to hash a result derived from a run. Callable parts
+        are only called here, so expensive hashes are computed on demand.
+
+        Args:
+            fingerprint (Callable[[], str]): Function producing the run's hash.
+            *parts: The values that determine the derived result.
+
+        Returns:
+            str: The hexadecimal hash of the derived result.
+        """
+        parts = [part() if callable(part) else part for part in parts]
+        return ResultCache.key(fingerprint(), *parts)
+
+
+    @staticmethod
+    def _rerank_run(
+        loader: Callable[[], RunFile],
+        key: Callable[[], str],
+        method: str,
+        k: int,
+        tradeoff: float,
+        distance: Distance,
+        cache: Optional[ResultCache],
+    ) -> RunFile:
+        """
+        Helper function to load and rerank a single run.
+
+        Args:
+            loader (Callable[[], RunFile]): Function producing the run.
+            key (Callable[[], str]): Function producing the reranked run's hash.
+            method (str): The type of method to rerank by.
+            k (int): Number of recommendations to rerank.
+            tradeoff (float): Amount of relevance to maintain.
+            distance (Distance): Defines how item distances are measured.
+            cache (ResultCache, optional): Cache of reranked runs.
+
+        Returns:
+            RunFile: The reranked run.
+        """
+        return RunFolder._cached(
+            cache,
+            key,
+            RunFile,
+            lambda: loader().rerank(method, k, tradeoff, distance),
+        )
+
+
     def rerank(
-        self, method: str, k: int, tradeoff: float, distance: Distance,
+        self,
+        method: str,
+        k: int,
+        tradeoff: float,
+        distance: Distance,
+        cache: Optional[ResultCache] = None,
     ) -> "RunFolder":
         """
-        Reranks all RunFiles in the RunFolder.
+        Reranks all RunFiles in the RunFolder. Reranking is deferred until the
+        returned RunFolder is iterated (e.g. when saving), and each reranked
+        run is recomputed every time it is iterated unless a cache is used.
 
         Args:
             method (str): The type of method to rerank by.
             k (int): Number of recommendations to rerank.
             tradeoff (float): Amount of relevance to maintain.
             distance (Distance): Defines how item distances are measured.
+            cache (ResultCache, optional): Cache of reranked runs, keyed on
+            the run, method, k, tradeoff and distance inputs.
 
         Returns:
-            RunFile: A new RunFolder instance with reranked RunFiles.
+            RunFolder: A new RunFolder instance with reranked RunFiles.
         """
         tradeoff_disp = round(1 - tradeoff, 2)
         logger.info(f"Reranking {k} items per user with {tradeoff_disp} {method}")
-        reranked_runs = [
-            run.rerank(method, k, tradeoff, distance)
-            for run in tqdm(self.runs)
+        reranked_fingerprints = [
+            functools.partial(
+                self._derived_fingerprint,
+                fingerprint,
+                "rerank",
+                method,
+                k,
+                tradeoff,
+                distance.fingerprint,
+            )
+            for fingerprint in self._fingerprints
+        ]
+        reranked_loaders = [
+            functools.partial(
+                self._rerank_run,
+                loader,
+                key,
+                method,
+                k,
+                tradeoff,
+                distance,
+                cache,
+            )
+            for loader, key in zip(self._loaders, reranked_fingerprints)
+        ]
+        return RunFolder._from_loaders(reranked_loaders, reranked_fingerprints)
+
+
+    @staticmethod
+    def _sweep_key(key: Callable[[], str], extension: str, compression: Optional[str]) -> str:
+        """
+        Helper function to create the checkpoint key of a reranked run saved
+        by a sweep, covering its reranking inputs and output format.
+
+        Args:
+            key (Callable[[], str]): Function producing the reranked run's hash.
+            extension (str): The run file extension.
+            compression (str, optional): Compression applied to the run.
+
+        Returns:
+            str: The hexadecimal checkpoint key.
+        """
+        return ResultCache.key(key(), extension, compression)
+
+
+    @staticmethod
+    def _shard_run(loader: Callable[[], RunFile], shard: UserShard) -> RunFile:
+        """
+        Helper function to load a run restricted to the users of a shard.
+
+        Args:
+            loader (Callable[[], RunFile]): Function producing the run.
+            shard (UserShard): The shard of users to keep.
+
+        Returns:
+            RunFile: The run's recommendations for the shard's users.
+
+        Raises:
+            ValueError: If the run has no users in the shard.
+        """
+        run = loader()
+        df = shard.filter(run.df)
+        if df.empty:
+            raise ValueError(f"Shard {shard} has no users of {run.algorithm}, use fewer shards")
+        return RunFile(df=df)
+
+
+    def shard(self, shard: UserShard) -> "RunFolder":
+        """
+        Restricts every run to the users of a shard. Runs are filtered as
+        they are loaded.
+
+        Args:
+            shard (UserShard): The shard of users to keep.
+
+        Returns:
+            RunFolder: A new RunFolder instance with the sharded RunFiles.
+        """
+        logger.info(f"Keeping the users of shard {shard}")
+        sharded_fingerprints = [
+            functools.partial(
+                self._derived_fingerprint, fingerprint, "shard", shard.index, shard.count,
+            )
+            for fingerprint in self._fingerprints
+        ]
+        sharded_loaders = [
+            functools.partial(self._shard_run, loader, shard) for loader in self._loaders
+        ]
+        return RunFolder._from_loaders(sharded_loaders, sharded_fingerprints)
+
+
+    @Profiler.stage("rerank")
+    def rerank_sweep(
+        self,
+        method: str,
+        k: int,
+        sweep: list[tuple[float, str]],
+        distance: Distance,
+        extension: str = ".results",
+        compression: Optional[str] = None,
+        workers: int = 1,
+        cache: Optional[ResultCache] = None,
+        checkpoint: Optional[CheckpointManifest] = None,
+    ):
+        """
+        Reranks all RunFiles at many tradeoffs, saving each tradeoff to its
+        own directory. Every run is parsed and its scores are standardized
+        only once, then tradeoffs are handed out to a pool of forked workers
+        and each directory is written as soon as it is done. Unlike `rerank`,
+        the standardized scores of all runs are held in memory for the whole
+        sweep, as flat arrays of about 20 bytes per recommendation; each
+        user's reranker is only built while the user is reranked.
+        With a checkpoint, every saved run is recorded. When resuming, runs
+        recorded by a previous sweep with the same inputs are skipped, along
+        with tradeoffs and runs that have nothing left to do, and temporary
+        files left by the interrupted sweep are removed.
+
+        Args:
+            method (str): The type of method to rerank by.
+            k (int): Number of recommendations to rerank.
+            sweep (list[tuple[float, str]]): Pairs of tradeoffs and the
+            directories to save their reranked runs.
+            distance (Distance): Defines how item distances are measured.
+            extension (str, optional): The run file extension, which also
+            selects the format (e.g. ".results" or ".runstore").
+            compression (str, optional): Compression to apply to each run
+            (gzip, xz or zstd).
+            workers (int, optional): Number of tradeoffs reranked at once.
+            cache (ResultCache, optional): Cache of reranked runs.
+            checkpoint (CheckpointManifest, optional): Manifest of the saved
+            runs, used to resume an interrupted sweep.
+        """
+        logger.info(f"Preparing {k} items per user for {len(sweep)} tradeoffs")
+        runs = []
+        skipped = 0
+        for loader, fingerprint in tqdm(
+            zip(self._loaders, self._fingerprints), total=len(self),
+        ):
+            run = loader()
+            run_hash = fingerprint() if cache is not None or checkpoint is not None else None
+            run_fingerprint = lambda run_hash=run_hash: run_hash
+
+            pending = {subdir for _, subdir in sweep}
+            if checkpoint is not None:
+                for tradeoff, subdir in sweep:
+                    key = functools.partial(
+                        self._derived_fingerprint,
+                        run_fingerprint,
+                        "rerank",
+                        method,
+                        k,
+                        tradeoff,
+                        distance.fingerprint,
+                    )
+                    output = f"{subdir}/{run.algorithm}{extension}"
+                    if checkpoint.is_done(output, self._sweep_key(key, extension, compression)):
+                        pending.discard(subdir)
+                skipped += len(sweep) - len(pending)
+                if not pending:
+                    continue
+            runs.append((run.standardize(distance), run_fingerprint, pending))
+
+        if skipped:
+            logger.info(f"Skipping {skipped} reranked runs completed by a previous sweep")
+        if checkpoint is not None and checkpoint.resume:
+            # Partial runs are redone under new temporary names, so remove
+            # the ones left by the interrupted sweep.
+            for _, subdir in sweep:
+                AtomicWriter.remove_temporary(subdir)
+        sweep = [
+            (tradeoff, subdir) for tradeoff, subdir in sweep
+            if any(subdir in pending for _, _, pending in runs)
         ]
-        return RunFolder(runs=reranked_runs)
+
+        _sweep_state.update(
+            runs=runs,
+            method=method,
+            k=k,
+            distance=distance,
+            cache=cache,
+            extension=extension,
+            compression=compression,
+            checkpoint=checkpoint,
+        )
+
+        try:
+            # Workers are forked so they share the prepared runs.
+            if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers, mp_context=context,
+                ) as executor:
+                    futures = [
+                        executor.submit(_sweep_tradeoff, tradeoff, subdir)
+                        for tradeoff, subdir in sweep
+                    ]
+                    for future in tqdm(
+                        concurrent.futures.as_completed(futures), total=len(futures),
+                    ):
+                        logger.info(f"Saved reranked runs to {future.result()}")
+            else:
+                for tradeoff, subdir in tqdm(sweep):
+                    logger.info(f"Saved reranked runs to {_sweep_tradeoff(tradeoff, subdir)}")
+        finally:
+            _sweep_state.clear()
 
 
     def evaluate(
-        self, measure: str, k: int, distance: Distance, user_ids: set[int],
+        self,
+        measure: str,
+        k: int,
+        distance: Distance,
+        user_ids: set[int],
+        cache: Optional[ResultCache] = None,
     ) -> MeasureFile:
         """
-        Evaluates all RunFiles in the RunFolder.
+        Evaluates all RunFiles in the RunFolder. With a cache, runs whose
+        results are already cached are not loaded at all.
 
         Args:
             measure (str): The type of measure for evaluation.
             k (int): Number of recommendations to measure.
             distance (Distance): Defines how item distances are measured.
             user_ids (set[int]): Set of all users.
+            cache (ResultCache, optional): Cache of per-run results, keyed on
+            the run, measure, k, users and distance inputs.
 
         Returns:
             MeasureFile: The measured results across all runs.
         """
         logger.info(f"Measuring top {k} items per user for {measure}")
+        users_key = ResultCache.key(sorted(user_ids)) if cache else None
+
         measured_runs = [
-            run.evaluate(measure, k, distance, user_ids)
-            for run in tqdm(self.runs)
+            self._cached(
+                cache,
+                functools.partial(
+                    self._derived_fingerprint,
+                    fingerprint,
+                    "evaluate",
+                    measure,
+                    k,
+                    users_key,
+                    distance.fingerprint,
+                ),
+                MeasureFile,
+                lambda loader=loader: loader().evaluate(
+                    measure, k, distance, user_ids,
+                ),
+            )
+            for loader, fingerprint in tqdm(
+                zip(self._loaders, self._fingerprints), total=len(self),
+            )
         ]
         return MeasureFile.combine(measured_runs)
 
 
+    def evaluate_incremental(
+        self,
+        measure: str,
+        k: int,
+        distance: Distance,
+        user_ids: set[int],
+        previous: MeasureFile,
+        changes: tuple[set[int], set[int], bool],
+    ) -> MeasureFile:
+        """
+        Re-evaluates all RunFiles in the RunFolder after new ratings were
+        applied to the distances, recomputing only the users whose score
+        changed and carrying over every other user's score from a previous
+        evaluation. Runs missing from the previous evaluation are evaluated
+        in full.
+
+        Args:
+            measure (str): The type of measure for evaluation.
+            k (int): Number of recommendations to measure.
+            distance (Distance): Defines how item distances are measured,
+            with the new ratings applied.
+            user_ids (set[int]): Set of all users.
+            previous (MeasureFile): The previous evaluation of the runs.
+            changes (tuple[set[int], set[int], bool]): The changes returned
+            by `Distance.apply_ratings`.
+
+        Returns:
+            MeasureFile: The measured results across all runs.
+        """
+        logger.info(f"Re-measuring top {k} items per user for {measure}")
+        previous_df = previous.df[previous.df["measure"] == measure]
+
+        measured_runs, recomputed = [], 0
+        for run in tqdm(self, total=len(self)):
+            run_df = previous_df[previous_df["algorithm"] == run.algorithm]
+            if run_df.empty:
+                recomputed += len(user_ids)
+                measured_runs.append(run.evaluate(measure, k, distance, user_ids))
+                continue
+
+            affected = run.affected_users(measure, k, *changes)
+            recomputed += len((user_ids - set(run_df["user_id"])) | (affected & user_ids))
+            measured_runs.append(
+                run.evaluate_incremental(measure, k, distance, user_ids, run_df, affected)
+            )
+
+        logger.info(f"Recomputed {recomputed} of {len(user_ids) * len(self)} user scores")
+        return MeasureFile.combine(measured_runs)
+
+
+    def score_users(
+        self, measure: str, k: int, distance: Distance, user_ids: set[int],
+    ) -> pd.DataFrame:
+        """
+        Scores each user's recommendations in every RunFile at full
+        precision, without averages (e.g. to merge sharded evaluations).
+
+        Args:
+            measure (str): The type of measure for evaluation.
+            k (int): Number of recommendations to measure.
+            distance (Distance): Defines how item distances are measured.
+            user_ids (set[int]): Set of all users.
+
+        Returns:
+            pd.DataFrame: The score of every user in every run.
+        """
+        logger.info(f"Scoring top {k} items per user for {measure}")
+        return pd.concat(
+            [
+                run.score_users(measure, k, distance, user_ids)
+                for run in tqdm(self, total=len(self))
+            ],
+            ignore_index=True,
+        )
+
+
+    def evaluate_quality(
+        self, qrels: str, compatibility: Compatibility,
+    ) -> QualityFile:
+        """
+        Evaluates the quality of all RunFiles in the RunFolder.
+
+        Args:
+            qrels (str): Name of the relevance judgments.
+            compatibility (Compatibility): The quality measure to evaluate.
+
+        Returns:
+            QualityFile: The quality results across all runs.
+        """
+        logger.info(f"Measuring {compatibility.name} against {qrels}")
+        measured_runs = [
+            run.evaluate_quality(qrels, compatibility)
+            for run in tqdm(self, total=len(self))
+        ]
+        return QualityFile.combine(measured_runs)
+
+
+    @staticmethod
+    def _spilled_users(
+        loader: Callable[[], RunFile], directory: str,
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Helper function to iterate over a run's users in ascending order from
+        a sorted copy saved to disk. The run is only held in memory while it
+        is sorted and saved, so runs that cannot be streamed from their file
+        (e.g. unsorted, sharded or reranked runs) are loaded one at a time.
+
+        Args:
+            loader (Callable[[], RunFile]): Function producing the run.
+            directory (str): The directory to save the sorted copy.
+
+        Yields:
+            tuple[int, np.ndarray, np.ndarray]: A user with their movies and
+            ranks.
+        """
+        df = loader().df.sort_values(by="user_id", kind="stable")
+        if len(df) == 0:
+            return
+        pathlib.Path(directory).mkdir(parents=True)
+        for column in ["user_id", "movie_id", "rank"]:
+            # Raises on malformed rows, which can not be memory-mapped.
+            np.save(f"{directory}/{column}.npy", pd.to_numeric(df[column]).to_numpy())
+        del df
+
+        yield from RunFile._split_users(*(
+            np.load(f"{directory}/{column}.npy", mmap_mode="r")
+            for column in ["user_id", "movie_id", "rank"]
+        ))
+
+
+    def _user_streams(
+        self, directory: str, stream: bool = True,
+    ) -> list[Iterator[tuple[int, np.ndarray, np.ndarray]]]:
+        """
+        Helper function to iterate over each run's users in ascending order.
+        Runs read from disk are streamed from their files, and all other runs
+        are sorted and saved to `directory` one at a time.
+
+        Args:
+            directory (str): The directory to save sorted copies of runs.
+            stream (bool, optional): Stream runs read from disk instead of
+            saving sorted copies.
+
+        Returns:
+            list[Iterator[tuple[int, np.ndarray, np.ndarray]]]: An iterator of
+            users with their movies and ranks for each run.
+        """
+        return [
+            RunFile.stream_users(path) if stream and path is not None
+            else self._spilled_users(loader, f"{directory}/{idx}")
+            for idx, (loader, path) in enumerate(zip(self._loaders, self._paths))
+        ]
+
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Helper function to select the k highest scores, breaking ties by
+        position (i.e. by ascending movie id when movies are sorted).
+
+        Args:
+            scores (np.ndarray): The scores to select from.
+            k (int): Number of scores to select.
+
+        Returns:
+            np.ndarray: The positions of the selected scores in order.
+        """
+        if len(scores) > k:
+            kth = np.partition(-scores, k - 1)[k - 1]
+            candidates = np.flatnonzero(-scores <= kth)
+        else:
+            candidates = np.arange(len(scores))
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:k]
+
+
+    def _fuse_rrf(
+        self,
+        streams: list[Iterator[tuple[int, np.ndarray, np.ndarray]]],
+        k: int,
+    ) -> RunFile:
+        """
+        Helper function to perform RRF as a k-way merge over the runs' users.
+        Only a single user's recommendations from each run are combined at a
+        time, and scores are accumulated with the same compensated summation
+        as a pandas groupby sum so the results are identical.
+
+        Args:
+            streams (list[Iterator]): Users with their movies and ranks, in
+            ascending user order, for each run.
+            k (int): Number of recommendations to combine.
+
+        Returns:
+            RunFile: A single RunFile of the combined runs.
+        """
+        rrf_k = 60
+        user_ids, movie_ids, scores = [], [], []
+
+        merged = heapq.merge(*streams, key=lambda group: group[0])
+        for user_id, groups in tqdm(itertools.groupby(merged, key=lambda group: group[0])):
+            groups = list(groups)
+            movies, inverse = np.unique(
+                np.concatenate([movies for _, movies, _ in groups]),
+                return_inverse=True,
+            )
+
+            totals = np.zeros(len(movies))
+            compensation = np.zeros(len(movies))
+            start = 0
+            for _, run_movies, run_ranks in groups:
+                idx = inverse[start:start + len(run_movies)]
+                start += len(run_movies)
+
+                y = 1 / (run_ranks + rrf_k) - compensation[idx]
+                t = totals[idx] + y
+                compensation[idx] = (t - totals[idx]) - y
+                totals[idx] = t
+
+            top = self._top_k(totals, k)
+            user_ids.append(np.full(len(top), user_id, dtype=np.int64))
+            movie_ids.append(movies[top].astype(np.int64))
+            scores.append(totals[top])
+
+        counts = [len(users) for users in user_ids]
+        rrf_df = pd.DataFrame({
+            "user_id": np.concatenate(user_ids) if user_ids else [],
+            "q0": "Q0",
+            "movie_id": np.concatenate(movie_ids) if movie_ids else [],
+            "rank": np.concatenate([np.arange(1, n + 1) for n in counts]) if counts else [],
+            "score": np.concatenate(scores) if scores else [],
+            "algorithm": "RRF",
+        })
+        return RunFile(df=rrf_df)
+
+
+    @Profiler.stage("fuse")
     def rrf(self, k: int) -> RunFile:
         """
-        Performs reciprocal rank fusion (RRF) across all runs.
+        Performs reciprocal rank fusion (RRF) across all runs. Runs read from
+        disk are streamed user by user, so memory stays bounded by a single
+        user's recommendations across runs plus the fused output. Runs held
+        in memory, and all runs if one is not sorted by user, are loaded one
+        at a time and streamed from sorted copies in a temporary directory.
 
         Args:
             k (int): Number of recommendations to combine.
@@ -113,20 +801,71 @@ class RunFolder:
             RunFile: A single RunFile of the combined runs.
         """
         logger.info(f"Performing RRF to combine top {k} items per user")
-        rrf_runs = [run.add_rrf_scores() for run in tqdm(self.runs)]
-        rrf_file = RunFile.combine(rrf_runs)
-        return rrf_file.setup_rrf_file(k)
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                return self._fuse_rrf(self._user_streams(f"{directory}/sorted"), k)
+            except UnsortedRunError as e:
+                logger.warning(f"{e}, sorting runs on disk instead")
+                return self._fuse_rrf(self._user_streams(f"{directory}/resorted", stream=False), k)
+
+
+    @Profiler.stage("fuse")
+    def fuse(self, configs: list[dict], k: int) -> dict[str, RunFile]:
+        """
+        Fuses all runs with several fusion configurations (e.g. weighted RRF,
+        CombSUM, CombMNZ, Borda), loading the runs only once.
+
+        Args:
+            configs (list[dict]): Fusion configurations with a `method`, and
+            optionally per-run `weights` and an RRF `constant`.
+            k (int): Number of recommendations per user in each fused run.
 
+        Returns:
+            dict[str, RunFile]: The fused run of each configuration, by name.
+        """
+        logger.info(f"Fusing {len(self)} runs with {len(configs)} configurations")
+        fusion = Fusion([run.df for run in tqdm(self, total=len(self))])
+
+        fused_runs = {}
+        for name, scores in fusion.fuse(configs).items():
+            fused_df = fusion.top_k(scores, k)
+            fused_df["q0"] = "Q0"
+            fused_df["algorithm"] = name
+            fused_runs[name] = RunFile(df=fused_df[
+                ["user_id", "q0", "movie_id", "rank", "score", "algorithm"]
+            ])
+        return fused_runs
 
-    def save(self, path: str):
+
+    @Profiler.stage("save")
+    def save(
+        self,
+        path: str,
+        extension: str = ".results",
+        compression: Optional[str] = None,
+        workers: int = 1,
+        executor: str = "thread",
+    ):
         """
-        Saves the runs at the specified folder path.
+        Saves the runs at the specified folder path. Runs are produced one at
+        a time and handed to a pool of writers, so at most `workers` runs are
+        held in memory while they are being written.
 
         Args:
             path (str): The directory to save the runs.
+            extension (str, optional): The run file extension, which also
+            selects the format (e.g. ".results" or ".runstore").
+            compression (str, optional): Compression to apply to each run
+            (gzip, xz or zstd).
+            workers (int, optional): Number of runs written at once.
+            executor (str, optional): Either "thread" or "process" workers.
         """
         logger.info(f"Saving runs to {path}")
         pathlib.Path(path).mkdir(parents=True, exist_ok=True)
 
-        for run in self.runs:
-            run.save(f"{path}/{run.algorithm}.results")
+        writer = ParallelWriter(workers, executor)
+        writer.save(
+            ((run, f"{path}/{run.algorithm}{extension}") for run in self),
+            compression,
+            total=len(self),
+        )
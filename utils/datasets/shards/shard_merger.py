@@ -0,0 +1,235 @@
+import heapq
+import logging
+import operator
+import pathlib
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..files.atomic_writer import AtomicWriter
+from ..files.compression import Compression
+from ..files.measure_file import MeasureFile
+from ..files.run_file import RunFile, UnsortedRunError
+from ..files.run_store import RunStore
+
+
+logger = logging.getLogger(__name__)
+
+
+class ShardMerger:
+    # Columns of the per-user scores saved by a sharded evaluation.
+    score_headers = ["algorithm", "measure", "user_id", "score"]
+
+    @staticmethod
+    def save_scores(scores_df: pd.DataFrame, path: str, compression: Optional[str] = None):
+        """
+        Saves the per-user scores of a sharded evaluation at full precision
+        and without averages, so merging shards can average every user
+        exactly as an unsharded evaluation would.
+
+        Args:
+            scores_df (pd.DataFrame): The score of every user in the shard.
+            path (str): The full path to save the file.
+            compression (str, optional): Compression to apply (gzip, xz or
+            zstd), appending its extension to the path if missing.
+        """
+        path = Compression.with_compression(path, compression)
+        with AtomicWriter.open(path, "wb") as f:
+            f.write(scores_df[ShardMerger.score_headers].to_csv(sep="\t", index=False).encode())
+        logger.info(f"Saved per-user scores to {path}")
+
+
+    @staticmethod
+    def _check_disjoint(df: pd.DataFrame, keys: list[str]):
+        """
+        Helper function to ensure no user appears in more than one shard.
+
+        Args:
+            df (pd.DataFrame): The rows of every shard.
+            keys (list[str]): The columns identifying a user's rows.
+
+        Raises:
+            ValueError: If a user appears in several shards.
+        """
+        duplicated = df.duplicated(keys)
+        if duplicated.any():
+            row = df[duplicated].iloc[0]
+            raise ValueError(
+                f"User {row['user_id']} appears in more than one shard, "
+                "were the shards produced with the same N?"
+            )
+
+
+    @staticmethod
+    def _user_lines(path: pathlib.Path, shard: int) -> Iterator[tuple[int, int, str]]:
+        """
+        Helper function to stream the lines of a TREC text shard with their
+        user ids, without parsing the rest of each line.
+
+        Args:
+            path (pathlib.Path): The shard of the run.
+            shard (int): The position of the shard.
+
+        Yields:
+            tuple[int, int, str]: The user id, the shard and the line.
+
+        Raises:
+            UnsortedRunError: If the shard is not sorted by user.
+        """
+        previous_user = None
+        with Compression.open(str(path), "rt") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line:
+                    continue
+                user_id = int(line.split(" ", 1)[0])
+                if previous_user is not None and user_id < previous_user:
+                    raise UnsortedRunError(f"Run at {path} is not sorted by user")
+                previous_user = user_id
+                yield user_id, shard, line
+
+
+    @staticmethod
+    def _stream_run_files(paths: list[pathlib.Path], output: str):
+        """
+        Helper function to merge TREC text shards sorted by user as a stream,
+        holding one line per shard in memory. Lines are merged on their user
+        id only, so each user's lines keep their order.
+
+        Args:
+            paths (list[pathlib.Path]): The shards of the run.
+            output (str): The merged run path.
+
+        Raises:
+            UnsortedRunError: If a shard is not sorted by user.
+            ValueError: If a user appears in several shards.
+        """
+        streams = [ShardMerger._user_lines(path, shard) for shard, path in enumerate(paths)]
+        merged = heapq.merge(*streams, key=operator.itemgetter(0))
+
+        previous_user, previous_shard = None, None
+        with AtomicWriter.open(output, "wb") as f:
+            for user_id, shard, line in merged:
+                if user_id == previous_user and shard != previous_shard:
+                    raise ValueError(
+                        f"User {user_id} appears in more than one shard, "
+                        "were the shards produced with the same N?"
+                    )
+                previous_user, previous_shard = user_id, shard
+                f.write(f"{line}\n".encode())
+
+
+    @staticmethod
+    def merge_run_files(paths: list[str], output: str, compression: Optional[str] = None):
+        """
+        Merges the shards of a single run. Runs keep their users in
+        ascending order, so each user's recommendations are placed in user
+        order while keeping their ranks. TREC text shards are streamed and
+        merged line by line without parsing their scores, so the merged file
+        is byte for byte what an unsharded command would write. Shards that
+        are not sorted by user, and RunStore outputs, are merged in memory.
+
+        Args:
+            paths (list[str]): The shards of the run.
+            output (str): The merged run path.
+            compression (str, optional): Compression to apply (gzip, xz or
+            zstd).
+        """
+        is_store = RunStore.is_store(str(output))
+        if not is_store:
+            output = Compression.with_compression(output, compression)
+            try:
+                ShardMerger._stream_run_files([pathlib.Path(path) for path in paths], output)
+                return
+            except UnsortedRunError as e:
+                logger.warning(f"{e}, merging the shards in memory instead")
+
+        if is_store:
+            dfs = [RunFile(str(path)).df for path in paths]
+        else:
+            dfs = [
+                pd.read_csv(
+                    path, sep=" ", header=None, dtype=str, compression="infer",
+                    keep_default_na=False,
+                )
+                for path in paths
+            ]
+        users = [df.iloc[:, 0].astype(np.int64) for df in dfs]
+        ShardMerger._check_disjoint(
+            pd.DataFrame({"user_id": pd.concat([u.drop_duplicates() for u in users])}),
+            ["user_id"],
+        )
+
+        order = np.argsort(np.concatenate(users), kind="stable")
+        df = pd.concat(dfs, ignore_index=True).take(order)
+        if is_store:
+            RunFile(df=df.reset_index(drop=True)).save(output, compression)
+            return
+
+        with AtomicWriter.open(output, "wb") as f:
+            f.write("".join(line + "\n" for line in df.agg(" ".join, axis=1)).encode())
+
+
+    @staticmethod
+    def merge_runs(shards: list[str], output: str, compression: Optional[str] = None):
+        """
+        Merges sharded runs into the runs an unsharded command would save.
+        Shards are either directories of runs (e.g. from `rerank_runs`),
+        merged by file name, or single run files (e.g. from `rrf`).
+
+        Args:
+            shards (list[str]): The output directory or file of every shard.
+            output (str): The merged output directory or file.
+            compression (str, optional): Compression to apply to each run
+            (gzip, xz or zstd).
+
+        Raises:
+            ValueError: If the shards are not all directories or all files.
+        """
+        shard_paths = [pathlib.Path(shard) for shard in shards]
+        if all(path.is_file() for path in shard_paths):
+            ShardMerger.merge_run_files(shard_paths, output, compression)
+            logger.info(f"Merged {len(shards)} shards into {output}")
+            return
+        if not all(path.is_dir() for path in shard_paths):
+            raise ValueError("Shards must be either all run directories or all run files")
+
+        names = sorted({
+            run.name for path in shard_paths for run in path.iterdir()
+            if run.is_file() and not AtomicWriter.is_temporary(run)
+        })
+        pathlib.Path(output).mkdir(parents=True, exist_ok=True)
+        for name in names:
+            paths = [path / name for path in shard_paths if (path / name).is_file()]
+            ShardMerger.merge_run_files(paths, f"{output}/{name}", compression)
+        logger.info(f"Merged {len(names)} runs from {len(shards)} shards into {output}")
+
+
+    @staticmethod
+    def merge_measures(shards: list[str], output: str, compression: Optional[str] = None):
+        """
+        Merges the per-user scores of sharded evaluations into the
+        MeasureFile an unsharded evaluation would save, recomputing the `all`
+        averages over the users of every shard.
+
+        Args:
+            shards (list[str]): The per-user scores file of every shard.
+            output (str): The merged MeasureFile path.
+            compression (str, optional): Compression to apply (gzip, xz or
+            zstd).
+        """
+        dfs = []
+        for shard in shards:
+            with Compression.open(shard, "rb") as f:
+                dfs.append(pd.read_csv(f, sep="\t", float_precision="round_trip"))
+        scores_df = pd.concat(dfs, ignore_index=True)
+        ShardMerger._check_disjoint(scores_df, ["algorithm", "measure", "user_id"])
+
+        scores_df = scores_df.sort_values(
+            by=["algorithm", "measure", "user_id"], ignore_index=True,
+        )
+        measured_runs = MeasureFile.from_scores(scores_df)
+        measured_runs.rearrange()
+        measured_runs.save(output, compression)
+        logger.info(f"Merged {len(shards)} shards into {output}")
@@ -0,0 +1,98 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class UserShard:
+    # Constants of the splitmix64 finalizer, which hashes user ids the same
+    # way on every machine and Python version.
+    _increment = np.uint64(0x9E3779B97F4A7C15)
+    _multipliers = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+    _shifts = (np.uint64(30), np.uint64(27), np.uint64(31))
+
+    def __init__(self, index: int, count: int):
+        """
+        Defines one of `count` disjoint shards of users, selected by a stable
+        hash of each user id, so a sweep can be split across processes or
+        machines and every user is processed by exactly one shard.
+
+        Args:
+            index (int): The shard index, from 0 to `count` - 1.
+            count (int): The number of shards.
+
+        Raises:
+            ValueError: If the index is outside the shards.
+        """
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index}/{count}, expected i/N with 0 <= i < N")
+        self.index = index
+        self.count = count
+
+
+    @classmethod
+    def parse(cls, shard: str) -> "UserShard":
+        """
+        Creates a UserShard from its command line form.
+
+        Args:
+            shard (str): The shard as "i/N" (e.g. "0/4").
+
+        Returns:
+            UserShard: The parsed shard.
+
+        Raises:
+            ValueError: If the shard is not of the form "i/N".
+        """
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", shard)
+        if match is None:
+            raise ValueError(f"Invalid shard {shard}, expected i/N with 0 <= i < N")
+        return cls(int(match.group(1)), int(match.group(2)))
+
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+    def contains(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Checks which users belong to the shard.
+
+        Args:
+            user_ids (np.ndarray): The user ids.
+
+        Returns:
+            np.ndarray: Whether each user belongs to the shard.
+        """
+        x = np.asarray(user_ids).astype(np.int64).view(np.uint64) + self._increment
+        x = (x ^ (x >> self._shifts[0])) * self._multipliers[0]
+        x = (x ^ (x >> self._shifts[1])) * self._multipliers[1]
+        x = x ^ (x >> self._shifts[2])
+        return x % np.uint64(self.count) == np.uint64(self.index)
+
+
+    def users(self, user_ids: set[int]) -> set[int]:
+        """
+        Selects the users that belong to the shard.
+
+        Args:
+            user_ids (set[int]): The users.
+
+        Returns:
+            set[int]: The users in the shard.
+        """
+        users = np.fromiter(user_ids, dtype=np.int64, count=len(user_ids))
+        return set(users[self.contains(users)].tolist())
+
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Selects the rows of users that belong to the shard.
+
+        Args:
+            df (pd.DataFrame): Rows with a user_id column.
+
+        Returns:
+            pd.DataFrame: The rows of users in the shard.
+        """
+        return df[self.contains(df["user_id"].to_numpy())].reset_index(drop=True)
@@ -0,0 +1,268 @@
+import logging
+import pathlib
+import re
+import sqlite3
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ..files.compression import Compression
+from ..files.measure_file import MeasureFile
+from ..files.quality_file import QualityFile
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsStore:
+    # Measure rows have no qrels, which is stored as an empty string so the
+    # unique index also applies to them.
+    extensions = [".db", ".sqlite"]
+    no_qrels = ""
+
+    def __init__(self, path: str):
+        """
+        Defines a local store of measure and quality scores backed by SQLite.
+        Every score is a row identified by its method (e.g. the tradeoff),
+        qrels, algorithm, measure and user, so any slice of results can be
+        queried through an index instead of reparsing result files.
+
+        Args:
+            path (str): The path to the database file.
+        """
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scores (
+                method TEXT NOT NULL,
+                qrels TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                measure TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                score REAL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS scores_key
+                ON scores (qrels, algorithm, measure, method, user_id);
+            CREATE INDEX IF NOT EXISTS scores_slice
+                ON scores (measure, user_id, qrels, method);
+        """)
+
+
+    @staticmethod
+    def is_store(path: str) -> bool:
+        """
+        Determines whether a path refers to a ResultsStore database.
+
+        Args:
+            path (str): The path to the file.
+
+        Returns:
+            bool: True if the path has a database extension.
+        """
+        return pathlib.Path(str(path)).suffix in ResultsStore.extensions
+
+
+    @staticmethod
+    def method_from_name(name: str) -> Optional[str]:
+        """
+        Decodes the method of a result file or run directory from the
+        tradeoff at the end of its name (e.g. metric_k_100_tradeoff_08.txt).
+
+        Args:
+            name (str): The file or directory name.
+
+        Returns:
+            str, optional: The method (e.g. 0.80 relevance), or None if the
+            name does not end with a tradeoff.
+        """
+        stem = Compression.strip(pathlib.Path(name).name)
+        stem = re.sub(r"\.txt$", "", stem)
+        match = re.search(r"[-_](\d{2,3})$", stem)
+        if match is None:
+            return None
+        str_num = match.group(1)
+        decimal = int(str_num) / (10 ** (len(str_num) - 1))
+        return f"{decimal:.2f} relevance"
+
+
+    def close(self):
+        """
+        Closes the connection to the database.
+        """
+        self.conn.close()
+
+
+    def _insert(self, df: pd.DataFrame, method: str, qrels: pd.Series) -> int:
+        """
+        Helper function to bulk insert score rows in a single transaction,
+        replacing any existing scores with the same key. Rows whose score is
+        not numeric (e.g. header rows) are skipped.
+
+        Args:
+            df (pd.DataFrame): Rows with algorithm, measure, user_id and score.
+            method (str): The method the scores belong to.
+            qrels (pd.Series): The qrels of each row.
+
+        Returns:
+            int: The number of rows inserted.
+        """
+        scores = pd.to_numeric(df["score"], errors="coerce")
+        if scores.dtype == np.float32:
+            # Widen through the shortest decimal form, which is what files show.
+            scores = scores.astype(str).astype(float)
+        valid = scores.notna()
+        rows = zip(
+            [method] * int(valid.sum()),
+            qrels[valid].astype(str),
+            df["algorithm"][valid].astype(str),
+            df["measure"][valid].astype(str),
+            df["user_id"][valid].astype(str),
+            scores[valid].astype(float),
+        )
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", rows,
+            )
+        return cursor.rowcount
+
+
+    def insert_measures(self, measure_file: MeasureFile, method: str) -> int:
+        """
+        Bulk inserts the scores of a MeasureFile.
+
+        Args:
+            measure_file (MeasureFile): The measured results.
+            method (str): The method the scores belong to.
+
+        Returns:
+            int: The number of rows inserted.
+        """
+        df = measure_file.to_df()
+        qrels = pd.Series(self.no_qrels, index=df.index)
+        return self._insert(df, method, qrels)
+
+
+    def insert_quality(self, quality_file: QualityFile, method: str) -> int:
+        """
+        Bulk inserts the scores of a QualityFile.
+
+        Args:
+            quality_file (QualityFile): The quality results.
+            method (str): The method the scores belong to.
+
+        Returns:
+            int: The number of rows inserted.
+        """
+        df = quality_file.to_df()
+        return self._insert(df, method, df["qrels"])
+
+
+    def import_tree(
+        self,
+        metric_dir: Optional[str] = None,
+        quality_dir: Optional[str] = None,
+    ):
+        """
+        Imports existing metric and quality files from their directories,
+        using the tradeoff at the end of each file name as its method.
+
+        Args:
+            metric_dir (str, optional): The directory of metric files.
+            quality_dir (str, optional): The directory of quality files.
+        """
+        sources = [(metric_dir, MeasureFile, self.insert_measures),
+                   (quality_dir, QualityFile, self.insert_quality)]
+        for directory, file_cls, insert in sources:
+            if directory is None:
+                continue
+            for path in sorted(pathlib.Path(directory).iterdir()):
+                method = self.method_from_name(path.name)
+                if method is None:
+                    logger.warning(f"Skipping {path} without a tradeoff in its name")
+                    continue
+                count = insert(file_cls(str(path)), method)
+                logger.info(f"Imported {count} scores from {path}")
+
+
+    def query(
+        self,
+        columns: Optional[list[str]] = None,
+        **filters: Union[str, list[str], None],
+    ) -> pd.DataFrame:
+        """
+        Queries a slice of scores. Each filter matches a single value or any
+        of a list of values.
+
+        Args:
+            columns (list[str], optional): The columns to return (default:
+            all columns).
+            **filters: Values to match for method, qrels, algorithm, measure
+            or user_id. Use `qrels=""` for measure scores.
+
+        Returns:
+            pd.DataFrame: The matching scores.
+
+        Raises:
+            ValueError: If a filter is not a column.
+        """
+        allowed = ["method", "qrels", "algorithm", "measure", "user_id", "score"]
+        columns = columns or allowed
+        for name in list(columns) + list(filters):
+            if name not in allowed:
+                raise ValueError(f"Invalid column: {name}")
+
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{name} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+        sql = f"SELECT {', '.join(columns)} FROM scores"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+
+    def results(
+        self,
+        qrels: str,
+        measure: str,
+        quality: str,
+        methods: Optional[list[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Pairs each algorithm's average measure and quality scores per method,
+        matching the contents of a ResultsFile.
+
+        Args:
+            qrels (str): The particular qrels to evaluate.
+            measure (str): The objective measure of interest.
+            quality (str): The quality measure of interest.
+            methods (list[str], optional): The methods to include (default:
+            all methods).
+
+        Returns:
+            pd.DataFrame: The algorithm, method, measure and quality columns.
+        """
+        sql = """
+            SELECT m.algorithm, m.method, m.score AS measure, q.score AS quality
+            FROM scores m
+            JOIN scores q
+                ON q.measure = ? AND q.user_id = 'all' AND q.qrels = ?
+                AND q.method = m.method AND q.algorithm = m.algorithm
+            WHERE m.measure = ? AND m.user_id = 'all' AND m.qrels = ?
+        """
+        params = [quality, qrels, measure, self.no_qrels]
+        if methods is not None:
+            sql += f" AND m.method IN ({', '.join('?' * len(methods))})"
+            params.extend(methods)
+        sql += " ORDER BY m.method, m.algorithm"
+
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        return df.rename(columns={"measure": measure, "quality": quality})
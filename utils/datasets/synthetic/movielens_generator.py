@@ -0,0 +1,471 @@
+import contextlib
+import json
+import logging
+import pathlib
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.datasets.files.atomic_writer import AtomicWriter
+
+
+logger = logging.getLogger(__name__)
+
+
+class MovieLensGenerator:
+    # Dataset sizes modelled on the MovieLens releases.
+    presets = {
+        "tiny": {"users": 200, "items": 1_000, "ratings": 10_000, "eval_users": 50},
+        "ml-100k": {"users": 943, "items": 1_682, "ratings": 100_000, "eval_users": 200},
+        "ml-1m": {"users": 6_040, "items": 3_706, "ratings": 1_000_209, "eval_users": 500},
+        "ml-10m": {"users": 69_878, "items": 10_677, "ratings": 10_000_054, "eval_users": 1_000},
+        "ml-32m": {"users": 200_948, "items": 87_585, "ratings": 32_000_204, "eval_users": 2_000},
+    }
+
+    # Genres and the share of items whose primary genre they are.
+    genres = {
+        "Drama": 0.22, "Comedy": 0.17, "Thriller": 0.07, "Romance": 0.07,
+        "Action": 0.07, "Horror": 0.06, "Documentary": 0.06, "Crime": 0.05,
+        "Adventure": 0.04, "Sci-Fi": 0.03, "Animation": 0.03, "Children": 0.03,
+        "Mystery": 0.02, "Fantasy": 0.02, "War": 0.02, "Western": 0.01,
+        "Musical": 0.01, "Film-Noir": 0.01,
+    }
+
+    # Share of each rating value across MovieLens ratings, from 0.5 to 5.
+    rating_shares = [0.016, 0.031, 0.017, 0.066, 0.052, 0.195, 0.130, 0.266, 0.083, 0.144]
+
+    # Rating timestamps span January 1995 to October 2023.
+    first_timestamp = 789_652_009
+    last_timestamp = 1_697_000_000
+
+    # Every user has at least this many ratings, as in MovieLens.
+    min_ratings = 20
+
+    def __init__(
+        self,
+        users: int,
+        items: int,
+        ratings: int,
+        eval_users: int,
+        runs: int = 3,
+        depth: int = 100,
+        judgments: int = 30,
+        seed: int = 0,
+        chunk_size: int = 2_000_000,
+    ):
+        """
+        Defines a generator of MovieLens-like datasets for load testing.
+        Item popularity follows a Zipf distribution, genres co-occur through
+        a fixed affinity between them, user activity follows a lognormal
+        distribution, and each user prefers one genre. Users are generated in
+        chunks of about `chunk_size` ratings that are written before the next
+        chunk is drawn, so memory stays bounded at any size.
+
+        Args:
+            users (int): The number of users.
+            items (int): The number of items.
+            ratings (int): The target number of ratings.
+            eval_users (int): The number of users with runs and judgments.
+            runs (int, optional): The number of TREC runs.
+            depth (int, optional): The number of recommendations per user in
+            each run.
+            judgments (int, optional): The number of judged items per user,
+            pooled from the top of the runs.
+            seed (int, optional): The random seed.
+            chunk_size (int, optional): The number of ratings per chunk.
+
+        Raises:
+            ValueError: If the sizes are inconsistent.
+        """
+        if users < 1 or items < 1:
+            raise ValueError("Users and items must be positive")
+        if ratings < users * self.min_ratings:
+            raise ValueError(f"Ratings must be at least {self.min_ratings} per user: {ratings}")
+        if ratings > users * items // 2:
+            raise ValueError(f"Ratings must fill at most half the rating matrix: {ratings}")
+        if not 0 < eval_users <= users:
+            raise ValueError(f"Eval users must be between 1 and {users}: {eval_users}")
+        if min(runs, depth, judgments) < 1:
+            raise ValueError("Runs, depth and judgments must be positive")
+
+        self.num_users = users
+        self.num_items = items
+        self.num_ratings = ratings
+        self.num_eval_users = eval_users
+        self.num_runs = runs
+        self.depth = min(depth, items // 2)
+        self.judgments = judgments
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+
+        # Each run favours popular items to a different degree, and draws a
+        # different share of its recommendations from the user's genre.
+        self.algorithms = [
+            {"name": f"Synthetic{i + 1}", "exponent": exponent, "preference": preference}
+            for i, (exponent, preference) in enumerate(zip(
+                np.linspace(1.0, 0.4, runs), np.linspace(0.3, 0.7, runs),
+            ))
+        ]
+        self._cdfs = {}
+
+
+    def _item_genres(self):
+        """
+        Helper function to assign each item a primary genre by genre share,
+        then up to four more genres drawn by their affinity with the primary
+        genre, storing item-genre membership as a boolean matrix.
+        """
+        num_genres = len(self.genres)
+        shares = np.array(list(self.genres.values()))
+        affinity = self.rng.gamma(0.4, size=(num_genres, num_genres))
+        affinity = (affinity + affinity.T) * shares
+        np.fill_diagonal(affinity, 0)
+        affinity_cdf = np.cumsum(affinity, axis=1)
+        affinity_cdf /= affinity_cdf[:, -1:]
+
+        primary = self.rng.choice(num_genres, size=self.num_items, p=shares / shares.sum())
+        self.membership = np.zeros((self.num_items, num_genres), dtype=bool)
+        self.membership[np.arange(self.num_items), primary] = True
+        extra = np.minimum(self.rng.poisson(0.8, size=self.num_items), 4)
+        for slot in range(1, extra.max(initial=0) + 1):
+            has_slot = np.flatnonzero(extra >= slot)
+            draws = self.rng.random(len(has_slot))[:, None]
+            secondary = (draws < affinity_cdf[primary[has_slot]]).argmax(axis=1)
+            self.membership[has_slot, secondary] = True
+
+
+    def _users(self):
+        """
+        Helper function to draw each user's number of ratings, preferred
+        genre and the share of their ratings within it, and the users with
+        runs and judgments.
+        """
+        activity = self.rng.lognormal(0, 1.2, size=self.num_users)
+        extra = self.num_ratings - self.min_ratings * self.num_users
+        self.counts = self.min_ratings + self.rng.multinomial(extra, activity / activity.sum())
+
+        # Ratings beyond half the catalogue are moved to other users.
+        cap = self.num_items // 2
+        for _ in range(3):
+            excess = np.maximum(self.counts - cap, 0).sum()
+            if excess == 0:
+                break
+            self.counts = np.minimum(self.counts, cap)
+            weights = activity * (self.counts < cap)
+            self.counts += self.rng.multinomial(excess, weights / weights.sum())
+        self.counts = np.minimum(self.counts, cap)
+
+        shares = np.array(list(self.genres.values()))
+        self.favorites = self.rng.choice(len(shares), size=self.num_users, p=shares / shares.sum())
+        self.preferences = self.rng.beta(2, 3, size=self.num_users)
+
+        self.is_eval = np.zeros(self.num_users, dtype=bool)
+        self.is_eval[self.rng.choice(self.num_users, size=self.num_eval_users, replace=False)] = True
+
+        # Each item is rated at least once, by a user drawn by activity, so
+        # every recommended item has a defined rarity.
+        self.coverage = self.rng.choice(self.num_users, size=self.num_items, p=self.counts / self.counts.sum())
+        self.counts = np.maximum(self.counts, np.bincount(self.coverage, minlength=self.num_users))
+
+
+    def _cdf(self, exponent: float) -> tuple[np.ndarray, list[tuple]]:
+        """
+        Helper function to build the cumulative distributions for drawing
+        items by popularity raised to `exponent`, over all items and over the
+        items of each genre.
+
+        Args:
+            exponent (float): The popularity exponent, where 0 is uniform.
+
+        Returns:
+            tuple[np.ndarray, list[tuple]]: The distribution over all items,
+            and the items and distribution of each genre.
+        """
+        if exponent not in self._cdfs:
+            weights = self.popularity ** exponent
+            by_genre = []
+            for genre in range(self.membership.shape[1]):
+                items = np.flatnonzero(self.membership[:, genre])
+                cdf = np.cumsum(weights[items])
+                by_genre.append((items, cdf / cdf[-1] if len(cdf) else cdf))
+            cdf = np.cumsum(weights)
+            self._cdfs[exponent] = (cdf / cdf[-1], by_genre)
+        return self._cdfs[exponent]
+
+
+    def _draw(self, users: np.ndarray, exponent: float, preferences: np.ndarray) -> np.ndarray:
+        """
+        Helper function to draw one item per entry of `users`, from the
+        user's preferred genre with probability `preferences`, otherwise
+        from all items.
+
+        Args:
+            users (np.ndarray): The users to draw for, with repeats.
+            exponent (float): The popularity exponent.
+            preferences (np.ndarray): The probability of drawing from the
+            preferred genre, per user.
+
+        Returns:
+            np.ndarray: The drawn items.
+        """
+        cdf, by_genre = self._cdf(exponent)
+        draws = self.rng.random(len(users))
+        items = np.minimum(np.searchsorted(cdf, draws, side="right"), self.num_items - 1)
+
+        favorites = np.where(self.rng.random(len(users)) < preferences[users], self.favorites[users], -1)
+        for genre, (genre_items, genre_cdf) in enumerate(by_genre):
+            mask = favorites == genre
+            if len(genre_items) and mask.any():
+                positions = np.searchsorted(genre_cdf, draws[mask], side="right")
+                items[mask] = genre_items[np.minimum(positions, len(genre_items) - 1)]
+        return items
+
+
+    def _draw_distinct(
+        self,
+        users: np.ndarray,
+        counts: np.ndarray,
+        exponent: float,
+        preferences: np.ndarray,
+        initial: Optional[tuple] = None,
+        excluded: Optional[np.ndarray] = None,
+        rounds: int = 12,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Helper function to draw `counts` distinct items per user, drawing
+        with replacement and discarding repeats in rounds until every user
+        has enough. After the first few rounds items are drawn uniformly, so
+        very active users fill up quickly.
+
+        Args:
+            users (np.ndarray): The distinct users.
+            counts (np.ndarray): The number of items per user.
+            exponent (float): The popularity exponent.
+            preferences (np.ndarray): The probability of drawing from the
+            preferred genre, per user.
+            initial (tuple, optional): Users and items already drawn.
+            excluded (np.ndarray, optional): Sorted keys (user * items + item)
+            of pairs that must not be drawn.
+            rounds (int, optional): The maximum number of rounds.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The user and item of each draw,
+            in the order drawn.
+        """
+        drawn_users, drawn_items = initial or (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        deficit = counts - np.bincount(drawn_users, minlength=self.num_users)[users]
+        uniform = np.zeros(self.num_users)
+
+        for i in range(rounds):
+            if deficit.max(initial=0) <= 0:
+                break
+            deficit = np.maximum(deficit, 0)
+            new_users = np.repeat(users, np.ceil(deficit * 1.2).astype(np.int64) + (deficit > 0))
+            weighted = i < 4
+            new_items = self._draw(
+                new_users, exponent if weighted else 0.0, preferences if weighted else uniform,
+            )
+
+            drawn_users = np.concatenate([drawn_users, new_users])
+            drawn_items = np.concatenate([drawn_items, new_items])
+            keys = drawn_users * self.num_items + drawn_items
+            keep = ~pd.Series(keys).duplicated().to_numpy()
+            if excluded is not None:
+                keep &= ~np.isin(keys, excluded, assume_unique=False)
+            drawn_users, drawn_items = drawn_users[keep], drawn_items[keep]
+
+            position = pd.Series(drawn_users).groupby(drawn_users).cumcount().to_numpy()
+            limits = np.zeros(self.num_users, dtype=np.int64)
+            limits[users] = counts
+            keep = position < limits[drawn_users]
+            drawn_users, drawn_items = drawn_users[keep], drawn_items[keep]
+            deficit = counts - np.bincount(drawn_users, minlength=self.num_users)[users]
+        return drawn_users, drawn_items
+
+
+    def _ratings(self, users: np.ndarray) -> pd.DataFrame:
+        """
+        Helper function to draw the ratings of a chunk of users, sorted by
+        user and movie as in MovieLens.
+
+        Args:
+            users (np.ndarray): The users of the chunk.
+
+        Returns:
+            pd.DataFrame: The ratings, with 0-based user and item indexes.
+        """
+        covered = np.flatnonzero(np.isin(self.coverage, users))
+        rating_users, items = self._draw_distinct(
+            users, self.counts[users], 1.0, self.preferences,
+            initial=(self.coverage[covered], covered),
+        )
+
+        # Ratings follow the MovieLens distribution, shifted by a bias per
+        # user and half a star up for items of their preferred genre.
+        base = self.rng.choice(len(self.rating_shares), size=len(items), p=self.rating_shares)
+        bias = np.round(self.rng.normal(-0.4, 0.6, size=self.num_users))[rating_users]
+        liked = self.membership[items, self.favorites[rating_users]]
+        values = (np.clip(base + bias + liked, 0, 9) + 1) / 2
+
+        start = self.rng.uniform(self.first_timestamp, self.last_timestamp, size=self.num_users)
+        span = self.rng.lognormal(17, 1.5, size=self.num_users)
+        timestamps = np.minimum(
+            start[rating_users] + self.rng.random(len(items)) * span[rating_users],
+            self.last_timestamp,
+        ).astype(np.int64)
+
+        df = pd.DataFrame({
+            "user": rating_users, "item": items, "rating": values, "timestamp": timestamps,
+        })
+        return df.sort_values(["user", "item"], ignore_index=True)
+
+
+    def _runs(self, users: np.ndarray, ratings: pd.DataFrame) -> list[pd.DataFrame]:
+        """
+        Helper function to draw each run's recommendations for a chunk of
+        users, excluding the items they rated and ranking items of their
+        preferred genre higher.
+
+        Args:
+            users (np.ndarray): The users with runs in the chunk.
+            ratings (pd.DataFrame): The ratings of the chunk.
+
+        Returns:
+            list[pd.DataFrame]: The recommendations of each run.
+        """
+        rated = ratings[np.isin(ratings["user"], users)]
+        excluded = np.sort(rated["user"].to_numpy() * self.num_items + rated["item"].to_numpy())
+        counts = np.full(len(users), self.depth)
+
+        runs = []
+        for algorithm in self.algorithms:
+            preferences = np.full(self.num_users, algorithm["preference"])
+            run_users, items = self._draw_distinct(
+                users, counts, algorithm["exponent"], preferences, excluded=excluded,
+            )
+            liked = self.membership[items, self.favorites[run_users]]
+            scores = self.rng.random(len(items)) * 0.5 + liked * 0.5
+            order = np.lexsort((-scores, run_users))
+            run_users, items, scores = run_users[order], items[order], scores[order]
+            ranks = pd.Series(run_users).groupby(run_users).cumcount().to_numpy() + 1
+            runs.append(pd.DataFrame({
+                "user": run_users, "item": items, "rank": ranks, "score": scores,
+            }))
+        return runs
+
+
+    def _qrels(self, runs: list[pd.DataFrame], pool_depth: int = 20) -> pd.DataFrame:
+        """
+        Helper function to judge items pooled from the top of every run, as
+        in TREC. Items of the user's preferred genre are more likely to be
+        of interest.
+
+        Args:
+            runs (list[pd.DataFrame]): The recommendations of each run.
+            pool_depth (int, optional): The depth of each run that is pooled.
+
+        Returns:
+            pd.DataFrame: The user, item and grade (0-2) of each judgment.
+        """
+        pool = pd.concat([run[run["rank"] <= pool_depth][["user", "item"]] for run in runs])
+        pool = pool.drop_duplicates(ignore_index=True)
+        pool = pool.iloc[self.rng.permutation(len(pool))]
+        pool = pool[pool.groupby("user").cumcount() < self.judgments]
+        pool = pool.sort_values(["user", "item"], ignore_index=True)
+
+        liked = self.membership[pool["item"].to_numpy(), self.favorites[pool["user"].to_numpy()]]
+        draws = self.rng.random(len(pool))
+        pool["grade"] = np.where(
+            liked,
+            (draws > 0.2).astype(int) + (draws > 0.55),
+            (draws > 0.5).astype(int) + (draws > 0.85),
+        )
+        return pool
+
+
+    def generate(self, output_dir: str) -> dict:
+        """
+        Generates the dataset, writing `ratings.csv`, `movie_mappings.json`,
+        `user_ids.txt`, `interest.qrels` and a `runs` directory with one
+        `.results` file per run. User and movie ids start at 1.
+
+        Args:
+            output_dir (str): The output directory.
+
+        Returns:
+            dict: The number of users, items, ratings, judgments and
+            recommendations generated.
+        """
+        start = time.perf_counter()
+        output_dir = pathlib.Path(output_dir)
+        self._item_genres()
+        self._users()
+        # Popularity ranks are shuffled so ids do not reveal popularity.
+        self.popularity = 1 / (self.rng.permutation(self.num_items) + 1.0)
+
+        genre_names = np.array(list(self.genres))
+        with AtomicWriter.open(str(output_dir / "movie_mappings.json"), "w") as f:
+            json.dump({
+                str(item + 1): {"genres": genre_names[self.membership[item]].tolist()}
+                for item in range(self.num_items)
+            }, f)
+        with AtomicWriter.open(str(output_dir / "user_ids.txt"), "w") as f:
+            f.writelines(f"{user + 1}\n" for user in np.flatnonzero(self.is_eval))
+
+        totals = {"users": self.num_users, "items": self.num_items, "ratings": 0, "judgments": 0, "recommendations": 0}
+        boundaries = np.searchsorted(
+            np.cumsum(self.counts), np.arange(self.chunk_size, self.counts.sum(), self.chunk_size),
+        )
+        chunks = [
+            chunk for chunk in np.split(np.arange(self.num_users), np.unique(boundaries) + 1)
+            if len(chunk)
+        ]
+
+        with contextlib.ExitStack() as stack:
+            ratings_file = stack.enter_context(AtomicWriter.open(str(output_dir / "ratings.csv"), "w"))
+            qrels_file = stack.enter_context(AtomicWriter.open(str(output_dir / "interest.qrels"), "w"))
+            run_files = [
+                stack.enter_context(AtomicWriter.open(str(output_dir / "runs" / f"{a['name']}.results"), "w"))
+                for a in self.algorithms
+            ]
+            ratings_file.write("userId,movieId,rating,timestamp\n")
+
+            for i, users in enumerate(chunks):
+                ratings = self._ratings(users)
+                ratings.assign(user=ratings["user"] + 1, item=ratings["item"] + 1).to_csv(
+                    ratings_file, header=False, index=False,
+                )
+                totals["ratings"] += len(ratings)
+
+                eval_users = users[self.is_eval[users]]
+                if len(eval_users):
+                    runs = self._runs(eval_users, ratings)
+                    for algorithm, run, f in zip(self.algorithms, runs, run_files):
+                        pd.DataFrame({
+                            "user_id": run["user"] + 1,
+                            "q0": "Q0",
+                            "movie_id": run["item"] + 1,
+                            "rank": run["rank"],
+                            "score": run["score"],
+                            "algorithm": algorithm["name"],
+                        }).to_csv(f, sep=" ", header=False, index=False)
+                        totals["recommendations"] += len(run)
+
+                    qrels = self._qrels(runs)
+                    pd.DataFrame({
+                        "user_id": qrels["user"] + 1,
+                        "iteration": 0,
+                        "movie_id": qrels["item"] + 1,
+                        "relevance": qrels["grade"],
+                    }).to_csv(qrels_file, sep=" ", header=False, index=False)
+                    totals["judgments"] += len(qrels)
+
+                logger.info(
+                    f"Chunk {i + 1}/{len(chunks)}: {totals['ratings']:,} ratings "
+                    f"after {time.perf_counter() - start:.1f}s"
+                )
+
+        logger.info(f"Generated {totals} in {output_dir} in {time.perf_counter() - start:.1f}s")
+        return totals
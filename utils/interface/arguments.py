@@ -1,11 +1,16 @@
 import argparse
 
+from .profiler import Profiler
+
 
 class Arguments:
     def __init__(self, fields: dict):
         """
         Generate custom commandline arguments based on the provided dictionary
-        of fields for running scripts.
+        of fields for running scripts. Arguments are required unless a field
+        sets `"required": False`, in which case its `"default"` is used.
+        Fields of type bool are optional flags. Every script also accepts
+        `--profile` to write a profiling report.
 
         Args:
             fields (dict): A dictionary of arguments.
@@ -16,10 +21,28 @@ class Arguments:
             formatter_class=argparse.RawTextHelpFormatter,
         )
         for arg in fields["args"]:
+            if arg["type"] is bool:
+                parser.add_argument(arg["name"], action="store_true", help=arg["description"])
+                continue
             parser.add_argument(
                 arg["name"],
                 type=arg["type"],
-                required=True,
+                required=arg.get("required", True),
+                default=arg.get("default"),
+                choices=arg.get("choices"),
                 help=arg["description"],
             )
+        parser.add_argument(
+            "--profile",
+            type=str,
+            help="Write a JSON report of stage times, peak memory, hot-path calls and cache hit rates to this file",
+        )
+        parser.add_argument(
+            "--profile_stages",
+            action="store_true",
+            help="With --profile, also save a cProfile dump of each stage next to the report",
+        )
         self.args = parser.parse_args()
+
+        if self.args.profile:
+            Profiler.enable(self.args.profile, self.args.profile_stages)
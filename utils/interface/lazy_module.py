@@ -0,0 +1,40 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        """
+        Defines a placeholder for a module that is only imported once one of
+        its attributes is first used, so heavy dependencies (e.g. scipy or
+        matplotlib) do not slow down the startup of scripts that never reach
+        them. After the first use, attributes are read from the real module.
+
+        Args:
+            name (str): The full name of the module (e.g. scipy.stats).
+        """
+        super().__init__(name)
+        self._module = None
+
+
+    def _load(self) -> types.ModuleType:
+        """
+        Helper function to import the module on first use.
+
+        Returns:
+            types.ModuleType: The imported module.
+        """
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        # Cache on the placeholder so later lookups skip __getattr__.
+        setattr(self, attr, value)
+        return value
+
+
+    def __dir__(self) -> list[str]:
+        return dir(self._load())
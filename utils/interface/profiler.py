@@ -0,0 +1,276 @@
+import atexit
+import collections
+import contextlib
+import cProfile
+import functools
+import importlib
+import json
+import logging
+import pathlib
+import resource
+import threading
+import time
+from typing import Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    # Functions whose calls are counted while profiling, wrapped only once
+    # profiling is enabled so they cost nothing otherwise.
+    hot_paths = [
+        "utils.objectives.distance.Distance.by_tags",
+        "utils.objectives.distance.Distance.by_rarity",
+        "utils.objectives.distance.Distance.by_surprise",
+    ]
+
+    enabled = False
+    report_path = None
+    profile_stages = False
+
+    _start = None
+    _stack = []
+    _stages = {}
+    _counters = collections.Counter()
+    _caches = []
+    _profiles = {}
+
+    # Peak memory of the whole process, tracked here because the kernel's
+    # peak is reset at the start of every stage where Linux allows it.
+    _process_peak_mb = 0.0
+    _status_path = pathlib.Path("/proc/self/status")
+    _clear_refs_path = pathlib.Path("/proc/self/clear_refs")
+
+    @staticmethod
+    def enable(report_path: str, profile_stages: bool = False):
+        """
+        Starts recording stage timings, peak memory, hot-path call counts and
+        cache hit rates, writing a JSON report to `report_path` on exit. Only
+        the main process is recorded, so hot-path calls made in worker
+        processes are not counted.
+
+        Args:
+            report_path (str): The path of the JSON report.
+            profile_stages (bool, optional): Also run cProfile within each
+            top-level stage, dumping one profile per stage next to the report.
+        """
+        if Profiler.enabled:
+            return
+        Profiler.enabled = True
+        Profiler.report_path = report_path
+        Profiler.profile_stages = profile_stages
+        Profiler._start = time.perf_counter()
+
+        for hot_path in Profiler.hot_paths:
+            module_name, cls_name, attr = hot_path.rsplit(".", 2)
+            cls = getattr(importlib.import_module(module_name), cls_name)
+            setattr(cls, attr, Profiler._counted(getattr(cls, attr), f"{cls_name}.{attr}"))
+
+        atexit.register(Profiler.write)
+
+
+    @staticmethod
+    def _counted(fn, name: str):
+        """
+        Helper function to wrap a function so its calls are counted.
+
+        Args:
+            fn (callable): The function to wrap.
+            name (str): The counter name.
+
+        Returns:
+            callable: The wrapped function.
+        """
+        counters = Profiler._counters
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            counters[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+
+    @staticmethod
+    def _peak_rss_mb() -> float:
+        """
+        Helper function to get the peak resident memory of the process since
+        it was last reset. Without /proc, this is the peak over the lifetime
+        of the process.
+
+        Returns:
+            float: The peak resident memory in MB.
+        """
+        try:
+            for line in Profiler._status_path.read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+    @staticmethod
+    def _reset_peak_rss():
+        """
+        Helper function to reset the peak resident memory to the current
+        resident memory, which is only possible on Linux. Elsewhere the peak
+        is never reset, so stages report the process peak so far.
+        """
+        try:
+            Profiler._clear_refs_path.write_text("5")
+        except OSError:
+            pass
+
+
+    @staticmethod
+    def _track_peak_rss() -> float:
+        """
+        Helper function to fold the peak since the last reset into every
+        running stage and into the process peak.
+
+        Returns:
+            float: The peak resident memory of the process in MB.
+        """
+        peak = Profiler._peak_rss_mb()
+        for frame in Profiler._stack:
+            frame[3] = max(frame[3], peak)
+        Profiler._process_peak_mb = max(Profiler._process_peak_mb, peak)
+        return Profiler._process_peak_mb
+
+
+    @staticmethod
+    @contextlib.contextmanager
+    def stage(name: str) -> Iterator[None]:
+        """
+        Records the wall time and peak memory of a stage (e.g. load, rerank
+        or save). Can be used as a context manager or a decorator. Time spent
+        in nested stages is attributed to them, not to the enclosing stage,
+        and re-entering a stage that is already running has no effect. Only
+        the main thread is recorded, so work on worker threads counts towards
+        the stage that started them.
+
+        On Linux, the peak memory is reset when a stage starts, so each stage
+        reports its own peak (including its nested stages). Elsewhere the
+        peak can not be reset and a stage reports the process peak so far.
+
+        Args:
+            name (str): The stage name.
+        """
+        if (
+            not Profiler.enabled
+            or threading.current_thread() is not threading.main_thread()
+            or any(frame[0] == name for frame in Profiler._stack)
+        ):
+            yield
+            return
+
+        profile = None
+        if Profiler.profile_stages and not Profiler._stack:
+            profile = Profiler._profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+
+        # Frames hold the name, start time, time in nested stages and peak.
+        frame = [name, time.perf_counter(), 0.0, 0.0]
+        rss_before = Profiler._track_peak_rss()
+        Profiler._reset_peak_rss()
+        Profiler._stack.append(frame)
+        try:
+            yield
+        finally:
+            rss_after = Profiler._track_peak_rss()
+            Profiler._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            if profile is not None:
+                profile.disable()
+            if Profiler._stack:
+                Profiler._stack[-1][2] += elapsed
+
+            stats = Profiler._stages.setdefault(name, {
+                "calls": 0,
+                "seconds": 0.0,
+                "peak_rss_mb": 0.0,
+                "rss_growth_mb": 0.0,
+            })
+            stats["calls"] += 1
+            stats["seconds"] += elapsed - frame[2]
+            stats["peak_rss_mb"] = max(stats["peak_rss_mb"], frame[3])
+            stats["rss_growth_mb"] += rss_after - rss_before
+
+
+    @staticmethod
+    def count(name: str, n: int = 1):
+        """
+        Increments a hot-path counter.
+
+        Args:
+            name (str): The counter name.
+            n (int, optional): The amount to add.
+        """
+        if Profiler.enabled:
+            Profiler._counters[name] += n
+
+
+    @staticmethod
+    def register_cache(name: str, cache):
+        """
+        Includes the hit rate of a cache in the report. The cache must have
+        `hits` and `misses` attributes.
+
+        Args:
+            name (str): The cache name.
+            cache (object): The cache.
+        """
+        if Profiler.enabled:
+            Profiler._caches.append((name, cache))
+
+
+    @staticmethod
+    def report() -> dict:
+        """
+        Summarizes everything recorded so far.
+
+        Returns:
+            dict: The total time and peak memory, and the stages, hot-path
+            counters and caches.
+        """
+        caches = []
+        for name, cache in Profiler._caches:
+            lookups = cache.hits + cache.misses
+            caches.append({
+                "name": name,
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "hit_rate": cache.hits / lookups if lookups > 0 else None,
+            })
+
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        return {
+            "seconds": time.perf_counter() - Profiler._start,
+            "peak_rss_mb": Profiler._track_peak_rss(),
+            "peak_child_rss_mb": children,
+            "stages": Profiler._stages,
+            "counters": dict(Profiler._counters),
+            "caches": caches,
+        }
+
+
+    @staticmethod
+    def write(path: Optional[str] = None):
+        """
+        Writes the JSON report, and a cProfile dump per stage if enabled.
+
+        Args:
+            path (str, optional): The report path (default: the path given
+            when profiling was enabled).
+        """
+        if not Profiler.enabled:
+            return
+        path = pathlib.Path(path or Profiler.report_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(Profiler.report(), f, indent=2)
+
+        for name, profile in Profiler._profiles.items():
+            profile.dump_stats(path.with_name(f"{path.stem}.{name}.prof"))
+        logger.info(f"Saved profile to {path}")
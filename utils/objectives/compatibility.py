@@ -0,0 +1,104 @@
+import numpy as np
+
+
+class Compatibility:
+    def __init__(
+        self,
+        judgments: dict[int, dict[int, float]],
+        persistence: float = 0.95,
+        depth: int = 1000,
+    ):
+        """
+        Defines the compatibility measure (Clarke et al., 2020) for a set of
+        relevance judgments. Compatibility is the rank-biased overlap between
+        a ranking and the ideal ranking implied by the judgments, normalized
+        by the overlap of the ideal ranking with itself. This follows the
+        reference implementation used by `calculate_compatibility.sh`.
+
+        Args:
+            judgments (dict[int, dict[int, float]]): A mapping of users to
+            their judged items and relevance grades.
+            persistence (float, optional): The RBO persistence parameter.
+            depth (int, optional): The cutoff point for the number of items.
+        """
+        self.persistence = persistence
+        self.depth = depth
+
+        # Only items with a positive grade are part of the ideal ranking,
+        # kept in judgment order to break ties deterministically.
+        self.ideals = {}
+        for user_id, grades in judgments.items():
+            items = [item for item, grade in grades.items() if grade > 0]
+            self.ideals[user_id] = (
+                np.array(items, dtype=np.int64),
+                np.array([grades[item] for item in items], dtype=np.float64),
+            )
+
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the measure, matching `calculate_compatibility.sh`.
+
+        Returns:
+            str: The measure name (e.g. compatibility-95).
+        """
+        return f"compatibility-{round(self.persistence * 100)}"
+
+
+    def _rbo(self, run_pos: np.ndarray, ideal_pos: np.ndarray, depth: int) -> float:
+        """
+        Calculates unnormalized rank-biased overlap from the positions of the
+        shared items. An item shared by both rankings contributes to the
+        overlap at every depth beyond its position in both rankings.
+
+        Args:
+            run_pos (np.ndarray): 0-based positions of shared items in the run.
+            ideal_pos (np.ndarray): 0-based positions of the same items in the
+            ideal ranking.
+            depth (int): The depth to evaluate to.
+
+        Returns:
+            float: The rank-biased overlap.
+        """
+        joined = np.maximum(run_pos, ideal_pos)
+        overlap = np.cumsum(np.bincount(joined, minlength=depth)[:depth])
+        ranks = np.arange(1, depth + 1)
+        weights = self.persistence ** (ranks - 1)
+        return float(np.sum(weights * overlap / ranks))
+
+
+    def score(self, user_id: int, recs: list[int]) -> float:
+        """
+        Calculates the compatibility of a user's ranked recommendations.
+
+        Args:
+            user_id (int): The user.
+            recs (list[int]): The ranked recommendations.
+
+        Returns:
+            float: The compatibility score.
+        """
+        if user_id not in self.ideals or len(self.ideals[user_id][0]) == 0:
+            return 0.0
+        ideal, grades = self.ideals[user_id]
+
+        run = np.asarray(recs, dtype=np.int64)[:self.depth]
+        run_rank = {item: i for i, item in enumerate(run.tolist())}
+
+        # Order ties in the ideal ranking by their position in the run, so the
+        # run is compared against the ideal ranking it is closest to.
+        tie_rank = np.array(
+            [run_rank.get(item, len(run)) for item in ideal.tolist()],
+        )
+        ideal = ideal[np.lexsort((np.arange(len(ideal)), tie_rank, -grades))]
+        depth = max(len(run), len(ideal))
+
+        ideal_rank = {item: i for i, item in enumerate(ideal.tolist())}
+        shared = [item for item in run.tolist() if item in ideal_rank]
+        run_pos = np.array([run_rank[item] for item in shared], dtype=np.int64)
+        ideal_pos = np.array([ideal_rank[item] for item in shared], dtype=np.int64)
+
+        all_pos = np.arange(len(ideal), dtype=np.int64)
+        best = self._rbo(all_pos, all_pos, depth)
+        return self._rbo(run_pos, ideal_pos, depth) / best
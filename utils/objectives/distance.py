@@ -1,3 +1,4 @@
+import hashlib
 import math
 import statistics
 
@@ -23,6 +24,65 @@ class Distance:
         self.tags = tags
         self.user_ratings = user_ratings
         self.num_users = num_users
+        self._fingerprint = None
+
+
+    def fingerprint(self) -> str:
+        """
+        Hashes every input that affects the distances, so results computed
+        with this Distance can be cached. Only the number of users who rated
+        each item matters for rarity, so those counts are hashed instead of
+        the users themselves. The hash is computed once and reused.
+
+        Returns:
+            str: The hexadecimal hash of the distance inputs.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(f"{self.num_users}".encode())
+            for item in sorted(self.rated):
+                digest.update(f"r{item}:{len(self.rated[item])}".encode())
+            for item in sorted(self.tags):
+                digest.update(f"t{item}:{sorted(self.tags[item])}".encode())
+            for user_id in sorted(self.user_ratings):
+                digest.update(f"u{user_id}:{sorted(self.user_ratings[user_id])}".encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+
+    def apply_ratings(
+        self, user_ids: list[int], movie_ids: list[int],
+    ) -> tuple[set[int], set[int], bool]:
+        """
+        Appends new ratings in-place, updating item popularity, user histories
+        and the number of users as if the distances were rebuilt from the
+        combined ratings. Requires the user histories, since they identify
+        new users.
+
+        Args:
+            user_ids (list[int]): The user of each new rating.
+            movie_ids (list[int]): The item of each new rating.
+
+        Returns:
+            tuple[set[int], set[int], bool]: The items whose popularity
+            changed, the users whose history changed, and whether the number
+            of users changed.
+        """
+        changed_items, changed_users = set(), set()
+        num_users = self.num_users
+        for user_id, item in zip(user_ids, movie_ids):
+            if user_id not in self.user_ratings:
+                self.user_ratings[user_id] = []
+                num_users += 1
+            self.user_ratings[user_id].append(item)
+            self.rated.setdefault(item, []).append(user_id)
+            changed_items.add(item)
+            changed_users.add(user_id)
+
+        num_users_changed = num_users != self.num_users
+        self.num_users = num_users
+        self._fingerprint = None
+        return changed_items, changed_users, num_users_changed
 
 
     @staticmethod
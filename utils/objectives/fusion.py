@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+
+from utils.interface.lazy_module import LazyModule
+
+
+sparse = LazyModule("scipy.sparse")
+
+
+class Fusion:
+    # Supported fusion methods and the default RRF constant.
+    methods = ["rrf", "combsum", "combmnz", "borda"]
+    rrf_constant = 60
+
+    def __init__(self, runs: list[pd.DataFrame]):
+        """
+        Initializes a fusion engine over a set of runs. All runs are loaded
+        once into a sparse matrix of candidates (user-movie pairs) by runs,
+        holding the rank each run gave each candidate, so any number of
+        fusion configurations can be computed from the same data.
+
+        Args:
+            runs (list[pd.DataFrame]): Run data containing the RunFile
+            user_id, movie_id, rank and score columns.
+
+        Raises:
+            ValueError: If no runs are provided.
+        """
+        if len(runs) == 0:
+            raise ValueError("At least one run is required for fusion")
+        self.num_runs = len(runs)
+
+        run_idx = np.concatenate([np.full(len(df), i) for i, df in enumerate(runs)])
+        users = np.concatenate([df["user_id"].to_numpy(dtype=np.int64) for df in runs])
+        movies = np.concatenate([df["movie_id"].to_numpy(dtype=np.int64) for df in runs])
+        ranks = np.concatenate([df["rank"].to_numpy(dtype=np.float64) for df in runs])
+        scores = np.concatenate([df["score"].to_numpy(dtype=np.float64) for df in runs])
+
+        # Candidates are ordered by user and then movie.
+        pairs, candidate_idx = np.unique(
+            np.stack([users, movies], axis=1), axis=0, return_inverse=True,
+        )
+        candidate_idx = candidate_idx.ravel()
+        self.users = pairs[:, 0]
+        self.movies = pairs[:, 1]
+
+        self._ranks = self._matrix(ranks, candidate_idx, run_idx)
+        self._normalized = self._matrix(
+            self._min_max(scores, users, run_idx), candidate_idx, run_idx,
+        )
+        self._borda = self._matrix(
+            self._list_lengths(users, run_idx) - ranks + 1, candidate_idx, run_idx,
+        )
+
+
+    def _matrix(
+        self, data: np.ndarray, candidate_idx: np.ndarray, run_idx: np.ndarray,
+    ) -> "sparse.csr_matrix":
+        """
+        Helper function to build a sparse candidates by runs matrix.
+
+        Args:
+            data (np.ndarray): The value of each recommendation.
+            candidate_idx (np.ndarray): The candidate of each recommendation.
+            run_idx (np.ndarray): The run of each recommendation.
+
+        Returns:
+            scipy.sparse.csr_matrix: The values arranged by candidate and run.
+        """
+        return sparse.csr_matrix(
+            (data, (candidate_idx, run_idx)),
+            shape=(len(self.users), self.num_runs),
+        )
+
+
+    @staticmethod
+    def _segments(users: np.ndarray, run_idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Helper function to group recommendations into per-user, per-run lists.
+
+        Args:
+            users (np.ndarray): The user of each recommendation.
+            run_idx (np.ndarray): The run of each recommendation.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The order that makes each list
+            contiguous, and the list of each recommendation in that order.
+        """
+        order = np.lexsort((users, run_idx))
+        keys = np.stack([run_idx[order], users[order]], axis=1)
+        change = np.any(keys[1:] != keys[:-1], axis=1)
+        segment = np.concatenate(([0], np.cumsum(change)))
+        return order, segment
+
+
+    @staticmethod
+    def _min_max(scores: np.ndarray, users: np.ndarray, run_idx: np.ndarray) -> np.ndarray:
+        """
+        Helper function to min-max normalize scores within each user's list
+        from each run. Lists where all scores are equal normalize to 1.
+
+        Args:
+            scores (np.ndarray): The score of each recommendation.
+            users (np.ndarray): The user of each recommendation.
+            run_idx (np.ndarray): The run of each recommendation.
+
+        Returns:
+            np.ndarray: The normalized score of each recommendation.
+        """
+        order, segment = Fusion._segments(users, run_idx)
+        sorted_scores = scores[order]
+        low = np.full(segment[-1] + 1, np.inf) if len(segment) else np.array([])
+        high = np.full_like(low, -np.inf)
+        np.minimum.at(low, segment, sorted_scores)
+        np.maximum.at(high, segment, sorted_scores)
+
+        spread = (high - low)[segment]
+        normalized = np.ones(len(scores))
+        nonzero = spread > 0
+        normalized[nonzero] = (sorted_scores - low[segment])[nonzero] / spread[nonzero]
+
+        result = np.empty(len(scores))
+        result[order] = normalized
+        return result
+
+
+    @staticmethod
+    def _list_lengths(users: np.ndarray, run_idx: np.ndarray) -> np.ndarray:
+        """
+        Helper function to find the length of each user's list from each run.
+
+        Args:
+            users (np.ndarray): The user of each recommendation.
+            run_idx (np.ndarray): The run of each recommendation.
+
+        Returns:
+            np.ndarray: The length of the list containing each recommendation.
+        """
+        order, segment = Fusion._segments(users, run_idx)
+        result = np.empty(len(users))
+        result[order] = np.bincount(segment)[segment] if len(segment) else []
+        return result
+
+
+    @staticmethod
+    def name(config: dict) -> str:
+        """
+        Builds a readable name for a fusion configuration.
+
+        Args:
+            config (dict): The fusion configuration.
+
+        Returns:
+            str: The name (e.g. rrf-60-w1_1_2).
+        """
+        name = config["method"]
+        if config["method"] == "rrf":
+            name += f"-{config.get('constant', Fusion.rrf_constant):g}"
+        if config.get("weights") is not None:
+            name += "-w" + "_".join(f"{w:g}" for w in config["weights"])
+        return name
+
+
+    def _transform(self, method: str, constant: float) -> "sparse.csr_matrix":
+        """
+        Helper function to compute the per-run contribution of every
+        candidate for a fusion method.
+
+        Args:
+            method (str): The fusion method.
+            constant (float): The RRF constant.
+
+        Returns:
+            scipy.sparse.csr_matrix: The contributions by candidate and run.
+
+        Raises:
+            ValueError: If the method is not supported.
+        """
+        if method == "rrf":
+            contributions = self._ranks.copy()
+            contributions.data = 1 / (contributions.data + constant)
+            return contributions
+        elif method in ["combsum", "combmnz"]:
+            return self._normalized
+        elif method == "borda":
+            return self._borda
+        raise ValueError(f"Invalid fusion method: {method}")
+
+
+    def fuse(self, configs: list[dict]) -> dict[str, np.ndarray]:
+        """
+        Computes the fused score of every candidate for several fusion
+        configurations. Configurations sharing a method (and RRF constant)
+        are computed together in a single sparse matrix product over all of
+        their weight vectors.
+
+        Args:
+            configs (list[dict]): Fusion configurations with a `method`, and
+            optionally per-run `weights` (default: all 1) and an RRF
+            `constant` (default: 60).
+
+        Returns:
+            dict[str, np.ndarray]: The scores of every candidate, by
+            configuration name.
+
+        Raises:
+            ValueError: If a configuration's weights do not match the runs.
+        """
+        groups = {}
+        for config in configs:
+            weights = config.get("weights")
+            weights = np.ones(self.num_runs) if weights is None else np.asarray(weights, dtype=np.float64)
+            if len(weights) != self.num_runs:
+                raise ValueError(f"Expected {self.num_runs} weights for {self.name(config)}")
+            key = (config["method"], config.get("constant", self.rrf_constant))
+            groups.setdefault(key, []).append((self.name(config), weights))
+
+        fused = {}
+        for (method, constant), members in groups.items():
+            weights = np.stack([w for _, w in members], axis=1)
+            scores = self._transform(method, constant) @ weights
+
+            if method == "combmnz":
+                hits = self._ranks.copy()
+                hits.data = np.ones_like(hits.data)
+                scores = scores * (hits @ (weights != 0).astype(np.float64))
+
+            for i, (name, _) in enumerate(members):
+                fused[name] = np.asarray(scores[:, i]).ravel()
+        return fused
+
+
+    def top_k(self, scores: np.ndarray, k: int) -> pd.DataFrame:
+        """
+        Selects each user's top k candidates by fused score, breaking ties by
+        ascending movie id.
+
+        Args:
+            scores (np.ndarray): The fused score of every candidate.
+            k (int): Number of recommendations per user.
+
+        Returns:
+            pd.DataFrame: Run data with the user_id, movie_id, rank and score
+            columns.
+        """
+        order = np.lexsort((self.movies, -scores, self.users))
+        users = self.users[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], users[1:] != users[:-1])))
+        counts = np.diff(np.concatenate((starts, [len(users)])))
+        ranks = np.arange(len(users)) - np.repeat(starts, counts) + 1
+        keep = ranks <= k
+
+        return pd.DataFrame({
+            "user_id": users[keep],
+            "movie_id": self.movies[order][keep],
+            "rank": ranks[keep],
+            "score": scores[order][keep],
+        })
@@ -6,23 +6,22 @@ class Rerank:
     tradeoff = 0.5
 
     def __init__(
-            self, recs: list[list[int, float]], limit: int, distance: Distance,
+            self,
+            recs_std: list[tuple[int, float]],
+            novelty_std: list[tuple[int, float]],
+            limit: int,
         ):
         """
-        Defines rerankers for a given recommendation list.
+        Defines rerankers for a given recommendation list, from its relevance
+        and novelty scores standardized with `standardize`.
 
         Args:
-            recs (list[list[int, float]]): The initial item recs and their scores.
+            recs_std (list[tuple[int, float]]): The initial item recs and their
+            standardized scores.
+            novelty_std (list[tuple[int, float]]): The item recs and their
+            standardized novelty scores.
             limit (int): The cutoff point for the number of items.
-            distance (Distance): Calculates item distance objectives.
         """
-        # Precompute relevance weights by standardizing initial recommendations.
-        recs_std = Distance.standardize(recs, 1)
-
-        # Precompute and standardize novelty scores.
-        novelty_scores = [(item, distance.by_rarity(item)) for item, _ in recs]
-        novelty_std = Distance.standardize(novelty_scores, 1)
-
         self.recs_set = set(recs_std)
         self.novelty_std = dict(novelty_std)
 
@@ -32,6 +31,31 @@ class Rerank:
             self.limit = len(self.recs_set)
 
 
+    @staticmethod
+    def standardize(
+            recs: list[list[int, float]], distance: Distance,
+        ) -> tuple[list[tuple[int, float]], list[tuple[int, float]]]:
+        """
+        Standardizes the relevance and novelty scores of a recommendation
+        list, which do not depend on the tradeoff.
+
+        Args:
+            recs (list[list[int, float]]): The initial item recs and their scores.
+            distance (Distance): Calculates item distance objectives.
+
+        Returns:
+            tuple[list[tuple[int, float]], list[tuple[int, float]]]: The item
+            recs with their standardized relevance and novelty scores.
+        """
+        # Precompute relevance weights by standardizing initial recommendations.
+        recs_std = Distance.standardize(recs, 1)
+
+        # Precompute and standardize novelty scores.
+        novelty_scores = [(item, distance.by_rarity(item)) for item, _ in recs]
+        novelty_std = Distance.standardize(novelty_scores, 1)
+        return recs_std, novelty_std
+
+
     def _full_objective(
         self,
         alpha: float,
@@ -0,0 +1,153 @@
+import concurrent.futures
+import hashlib
+import inspect
+import json
+import logging
+import multiprocessing
+import pathlib
+
+import pandas as pd
+
+from utils.datasets.files.atomic_writer import AtomicWriter
+from utils.interface.lazy_module import LazyModule
+from .visualizations import Visualizations
+
+
+logger = logging.getLogger(__name__)
+matplotlib = LazyModule("matplotlib")
+
+
+def _render(
+    df: pd.DataFrame, output_dir: str, dpi: int, plot: str, kwargs: dict,
+) -> str:
+    """
+    Renders a single figure on the non-interactive Agg backend. Defined at
+    module level so it can run in worker processes.
+
+    Args:
+        df (pd.DataFrame): The data to be visualized.
+        output_dir (str): The directory to store the figure.
+        dpi (int): The resolution of the saved image.
+        plot (str): The name of the Visualizations method to call.
+        kwargs (dict): The arguments of the method, including file_name.
+
+    Returns:
+        str: The file name of the rendered figure.
+    """
+    matplotlib.use("Agg")
+    getattr(Visualizations(df, output_dir, dpi), plot)(**kwargs)
+    return kwargs["file_name"]
+
+
+class PlotRunner:
+    # Hashes of the inputs of previously rendered figures, by file name.
+    manifest_name = ".plot_hashes.json"
+
+    def __init__(self, output_dir: str, final: bool = False, workers: int = 4):
+        """
+        Defines a runner that renders figures in parallel processes, skipping
+        figures whose data, parameters and plotting code are unchanged since
+        they were last rendered at the same resolution.
+
+        Args:
+            output_dir (str): The directory to store the figures.
+            final (bool, optional): Render at publication resolution instead
+            of the faster preview resolution.
+            workers (int, optional): The number of figures rendered at once.
+        """
+        self.output_dir = pathlib.Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.dpi = Visualizations.final_dpi if final else Visualizations.preview_dpi
+        self.workers = workers
+        self.jobs = []
+
+
+    def add(self, df: pd.DataFrame, plot: str, **kwargs):
+        """
+        Queues a figure to be rendered.
+
+        Args:
+            df (pd.DataFrame): The data to be visualized.
+            plot (str): The name of the Visualizations method to call.
+            **kwargs: The arguments of the method, including file_name.
+
+        Raises:
+            ValueError: If the plot does not exist or has no file name.
+        """
+        if not hasattr(Visualizations, plot):
+            raise ValueError(f"Invalid plot: {plot}")
+        if "file_name" not in kwargs:
+            raise ValueError(f"A file name is required for plot {plot}")
+        self.jobs.append((df, plot, kwargs))
+
+
+    def _hash(self, df: pd.DataFrame, plot: str, kwargs: dict) -> str:
+        """
+        Helper function to hash everything that determines a figure.
+
+        Args:
+            df (pd.DataFrame): The data to be visualized.
+            plot (str): The name of the Visualizations method to call.
+            kwargs (dict): The arguments of the method.
+
+        Returns:
+            str: The hexadecimal hash.
+        """
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        digest.update(json.dumps(
+            [list(map(str, df.columns)), plot, kwargs, self.dpi],
+            default=str,
+            sort_keys=True,
+        ).encode())
+        digest.update(inspect.getsource(Visualizations).encode())
+        return digest.hexdigest()
+
+
+    def run(self) -> list[str]:
+        """
+        Renders all queued figures that have changed.
+
+        Returns:
+            list[str]: The file names of the rendered figures.
+        """
+        manifest_path = self.output_dir / self.manifest_name
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+        pending = []
+        for df, plot, kwargs in self.jobs:
+            file_name = kwargs["file_name"]
+            key = self._hash(df, plot, kwargs)
+            if manifest.get(file_name) == key and (self.output_dir / file_name).exists():
+                logger.info(f"Skipping unchanged {file_name}")
+                continue
+            pending.append((key, df, plot, kwargs))
+        self.jobs = []
+
+        rendered = []
+        # Render serially where fork is unavailable (e.g. Windows).
+        parallel = "fork" in multiprocessing.get_all_start_methods()
+        if parallel and self.workers > 1 and len(pending) > 1:
+            context = multiprocessing.get_context("fork")
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(self.workers, len(pending)), mp_context=context,
+            ) as executor:
+                futures = {
+                    executor.submit(_render, df, str(self.output_dir), self.dpi, plot, kwargs): key
+                    for key, df, plot, kwargs in pending
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    file_name = future.result()
+                    manifest[file_name] = futures[future]
+                    rendered.append(file_name)
+        else:
+            for key, df, plot, kwargs in pending:
+                file_name = _render(df, str(self.output_dir), self.dpi, plot, kwargs)
+                manifest[file_name] = key
+                rendered.append(file_name)
+
+        with AtomicWriter.open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        logger.info(f"Rendered {len(rendered)} figures at {self.dpi} dpi")
+        return rendered
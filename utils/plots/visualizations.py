@@ -1,27 +1,38 @@
 import pathlib
 
 import numpy as np
-
-from adjustText import adjust_text
-from matplotlib.lines import Line2D
-from matplotlib.patches import Patch
-import matplotlib.pyplot as plt
 import pandas as pd
-from scipy.interpolate import interp1d
-from scipy.stats import kendalltau
-import seaborn as sns
+
+from utils.interface.lazy_module import LazyModule
+
+
+# Plotting and scipy dependencies are only imported once a figure is drawn.
+adjustText = LazyModule("adjustText")
+interpolate = LazyModule("scipy.interpolate")
+mlines = LazyModule("matplotlib.lines")
+mpatches = LazyModule("matplotlib.patches")
+plt = LazyModule("matplotlib.pyplot")
+sns = LazyModule("seaborn")
+stats = LazyModule("scipy.stats")
 
 
 class Visualizations:
-    def __init__(self, df: pd.DataFrame, output_dir: str):
+    # Resolutions for quick previews and publication quality renders.
+    preview_dpi = 150
+    final_dpi = 1000
+
+    def __init__(self, df: pd.DataFrame, output_dir: str, dpi: int = final_dpi):
         """
         Create visualizations for a given dataset.
 
         Args:
             df (pd.DataFrame): The data to be visualized.
             output_dir (str): The base directory to store the generated visualizations.
+            dpi (int, optional): The resolution of saved images (default:
+            publication quality; PlotRunner passes the preview resolution).
         """
         self.df = df
+        self.dpi = dpi
         self.palette = "Blues"
         self.alt_palette = "Reds"
 
@@ -40,7 +51,7 @@ class Visualizations:
         Returns:
             str: The textual information containing the Kendall correlation.
         """
-        kendall_corr, p_value = kendalltau(data1, data2)
+        kendall_corr, p_value = stats.kendalltau(data1, data2)
         p_value_text = f"p<0.001" if p_value < 0.001 else f"p={p_value:.3f}"
 
         corr_text = f"Kendall's Tau={kendall_corr:.2f}\n({p_value_text})"
@@ -101,7 +112,7 @@ class Visualizations:
             file_name (str): The name of the file to be saved.
         """
         output_path = f"{self.output_dir}/{file_name}"
-        plt.savefig(output_path, bbox_inches="tight", dpi=1000)
+        plt.savefig(output_path, bbox_inches="tight", dpi=self.dpi)
         plt.close()
 
 
@@ -134,7 +145,7 @@ class Visualizations:
             plt.text(row[x], row[y], row[label], fontsize=6.5)
             for _, row in self.df.iterrows()
         ]
-        adjust_text(
+        adjustText.adjust_text(
             texts,
             only_move={"points": "y", "texts": "y"},
             arrowprops=dict(arrowstyle="->", color="black", lw=0.5),
@@ -297,7 +308,7 @@ class Visualizations:
         }
 
         # Interpolate l1 line.
-        l1_interp_func = interp1d(self.df[x], self.df[l1], kind="linear", fill_value="extrapolate")
+        l1_interp_func = interpolate.interp1d(self.df[x], self.df[l1], kind="linear", fill_value="extrapolate")
         l1_intersect_min = l1_interp_func(indiff_lower)
         l1_intersect_max = l1_interp_func(indiff_upper)
 
@@ -330,10 +341,10 @@ class Visualizations:
 
         # Create custom legend.
         legend_lines = [
-            Line2D([0], [0], color=line_map[key], lw=1, label=key) for key in line_map
+            mlines.Line2D([0], [0], color=line_map[key], lw=1, label=key) for key in line_map
         ]
         legend_patches = [
-            Patch(color=colour_map[key], label=key) for key in colour_map
+            mpatches.Patch(color=colour_map[key], label=key) for key in colour_map
         ]
 
         lines_legend = plt.legend(
@@ -356,3 +367,40 @@ class Visualizations:
         plt.gca().invert_xaxis()
 
         self._save_image(file_name)
+
+
+    def significance_heatmap(
+        self,
+        fig_size: tuple[int, int],
+        alpha: float,
+        file_name: str,
+    ):
+        """
+        Plots a heatmap of pairwise p-values between algorithms, where the
+        data is a square matrix indexed by algorithm on both axes. Pairs that
+        are significantly different are marked with an asterisk.
+
+        Args:
+            fig_size (tuple[int, int]): The dimensions of the plot.
+            alpha (float): The significance level.
+            file_name (str): The name of the file being saved.
+        """
+        annot = self.df.map(lambda p: "*" if p < alpha else "")
+
+        plt.figure(figsize=fig_size)
+        ax = sns.heatmap(
+            self.df,
+            cmap=f"{self.palette}_r",
+            vmin=0,
+            vmax=1,
+            annot=annot,
+            fmt="",
+            mask=self.df.isna(),
+            square=True,
+            cbar_kws={"label": "Adjusted p-value", "shrink": 0.7},
+        )
+        ax.set_xlabel(None)
+        ax.set_ylabel(None)
+        ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
+
+        self._save_image(file_name)
@@ -0,0 +1,327 @@
+import collections
+import concurrent.futures
+import http.server
+import json
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.datasets.files.run_file import RunFile
+from utils.objectives.distance import Distance
+from utils.objectives.rerank import Rerank
+
+
+logger = logging.getLogger(__name__)
+
+
+class RerankBatcher:
+    # Number of recent request latencies kept for percentiles, and the
+    # columns of the run each batch is reranked as.
+    latency_window = 10_000
+    run_headers = ["user_id", "q0", "movie_id", "rank", "score", "algorithm"]
+
+    def __init__(self, distance: Distance, max_batch: int = 64, max_wait: float = 0.002):
+        """
+        Defines a micro-batcher that collects concurrent rerank requests and
+        reranks them together through a single `RunFile.rerank` call per
+        objective, k and tradeoff. A batch is started as soon as a request
+        arrives and closed once it holds `max_batch` requests or `max_wait`
+        seconds have passed.
+
+        Args:
+            distance (Distance): Defines how item distances are measured.
+            max_batch (int, optional): The maximum number of requests per batch.
+            max_wait (float, optional): The maximum time in seconds to wait
+            for more requests before reranking a batch.
+        """
+        self.distance = distance
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=self.latency_window)
+        self.count = 0
+        self.batches = 0
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+
+    def validate(self, request: dict) -> dict:
+        """
+        Checks a rerank request, filling in its defaults. Candidates must be
+        movies with ratings, since objectives are measured from them.
+
+        Args:
+            request (dict): The request, with a user_id, candidates as pairs of
+            movie id and score, and optionally an objective, tradeoff and k.
+
+        Returns:
+            dict: The validated request.
+
+        Raises:
+            ValueError: If the request is invalid.
+        """
+        candidates = request.get("candidates")
+        if not isinstance(candidates, list) or not candidates:
+            raise ValueError("Candidates must be a non-empty list of [movie_id, score] pairs")
+        if any(not isinstance(c, (list, tuple)) or len(c) != 2 for c in candidates):
+            raise ValueError("Candidates must be a non-empty list of [movie_id, score] pairs")
+        try:
+            candidates = [(int(movie_id), float(score)) for movie_id, score in candidates]
+        except (TypeError, ValueError):
+            raise ValueError("Candidates must be a non-empty list of [movie_id, score] pairs")
+        unknown = sorted({movie_id for movie_id, _ in candidates if movie_id not in self.distance.rated})
+        if unknown:
+            raise ValueError(f"Unknown movie ids: {unknown}")
+
+        objective = request.get("objective", "novelty")
+        if objective.startswith("_") or not callable(getattr(Rerank, objective, None)):
+            raise ValueError(f"Invalid objective: {objective}")
+        tradeoff = float(request.get("tradeoff", Rerank.tradeoff))
+        if not 0 <= tradeoff <= 1:
+            raise ValueError(f"Tradeoff must be between 0 and 1: {tradeoff}")
+
+        return {
+            "user_id": request.get("user_id"),
+            "candidates": candidates,
+            "objective": objective,
+            "tradeoff": tradeoff,
+            "k": int(request.get("k", len(candidates))),
+        }
+
+
+    def submit(self, request: dict) -> concurrent.futures.Future:
+        """
+        Queues a validated request for the next batch.
+
+        Args:
+            request (dict): The validated request.
+
+        Returns:
+            concurrent.futures.Future: The reranked pairs of movie id and score.
+        """
+        future = concurrent.futures.Future()
+        self.requests.put((request, future, time.perf_counter()))
+        return future
+
+
+    def _run(self):
+        """
+        Helper function to collect and rerank batches until the process exits.
+        """
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._rerank_batch(batch)
+
+
+    def _rerank_group(
+        self, objective: str, k: int, tradeoff: float, requests: list[dict],
+    ) -> list[list[tuple]]:
+        """
+        Helper function to rerank requests sharing an objective, k and
+        tradeoff as a single run, where each request is its own user.
+
+        Args:
+            objective (str): The objective to maximize.
+            k (int): Number of recommendations to rerank.
+            tradeoff (float): Amount of relevance to maintain.
+            requests (list[dict]): The validated requests.
+
+        Returns:
+            list[list[tuple]]: The reranked pairs of movie id and score of
+            each request.
+        """
+        rows = [
+            (position, "Q0", int(movie_id), 0, float(score), "service")
+            for position, request in enumerate(requests)
+            for movie_id, score in request["candidates"]
+        ]
+        run = RunFile(df=pd.DataFrame(rows, columns=self.run_headers))
+        reranked = run.rerank(objective, k, tradeoff, self.distance).df
+        results = {
+            position: list(zip(group["movie_id"].tolist(), group["score"].tolist()))
+            for position, group in reranked.groupby("user_id")
+        }
+        return [results.get(position, []) for position in range(len(requests))]
+
+
+    def _rerank_batch(self, batch: list[tuple]):
+        """
+        Helper function to rerank a batch, grouping requests that share an
+        objective, k and tradeoff into a single run. If a group fails, its
+        requests are reranked one at a time, so only the offending request
+        fails.
+
+        Args:
+            batch (list[tuple]): The requests, their futures and arrival times.
+        """
+        groups = collections.defaultdict(list)
+        for entry in batch:
+            request = entry[0]
+            groups[(request["objective"], request["k"], request["tradeoff"])].append(entry)
+
+        for (objective, k, tradeoff), entries in groups.items():
+            try:
+                results = self._rerank_group(
+                    objective, k, tradeoff, [request for request, _, _ in entries],
+                )
+            except Exception as e:
+                if len(entries) == 1:
+                    entries[0][1].set_exception(e)
+                    continue
+                logger.warning(
+                    f"Reranking {len(entries)} requests together failed, "
+                    "reranking them one at a time"
+                )
+                for request, future, _ in entries:
+                    try:
+                        future.set_result(self._rerank_group(objective, k, tradeoff, [request])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(entries, results):
+                future.set_result(result)
+
+        now = time.perf_counter()
+        with self.lock:
+            self.latencies.extend(now - start for _, _, start in batch)
+            self.count += len(batch)
+            self.batches += 1
+
+
+    def stats(self) -> dict:
+        """
+        Summarizes the requests served so far.
+
+        Returns:
+            dict: The request and batch counts, mean batch size, and p50 and
+            p99 latencies in milliseconds over recent requests.
+        """
+        with self.lock:
+            latencies = np.array(self.latencies)
+            count, batches = self.count, self.batches
+        p50, p99 = (np.percentile(latencies, [50, 99]) * 1000).tolist() if len(latencies) else (None, None)
+        return {
+            "requests": count,
+            "batches": batches,
+            "mean_batch_size": count / batches if batches else None,
+            "p50_ms": p50,
+            "p99_ms": p99,
+        }
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    # Keep connections open between requests, sending each response as soon
+    # as it is written.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _respond(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._respond(200, self.server.batcher.stats())
+        else:
+            self._respond(404, {"error": f"Unknown path: {self.path}"})
+
+
+    def do_POST(self):
+        if self.path != "/rerank":
+            self._respond(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = self.server.batcher.validate(json.loads(self.rfile.read(length)))
+        except Exception as e:
+            self._respond(400, {"error": str(e)})
+            return
+
+        try:
+            recs = self.server.batcher.submit(request).result()
+        except Exception as e:
+            self._respond(500, {"error": str(e)})
+            return
+        self._respond(200, {
+            "user_id": request["user_id"],
+            "recommendations": [
+                {"movie_id": movie_id, "rank": rank, "score": score}
+                for rank, (movie_id, score) in enumerate(recs, start=1)
+            ],
+        })
+
+
+    def log_message(self, format: str, *args):
+        logger.debug(format % args)
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    # Accept bursts of concurrent connections.
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class RerankService:
+    def __init__(
+        self,
+        distance: Distance,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+    ):
+        """
+        Defines an HTTP/JSON service that reranks live recommendation lists
+        with the same code as `RunFile.rerank`. `POST /rerank` takes a JSON
+        object with a user_id, candidates as [movie_id, score] pairs, and
+        optionally an objective, tradeoff and k, returning the reranked
+        recommendations. `GET /stats` reports request counts, batch sizes and
+        p50/p99 latencies.
+
+        Args:
+            distance (Distance): Defines how item distances are measured.
+            host (str, optional): The address to listen on.
+            port (int, optional): The port to listen on.
+            max_batch (int, optional): The maximum number of requests per batch.
+            max_wait (float, optional): The maximum time in seconds to wait
+            for more requests before reranking a batch.
+        """
+        self.server = _Server((host, port), _RequestHandler)
+        self.server.batcher = RerankBatcher(distance, max_batch, max_wait)
+
+
+    def serve(self):
+        """
+        Serves requests until interrupted.
+        """
+        host, port = self.server.server_address[:2]
+        logger.info(f"Serving reranks at http://{host}:{port}")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            logger.info(f"Stopped after serving {self.server.batcher.stats()}")
@@ -0,0 +1,496 @@
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Optional
+
+from utils.datasets.cache.result_cache import ResultCache
+from utils.datasets.files.movie_mapping_file import MovieMappingFile
+from utils.datasets.files.rating_file import RatingFile
+from utils.datasets.files.user_ids_file import UserIdsFile
+from utils.datasets.folders.run_folder import RunFolder
+from utils.datasets.shards.shard_merger import ShardMerger
+from utils.datasets.shards.user_shard import UserShard
+from utils.objectives.distance import Distance
+
+
+logger = logging.getLogger(__name__)
+
+# Ratings and distances loaded once by the daemon, and inherited by its forked
+# workers so jobs never reload them.
+_daemon_state = {}
+
+# Every message is a JSON object prefixed by its length in bytes.
+_header = struct.Struct(">I")
+
+
+def _send_message(sock: socket.socket, message: dict):
+    """
+    Sends a length-prefixed JSON message.
+
+    Args:
+        sock (socket.socket): The connected socket.
+        message (dict): The message to send.
+    """
+    data = json.dumps(message).encode()
+    sock.sendall(_header.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """
+    Receives exactly `size` bytes.
+
+    Args:
+        sock (socket.socket): The connected socket.
+        size (int): The number of bytes to receive.
+
+    Returns:
+        bytes: The received bytes.
+
+    Raises:
+        ValueError: If the connection closes early.
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ValueError("Connection closed before the message was received")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv_message(sock: socket.socket) -> dict:
+    """
+    Receives a length-prefixed JSON message.
+
+    Args:
+        sock (socket.socket): The connected socket.
+
+    Returns:
+        dict: The received message.
+    """
+    (size,) = _header.unpack(_recv_exact(sock, _header.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+def _cache(args: dict) -> Optional[ResultCache]:
+    """
+    Opens the result cache of a job, if it has one.
+
+    Args:
+        args (dict): The job arguments.
+
+    Returns:
+        ResultCache, optional: The cache, or None without a cache directory.
+    """
+    if not args.get("cache"):
+        return None
+    return ResultCache(args["cache"], int(args["cache_size"] * 1024 ** 3))
+
+
+def _rerank(args: dict) -> dict:
+    """
+    Reranks and saves runs, matching `scripts.rerank.rerank_runs`.
+
+    Args:
+        args (dict): The job arguments.
+
+    Returns:
+        dict: The output directory.
+    """
+    runs = RunFolder(args["runs"])
+    if args.get("shard"):
+        runs = runs.shard(UserShard.parse(args["shard"]))
+    reranked_runs = runs.rerank(
+        args["objective"],
+        args["k"],
+        args["tradeoff"],
+        _daemon_state["rerank_distance"],
+        _cache(args),
+    )
+    reranked_runs.save(
+        args["output"], f".{args['format']}", args["compression"], args["workers"],
+    )
+    return {"output": args["output"]}
+
+
+def _evaluate(args: dict) -> dict:
+    """
+    Evaluates and saves a metric across runs, matching
+    `scripts.evaluation.run_metrics`.
+
+    Args:
+        args (dict): The job arguments.
+
+    Returns:
+        dict: The output file.
+    """
+    if _daemon_state["distance"] is None:
+        raise ValueError("The daemon was started without a movie mapping file")
+
+    user_ids = UserIdsFile(args["users"]).user_ids
+    runs = RunFolder(args["runs"])
+    if args.get("shard"):
+        shard = UserShard.parse(args["shard"])
+        scores_df = runs.shard(shard).score_users(
+            args["metric"], args["k"], _daemon_state["distance"], shard.users(user_ids),
+        )
+        ShardMerger.save_scores(scores_df, args["output"], args["compression"])
+        return {"output": args["output"]}
+
+    measured_runs = runs.evaluate(
+        args["metric"], args["k"], _daemon_state["distance"], user_ids, _cache(args),
+    )
+    measured_runs.rearrange()
+    measured_runs.save(args["output"], args["compression"])
+    return {"output": args["output"]}
+
+
+def _file_state(path: str) -> tuple[int, int]:
+    """
+    Records the size and modification time of a file, to tell whether it
+    changed after it was loaded.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        tuple[int, int]: The size in bytes and modification time in
+        nanoseconds.
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _run_job(job: str, args: dict) -> dict:
+    """
+    Runs a job within a worker. Defined at module level so it can be sent to
+    a process pool.
+
+    Args:
+        job (str): The job type, either "rerank" or "evaluate".
+        args (dict): The job arguments.
+
+    Returns:
+        dict: The job result.
+    """
+    jobs = {"rerank": _rerank, "evaluate": _evaluate}
+    return jobs[job](args)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = _recv_message(self.request)
+            response = self.server.worker_daemon.handle(request)
+        except Exception as e:
+            response = {"status": "error", "message": str(e)}
+        _send_message(self.request, response)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class WorkerDaemon:
+    # Job types run on the workers; "status" and "shutdown" requests are
+    # answered directly.
+    jobs = ["rerank", "evaluate"]
+
+    def __init__(
+        self,
+        socket_path: str,
+        ratings: str,
+        movies: Optional[str] = None,
+        workers: int = 4,
+        queue_size: int = 256,
+    ):
+        """
+        Defines a local daemon that keeps ratings and distances resident and
+        runs rerank and evaluate jobs sent over a Unix socket. The data is
+        loaded once before the workers are forked, so every job skips the
+        loading that dominates short runs. At most `workers` jobs run at once
+        and up to `queue_size` more wait for a worker; further jobs are
+        rejected. Jobs are rejected once the loaded files change on disk, and
+        the workers are forked again if one of them dies.
+
+        Args:
+            socket_path (str): The path of the Unix socket to listen on.
+            ratings (str): The movie ratings file.
+            movies (str, optional): The movie details mapping file, required
+            for evaluate jobs.
+            workers (int, optional): The number of jobs run at once.
+            queue_size (int, optional): The number of jobs waiting at once.
+        """
+        self.socket_path = str(pathlib.Path(socket_path).resolve())
+        self.ratings = str(pathlib.Path(ratings).resolve())
+        self.movies = str(pathlib.Path(movies).resolve()) if movies else None
+        self.workers = workers
+
+        # Recorded before loading, so changes made while loading are caught.
+        self.file_states = {
+            path: _file_state(path) for path in [self.ratings, self.movies] if path
+        }
+
+        logger.info(f"Loading ratings from {self.ratings}")
+        rating_file = RatingFile(self.ratings)
+        items_rated = rating_file.items_rated()
+        _daemon_state["rerank_distance"] = Distance(
+            items_rated, {}, {}, rating_file.num_users,
+        )
+        _daemon_state["distance"] = None
+        if self.movies:
+            logger.info(f"Loading movies from {self.movies}")
+            _daemon_state["distance"] = Distance(
+                items_rated,
+                MovieMappingFile(self.movies).genres_map(),
+                rating_file.user_ratings(),
+                rating_file.num_users,
+            )
+
+        # The first fork happens before any server threads exist. Later forks
+        # wait for running jobs to finish and hold new jobs back, so no
+        # handler thread is running a job while the daemon forks.
+        self.executor = self._start_workers()
+        self.restarting = False
+        self.restarts = 0
+
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.active = 0
+        self.completed = 0
+        self.server = None
+
+
+    def _start_workers(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Helper function to fork the workers, which inherit the loaded data.
+
+        Returns:
+            concurrent.futures.ProcessPoolExecutor: The running workers.
+        """
+        context = multiprocessing.get_context("fork")
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+        )
+        executor.submit(os.getpid).result()
+        return executor
+
+
+    def _restart_workers(self, executor: concurrent.futures.ProcessPoolExecutor):
+        """
+        Helper function to replace a broken pool by forking the workers again
+        from the data still loaded in the daemon. New jobs wait until the
+        workers are replaced, and the fork waits until every running job has
+        failed on the broken pool, so no handler thread is running a job (or
+        the pool's management thread) when the daemon forks.
+
+        Args:
+            executor (concurrent.futures.ProcessPoolExecutor): The broken pool.
+        """
+        with self.idle:
+            # Only the first job to see the broken pool replaces it.
+            if self.executor is not executor or self.restarting:
+                return
+            self.restarting = True
+            self.idle.wait_for(lambda: self.active == 0)
+
+        try:
+            logger.error("A worker died, forking the workers again")
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = self._start_workers()
+            self.restarts += 1
+        finally:
+            with self.idle:
+                self.restarting = False
+                self.idle.notify_all()
+
+
+    def _run(self, job: str, args: dict) -> dict:
+        """
+        Helper function to run a job on the workers. If a worker dies (e.g.
+        killed for running out of memory), every job on the pool fails, so
+        the workers are restarted and the failed job is reported.
+
+        Args:
+            job (str): The job type.
+            args (dict): The job arguments.
+
+        Returns:
+            dict: The job result.
+
+        Raises:
+            ValueError: If a worker died while running the job.
+        """
+        with self.idle:
+            self.idle.wait_for(lambda: not self.restarting)
+            self.active += 1
+            executor = self.executor
+
+        try:
+            return executor.submit(_run_job, job, args).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            # Restarted below, once the job no longer counts as active.
+            pass
+        finally:
+            with self.idle:
+                self.active -= 1
+                self.idle.notify_all()
+
+        self._restart_workers(executor)
+        raise ValueError(f"A worker died while running the {job} job")
+
+
+    def _check_inputs(self, args: dict):
+        """
+        Helper function to ensure a job uses the data the daemon has loaded,
+        and that the loaded files have not changed since.
+
+        Args:
+            args (dict): The job arguments.
+
+        Raises:
+            ValueError: If the job's ratings or movies differ, or if they
+            changed on disk.
+        """
+        if args.get("input") != self.ratings:
+            raise ValueError(f"The daemon has loaded {self.ratings}, not {args.get('input')}")
+        if "movies" in args and args["movies"] != self.movies:
+            raise ValueError(f"The daemon has loaded {self.movies}, not {args['movies']}")
+
+        for path, state in self.file_states.items():
+            try:
+                changed = _file_state(path) != state
+            except FileNotFoundError:
+                changed = True
+            if changed:
+                raise ValueError(f"{path} changed after the daemon loaded it, restart the daemon")
+
+
+    def handle(self, request: dict) -> dict:
+        """
+        Handles a single request, waiting for its job to complete.
+
+        Args:
+            request (dict): The request, with a `job` type and its `args`.
+
+        Returns:
+            dict: The response, with a `status` of "ok" or "error".
+        """
+        job = request.get("job")
+        if job == "status":
+            with self.lock:
+                return {
+                    "status": "ok",
+                    "ratings": self.ratings,
+                    "movies": self.movies,
+                    "workers": self.workers,
+                    "active": self.active,
+                    "completed": self.completed,
+                    "restarts": self.restarts,
+                }
+        if job == "shutdown":
+            threading.Thread(target=self.server.shutdown).start()
+            return {"status": "ok"}
+        if job not in self.jobs:
+            raise ValueError(f"Invalid job: {job}")
+
+        args = request.get("args", {})
+        self._check_inputs(args)
+        if not self.slots.acquire(blocking=False):
+            raise ValueError("The daemon's job queue is full")
+
+        start = time.perf_counter()
+        try:
+            result = self._run(job, args)
+        finally:
+            with self.lock:
+                self.completed += 1
+            self.slots.release()
+
+        seconds = time.perf_counter() - start
+        logger.info(f"Completed {job} job for {args.get('output')} in {seconds:.2f}s")
+        return {"status": "ok", "seconds": seconds, **result}
+
+
+    def serve(self):
+        """
+        Listens for requests until a shutdown request is received, then
+        stops the workers and removes the socket.
+        """
+        socket_path = pathlib.Path(self.socket_path)
+        if socket_path.exists():
+            try:
+                WorkerClient(self.socket_path).request("status")
+                raise ValueError(f"A daemon is already listening at {self.socket_path}")
+            except ConnectionError:
+                # Left behind by a daemon that did not shut down cleanly.
+                socket_path.unlink()
+
+        self.server = _Server(self.socket_path, _RequestHandler)
+        self.server.worker_daemon = self
+        logger.info(f"Listening at {self.socket_path} with {self.workers} workers")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.executor.shutdown()
+            socket_path.unlink(missing_ok=True)
+            logger.info("Daemon stopped")
+
+
+class WorkerClient:
+    # Arguments holding paths, which are made absolute since the daemon may
+    # run from another directory.
+    path_args = ["runs", "input", "movies", "users", "output", "cache"]
+
+    def __init__(self, socket_path: str):
+        """
+        Defines a client that sends jobs to a WorkerDaemon.
+
+        Args:
+            socket_path (str): The path of the daemon's Unix socket.
+        """
+        self.socket_path = str(socket_path)
+
+
+    def request(self, job: str, args: Optional[dict] = None) -> dict:
+        """
+        Sends a request and waits for its response.
+
+        Args:
+            job (str): The job type, or "status" or "shutdown".
+            args (dict, optional): The job arguments, matching the arguments
+            of the corresponding script.
+
+        Returns:
+            dict: The response.
+
+        Raises:
+            ConnectionError: If no daemon is listening at the socket.
+            ValueError: If the job failed.
+        """
+        args = dict(args or {})
+        for name in self.path_args:
+            if args.get(name) is not None:
+                args[name] = str(pathlib.Path(args[name]).resolve())
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                raise ConnectionError(f"No daemon is listening at {self.socket_path}: {e}")
+            _send_message(sock, {"job": job, "args": args})
+            response = _recv_message(sock)
+
+        if response["status"] != "ok":
+            raise ValueError(f"Daemon {job} job failed: {response['message']}")
+        return response
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+
+class Bootstrap:
+    def __init__(
+        self,
+        resamples: int = 1000,
+        confidence: float = 0.95,
+        chunk_size: int = 100,
+        seed: int = 0,
+    ):
+        """
+        Defines percentile bootstrap confidence intervals for mean scores.
+        Users are resampled with multinomial weights, so every resample of
+        every group is a single weighted mean computed as a matrix product.
+        The same resamples are shared across groups, keeping them paired.
+
+        Args:
+            resamples (int, optional): The number of bootstrap resamples.
+            confidence (float, optional): The confidence level of intervals.
+            chunk_size (int, optional): The number of resamples drawn at a
+            time, bounding memory to roughly chunk_size x users weights.
+            seed (int, optional): The random seed for reproducible intervals.
+
+        Raises:
+            ValueError: If the parameters are out of range.
+        """
+        if resamples < 1 or chunk_size < 1:
+            raise ValueError("Resamples and chunk size must be positive")
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1")
+
+        self.resamples = resamples
+        self.confidence = confidence
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+
+    def resample_means(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Computes the mean of every group for every bootstrap resample.
+
+        Args:
+            scores (np.ndarray): Scores as a users by groups matrix, with NaN
+            for missing scores.
+
+        Returns:
+            np.ndarray: The resampled means, resamples by groups.
+        """
+        num_users = scores.shape[0]
+        present = ~np.isnan(scores)
+        filled = np.where(present, scores, 0.0)
+        present = present.astype(np.float64)
+
+        rng = np.random.default_rng(self.seed)
+        probabilities = np.full(num_users, 1 / num_users)
+        means = np.empty((self.resamples, scores.shape[1]))
+        for start in range(0, self.resamples, self.chunk_size):
+            end = min(start + self.chunk_size, self.resamples)
+            weights = rng.multinomial(num_users, probabilities, size=end - start)
+            weights = weights.astype(np.float64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                means[start:end] = (weights @ filled) / (weights @ present)
+        return means
+
+
+    def intervals(self, scores: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calculates the mean and confidence interval of every group.
+
+        Args:
+            scores (pd.DataFrame): Scores indexed by user id, with one column
+            per group.
+
+        Returns:
+            pd.DataFrame: The score, ci_lower and ci_upper of each group,
+            indexed by group.
+        """
+        matrix = scores.to_numpy(dtype=np.float64)
+        means = self.resample_means(matrix)
+        tail = (1 - self.confidence) / 2 * 100
+        lower, upper = np.nanpercentile(means, [tail, 100 - tail], axis=0)
+        return pd.DataFrame(
+            {
+                "score": np.nanmean(matrix, axis=0),
+                "ci_lower": lower,
+                "ci_upper": upper,
+            },
+            index=scores.columns,
+        )
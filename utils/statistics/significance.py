@@ -0,0 +1,229 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.interface.lazy_module import LazyModule
+
+
+logger = logging.getLogger(__name__)
+stats = LazyModule("scipy.stats")
+
+
+class Significance:
+    def __init__(self, baseline: pd.Series, candidates: dict[str, pd.Series]):
+        """
+        Initializes paired significance testing of several candidates against
+        a baseline. Per-user scores are aligned by user id into a single
+        users by candidates matrix, keeping only users scored by all of them.
+
+        Args:
+            baseline (pd.Series): The baseline's per-user scores, indexed by
+            user id.
+            candidates (dict[str, pd.Series]): Each candidate's per-user
+            scores, indexed by user id.
+
+        Raises:
+            ValueError: If no candidates or no shared users are provided.
+        """
+        if len(candidates) == 0:
+            raise ValueError("At least one candidate is required")
+
+        aligned = pd.concat(
+            [baseline.rename(None)] + [scores.rename(name) for name, scores in candidates.items()],
+            axis=1,
+            join="inner",
+        ).sort_index()
+        if len(aligned) == 0:
+            raise ValueError("The baseline and candidates share no users")
+
+        dropped = len(baseline) - len(aligned)
+        if dropped > 0:
+            logger.warning(f"Dropping {dropped} baseline users missing from some candidates")
+
+        self.user_ids = aligned.index.to_numpy()
+        self.names = list(candidates)
+        self.baseline = aligned.iloc[:, 0].to_numpy(dtype=np.float64)
+        self.scores = aligned.iloc[:, 1:].to_numpy(dtype=np.float64)
+
+
+    @staticmethod
+    def effect_size(differences: np.ndarray) -> np.ndarray:
+        """
+        Calculates the paired effect size (Cohen's d_z) of each column of
+        differences: the mean difference over its standard deviation.
+
+        Args:
+            differences (np.ndarray): The paired differences, users by
+            candidates.
+
+        Returns:
+            np.ndarray: The effect size of each candidate.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return differences.mean(axis=0) / differences.std(axis=0, ddof=1)
+
+
+    def test(self, alpha: float = 0.01) -> pd.DataFrame:
+        """
+        Runs paired t-tests and Wilcoxon signed-rank tests of every candidate
+        against the baseline, all in a single vectorized call each.
+        Candidates identical to the baseline have undefined p-values (NaN).
+
+        Args:
+            alpha (float, optional): The significance level.
+
+        Returns:
+            pd.DataFrame: The baseline and candidate means, relative
+            improvement, t-test and Wilcoxon p-values, effect size and
+            t-test significance of each candidate.
+        """
+        differences = self.scores - self.baseline[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_test = stats.ttest_rel(self.scores, self.baseline[:, None], axis=0)
+            wilcoxon = stats.wilcoxon(differences, axis=0)
+
+        baseline_mean = self.baseline.mean()
+        means = self.scores.mean(axis=0)
+        return pd.DataFrame({
+            "candidate": self.names,
+            "baseline_mean": baseline_mean,
+            "mean": means,
+            "improvement": (means - baseline_mean) / baseline_mean,
+            "t_statistic": t_test.statistic,
+            "p_value": t_test.pvalue,
+            "wilcoxon_p_value": wilcoxon.pvalue,
+            "effect_size": self.effect_size(differences),
+            "significant": t_test.pvalue < alpha,
+        })
+
+
+    @staticmethod
+    def correct(p_values: np.ndarray, method: str = "holm") -> np.ndarray:
+        """
+        Adjusts p-values for multiple comparisons. Undefined (NaN) p-values
+        are left as is and do not count towards the number of comparisons.
+
+        Args:
+            p_values (np.ndarray): The unadjusted p-values.
+            method (str, optional): The correction, one of holm, bonferroni
+            or none.
+
+        Returns:
+            np.ndarray: The adjusted p-values.
+
+        Raises:
+            ValueError: If the correction is not supported.
+        """
+        p_values = np.asarray(p_values, dtype=np.float64)
+        adjusted = p_values.copy()
+        defined = np.flatnonzero(~np.isnan(p_values))
+        m = len(defined)
+
+        if method == "none":
+            return adjusted
+        elif method == "bonferroni":
+            adjusted[defined] = np.minimum(p_values[defined] * m, 1)
+        elif method == "holm":
+            order = defined[np.argsort(p_values[defined], kind="stable")]
+            scaled = p_values[order] * (m - np.arange(m))
+            adjusted[order] = np.minimum(np.maximum.accumulate(scaled), 1)
+        else:
+            raise ValueError(f"Invalid correction: {method}")
+        return adjusted
+
+
+    @staticmethod
+    def pairwise(
+        scores: pd.DataFrame,
+        test: str = "t",
+        correction: str = "holm",
+        max_elements: int = 10_000_000,
+    ) -> pd.DataFrame:
+        """
+        Runs paired tests between every pair of algorithms. Per-user
+        differences are computed for many pairs at once, in chunks of at most
+        `max_elements` values to bound memory, and tested in a single
+        vectorized call per chunk. Users without a score for every algorithm
+        are dropped.
+
+        Args:
+            scores (pd.DataFrame): Scores indexed by user id, with one column
+            per algorithm.
+            test (str, optional): The paired test, either t or wilcoxon.
+            correction (str, optional): The multiple comparison correction,
+            one of holm, bonferroni or none.
+            max_elements (int, optional): The maximum number of differences
+            held in memory at once.
+
+        Returns:
+            pd.DataFrame: The mean difference (first minus second), p-value
+            and adjusted p-value of each pair of algorithms.
+
+        Raises:
+            ValueError: If the test is not supported.
+        """
+        if test not in ["t", "wilcoxon"]:
+            raise ValueError(f"Invalid test: {test}")
+
+        complete = scores.dropna()
+        if len(complete) < len(scores):
+            logger.warning(f"Dropping {len(scores) - len(complete)} users missing from some algorithms")
+        matrix = complete.to_numpy(dtype=np.float64)
+
+        first, second = np.triu_indices(matrix.shape[1], k=1)
+        chunk = max(1, max_elements // max(1, len(matrix)))
+        mean_differences = np.empty(len(first))
+        p_values = np.empty(len(first))
+        for start in range(0, len(first), chunk):
+            pairs = slice(start, start + chunk)
+            differences = matrix[:, first[pairs]] - matrix[:, second[pairs]]
+            mean_differences[pairs] = differences.mean(axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if test == "t":
+                    p_values[pairs] = stats.ttest_1samp(differences, 0, axis=0).pvalue
+                else:
+                    p_values[pairs] = stats.wilcoxon(differences, axis=0).pvalue
+
+        algorithms = np.asarray(complete.columns)
+        return pd.DataFrame({
+            "algorithm_a": algorithms[first],
+            "algorithm_b": algorithms[second],
+            "mean_difference": mean_differences,
+            "p_value": p_values,
+            "adjusted_p_value": Significance.correct(p_values, correction),
+        })
+
+
+    @staticmethod
+    def to_matrix(
+        pairs: pd.DataFrame, column: str = "adjusted_p_value", signed: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Arranges pairwise results into an algorithms by algorithms matrix,
+        with an empty diagonal.
+
+        Args:
+            pairs (pd.DataFrame): The pairwise results.
+            column (str, optional): The result to arrange.
+            signed (bool, optional): Negate the result when the pair is
+            reversed (e.g. for mean differences), instead of mirroring it.
+
+        Returns:
+            pd.DataFrame: The matrix, indexed by algorithm on both axes.
+        """
+        algorithms, codes = np.unique(
+            np.concatenate([pairs["algorithm_a"], pairs["algorithm_b"]]),
+            return_inverse=True,
+        )
+        first, second = np.split(codes, 2)
+        values = pairs[column].to_numpy(dtype=np.float64)
+
+        matrix = np.full((len(algorithms), len(algorithms)), np.nan)
+        matrix[first, second] = values
+        matrix[second, first] = -values if signed else values
+        return pd.DataFrame(
+            matrix,
+            index=pd.Index(algorithms, name="algorithm"),
+            columns=algorithms,
+        )